@@ -0,0 +1,130 @@
+# Benchmark: many accounts on one AccountBook vs one MockBroker + RiskManager per account, with fill/equity parity
+import argparse
+import logging
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from topstep_demo.accounts import AccountBook
+from topstep_demo.broker import MockBroker
+from topstep_demo.config import BotConfig
+from topstep_demo.data import iter_price_arrays
+from topstep_demo.metrics import MetricsAccumulator
+from topstep_demo.risk import RiskManager
+from topstep_demo.runner import enforce_limits, process_signal
+from topstep_demo.strategy import SIGNAL_NAMES
+from topstep_demo.synthetic import iter_synthetic_chunks
+from topstep_demo.vectorized import ma_crossover_signals
+
+BASE = BotConfig(symbol="ES", qty=1, sl_pct=0.004, tp_pct=0.008, fast_ma=10, slow_ma=30,
+                 trading_day_start_hour=17)
+
+
+def account_configs(n: int, seed: int = 0):
+    """Mixed sizes, SL/TP, order models and Topstep-style limits, some tight enough to breach."""
+    rng = np.random.default_rng(seed)
+    models = [(1.0, 0.0, "none"), (50.0, 0.25, "ticks:1"), (5.0, 0.25, "none"), (20.0, 0.0, "bps:0.5")]
+    configs = []
+    for i in range(n):
+        multiplier, tick_size, slippage = models[i % len(models)]
+        limited = i % 3 != 0
+        configs.append(replace(
+            BASE,
+            qty=int(rng.integers(1, 4)),
+            sl_pct=float(rng.choice([0.002, 0.004, 0.008])),
+            tp_pct=float(rng.choice([0.004, 0.008, 0.016])),
+            allow_short=bool(i % 2),
+            initial_cash=float(rng.choice([50_000.0, 100_000.0, 150_000.0])),
+            multiplier=multiplier,
+            tick_size=tick_size,
+            slippage=slippage,
+            commission=float(rng.choice([0.0, 2.5])),
+            max_trailing_drawdown=float(rng.choice([1_500.0, 3_000.0, 20_000.0])) if limited else None,
+            daily_loss_limit=float(rng.choice([800.0, 2_000.0])) if limited else None,
+            max_contracts=int(rng.integers(1, 4)) if limited else None
+        ))
+    return configs
+
+
+def loop_account(config, feed, codes):
+    """Reference: the loop engine's risk -> broker path for one account, with its metrics."""
+    metrics = MetricsAccumulator()
+    broker = MockBroker.from_config(config, on_fill_pnl=metrics.record)
+    risk_manager = RiskManager(config, broker)
+    equity = np.empty(len(codes))
+    for i, ((timestamp, price), code) in enumerate(zip(feed, codes)):
+        process_signal(config, risk_manager, broker, timestamp, price, SIGNAL_NAMES[code + 1])
+        eq = broker.get_cash() + broker.get_position(config.symbol) * price * broker.multiplier
+        if risk_manager.limits is not None:
+            enforce_limits(config, risk_manager, broker, eq, price, timestamp)
+        metrics.update_equity(eq)
+        equity[i] = eq
+    return list(broker.get_trades()), equity
+
+
+def kernel(configs, feed, codes, keep: int = 0):
+    """Step an AccountBook over the feed; returns it, the seconds and the equity of the first `keep` accounts."""
+    book = AccountBook(configs)
+    equity = np.empty((len(codes), keep))
+    step = book.step
+    start = time.perf_counter()
+    if keep:
+        for i, ((timestamp, price), code) in enumerate(zip(feed, codes)):
+            equity[i] = step(timestamp, price, code)[:keep]
+    else:
+        for (timestamp, price), code in zip(feed, codes):
+            step(timestamp, price, code)
+    elapsed = time.perf_counter() - start
+    book.summary()
+    return book, elapsed, equity
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the multi-account kernel")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--accounts", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--reference", type=int, default=24, help="Accounts also run through MockBroker + RiskManager")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    chunks = list(iter_synthetic_chunks(args.rows, seed=5))
+    timestamps = np.concatenate([t for t, _ in chunks])
+    prices = np.concatenate([p for _, p in chunks])
+    feed = list(iter_price_arrays(timestamps, prices))
+    codes = ma_crossover_signals(prices, BASE.fast_ma, BASE.slow_ma).tolist()
+    configs = account_configs(max(max(args.accounts), args.reference))
+
+    # Parity: every reference account's fills and per-tick equity, bit for bit
+    reference = configs[:args.reference]
+    book, _, equity = kernel(reference, feed, codes, keep=len(reference))
+    start = time.perf_counter()
+    mismatches = 0
+    for i, config in enumerate(reference):
+        trades, expected = loop_account(config, feed, codes)
+        if trades != book.trades(i) or not np.array_equal(expected, equity[:, i]):
+            mismatches += 1
+            print(f"  MISMATCH account {i}: {len(trades)} vs {len(book.trades(i))} fills")
+    per_account = (time.perf_counter() - start) / len(reference)
+    fills = int(book.fills.sum())
+    breaches = len(book.breaches)
+    print(f"Parity over {len(feed):,} ticks: {len(reference) - mismatches}/{len(reference)} accounts match "
+          f"({fills:,} fills, {breaches} limit breaches)")
+
+    print(f"\n{'accounts':>8} {'path':>7} {'book s':>9} {'us/tick':>8} {'loop s (est.)':>14} {'speedup':>8}")
+    for n in args.accounts:
+        book, elapsed, _ = kernel(configs[:n], feed, codes)
+        loop = per_account * n
+        path = "arrays" if book.vectorized else "objects"
+        print(f"{n:>8} {path:>7} {elapsed:>9.2f} {elapsed / len(feed) * 1e6:>8.2f} {loop:>14.2f} {loop / elapsed:>7.1f}x")
+
+    if mismatches:
+        sys.exit(f"{mismatches} accounts differ from MockBroker + RiskManager")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Benchmark: MockBroker fill throughput and trade ledger memory
+import argparse
+import logging
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from topstep_demo.broker import MockBroker
+
+
+@dataclass
+class LegacyTrade:
+    """The original (non-slots) Trade record kept per fill in a list."""
+    timestamp: datetime
+    symbol: str
+    side: str
+    qty: int
+    price: float
+    order_id: str
+    realized_pnl: Optional[float] = None
+
+
+class LegacyLedger(list):
+    """Stands in for the original list-of-dataclasses history."""
+    def append(self, timestamp, symbol, side, qty, price, order_number, realized_pnl, commission=0.0):
+        super().append(LegacyTrade(timestamp, symbol, side, qty, price, f"ORD-{order_number:04d}", realized_pnl))
+
+
+def fill_many(broker: MockBroker, fills: int):
+    start_time = datetime(2024, 1, 2, 9, 30)
+    place = broker.place_order
+    for i in range(fills // 2):
+        ts = start_time + timedelta(seconds=i)
+        price = 4000.0 + (i % 97) * 0.25
+        place("ES", 1, "BUY", price, ts)
+        place("ES", 1, "SELL", price + 0.5, ts)
+
+
+def make_broker(legacy: bool) -> MockBroker:
+    broker = MockBroker()
+    if legacy:
+        broker.trades = LegacyLedger()
+    return broker
+
+
+def measure(label: str, fills: int, legacy: bool):
+    # Throughput without tracemalloc overhead, then memory in a separate pass
+    broker = make_broker(legacy)
+    start = time.perf_counter()
+    fill_many(broker, fills)
+    elapsed = time.perf_counter() - start
+
+    broker = make_broker(legacy)
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    fill_many(broker, fills)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {fills / elapsed:>14,.0f} {(after - before) / fills:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MockBroker fills/sec and bytes/trade")
+    parser.add_argument("--fills", type=int, default=200_000)
+    args = parser.parse_args()
+
+    # INFO filtered out, as in a quiet production run
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"{'ledger':<10} {'fills/sec':>14} {'bytes/trade':>12}")
+    measure("legacy", args.fills, legacy=True)
+    measure("columnar", args.fills, legacy=False)
+
+
+if __name__ == "__main__":
+    main()
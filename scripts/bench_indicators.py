@@ -0,0 +1,97 @@
+# Benchmark: strategy variants on one shared IndicatorEngine vs one private engine each, and the indicator array LRU
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from topstep_demo.config import BotConfig
+from topstep_demo.indicators import ARRAY_CACHE, IndicatorEngine
+from topstep_demo.strategy import STRATEGIES
+from topstep_demo.synthetic import iter_synthetic_chunks
+from topstep_demo.vectorized import strategy_signals
+
+# A small sweep: windows overlap across strategies (SMA(20) is read by ma and
+# bollinger, every ma variant shares one prefix-sum stream)
+VARIANTS = (
+    [("ma", dict(fast_window=f, slow_window=s)) for f in (5, 10, 20) for s in (20, 50)]
+    + [("ema", dict(fast=f, slow=s)) for f in (12, 20) for s in (26, 50)]
+    + [("rsi", dict(period=14, oversold=o, overbought=100 - o)) for o in (20, 25, 30)]
+    + [("bollinger", dict(window=20, k=k)) for k in (1.5, 2.0, 2.5)]
+    + [("donchian", dict(window=w)) for w in (20, 50)]
+)
+
+
+def build(name, params):
+    return STRATEGIES[name](**params)
+
+
+def per_tick(values, shared: bool):
+    strategies = [build(name, params) for name, params in VARIANTS]
+    engine = None
+    if shared:
+        engine = IndicatorEngine()
+        for strategy in strategies:
+            strategy.use_indicators(engine)
+    calls = [s.on_price for s in strategies]
+    start = time.perf_counter()
+    if engine is not None:
+        update = engine.update
+        for price in values:
+            update(price)
+            for on_price in calls:
+                on_price(None, price)
+    else:
+        for price in values:
+            for on_price in calls:
+                on_price(None, price)
+    elapsed = time.perf_counter() - start
+    unique = len(engine) if engine is not None else sum(len(s.indicators) for s in strategies)
+    return elapsed, unique
+
+
+def batch(prices, cached: bool):
+    configs = [BotConfig(symbol="SIM", qty=1, sl_pct=0.01, tp_pct=0.02, strategy=name,
+                         strategy_params={k: float(v) for k, v in params.items()})
+               for name, params in VARIANTS if name != "ma"]
+    ARRAY_CACHE.clear()
+    hits, misses = ARRAY_CACHE.hits, ARRAY_CACHE.misses
+    start = time.perf_counter()
+    for config in configs:
+        if not cached:
+            ARRAY_CACHE.clear()
+        strategy_signals(config, prices)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(configs), ARRAY_CACHE.hits - hits, ARRAY_CACHE.misses - misses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark shared indicators")
+    parser.add_argument("--ticks", type=int, default=100_000, help="Prices for the per-tick comparison")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Prices for the batch comparison")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    prices = np.concatenate([p for _, p in iter_synthetic_chunks(max(args.ticks, args.rows), seed=3)])
+    values = prices[:args.ticks].tolist()
+
+    print(f"{len(VARIANTS)} strategy variants, per tick over {len(values):,} prices")
+    print(f"{'engine':<10} {'indicators':>11} {'us/tick':>9}")
+    private, unique = per_tick(values, shared=False)
+    print(f"{'private':<10} {unique:>11} {private / len(values) * 1e6:>9.2f}")
+    shared, unique = per_tick(values, shared=True)
+    print(f"{'shared':<10} {unique:>11} {shared / len(values) * 1e6:>9.2f}   {private / shared:.1f}x")
+
+    print(f"\nBatch on_prices over {len(prices):,} prices")
+    print(f"{'arrays':<10} {'configs':>8} {'hits':>6} {'misses':>7} {'seconds':>8}")
+    for cached in (False, True):
+        t, n, hits, misses = batch(prices, cached)
+        print(f"{'LRU' if cached else 'no cache':<10} {n:>8} {hits:>6} {misses:>7} {t:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Benchmark: event journal cost on the calling thread vs writing each event synchronously, and read speed
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from topstep_demo.journal import EventJournal, iter_journal, load_journal, summarize_journal
+
+
+def events(n: int):
+    start = datetime(2024, 1, 2, 9, 30)
+    for i in range(n):
+        ts = start + timedelta(milliseconds=250 * i)
+        price = 4000.0 + (i % 97) * 0.25
+        side = "BUY" if i % 2 == 0 else "SELL"
+        yield ts, side, price, i
+
+
+def sync_jsonl(path: str, n: int) -> float:
+    """Reference: format and write every event on the calling thread."""
+    with open(path, "w") as f:
+        start = time.perf_counter()
+        for ts, side, price, i in events(n):
+            f.write(json.dumps({"event": "fill", "ts": ts.isoformat(), "symbol": "ES", "side": side,
+                                "qty": 1, "price": price, "order": i + 1}) + "\n")
+        f.flush()
+        return time.perf_counter() - start
+
+
+def journal(path: str, fmt: str, n: int):
+    j = EventJournal(path, fmt=fmt)
+    fill = j.fill
+    start = time.perf_counter()
+    for ts, side, price, i in events(n):
+        fill(ts, "ES", side, 1, price, None if i % 2 == 0 else 0.25, i + 1)
+    caller = time.perf_counter() - start
+    j.close()
+    return caller, time.perf_counter() - start, j.stalls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the event journal")
+    parser.add_argument("--events", type=int, default=500_000)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    n = args.events
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sync.jsonl")
+        t = sync_jsonl(path, n)
+        print(f"{'writer':<16} {'caller ns/event':>16} {'total s':>9} {'stalls':>7} {'bytes/event':>12}")
+        print(f"{'sync jsonl':<16} {t / n * 1e9:>16.0f} {t:>9.2f} {'-':>7} {os.path.getsize(path) / n:>12.1f}")
+        for fmt, name in (("jsonl", "journal.jsonl"), ("binary", "journal.bin")):
+            path = os.path.join(tmp, name)
+            caller, total, stalls = journal(path, fmt, n)
+            print(f"{'journal ' + fmt:<16} {caller / n * 1e9:>16.0f} {total:>9.2f} {stalls:>7} "
+                  f"{os.path.getsize(path) / n:>12.1f}")
+
+        print()
+        print(f"{'reader':<28} {'seconds':>8} {'events/sec':>12}")
+        for name in ("journal.jsonl", "journal.bin"):
+            path = os.path.join(tmp, name)
+            start = time.perf_counter()
+            summary = summarize_journal(load_journal(path))
+            t = time.perf_counter() - start
+            assert summary["counts"]["fill"] == n
+            print(f"{'load+summarize ' + name:<28} {t:>8.3f} {n / t:>12,.0f}")
+            start = time.perf_counter()
+            count = sum(1 for _ in iter_journal(path))
+            t = time.perf_counter() - start
+            assert count == n
+            print(f"{'replay ' + name:<28} {t:>8.3f} {n / t:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Benchmark: resting order book (price-sorted heaps) vs scanning every order per tick
+import argparse
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from topstep_demo.broker import OrderBook, PendingOrder
+from topstep_demo.synthetic import iter_synthetic_chunks
+
+
+class ScanBook:
+    """Reference book: a plain list checked order by order on every tick."""
+    def __init__(self):
+        self.orders = []
+
+    def add(self, order: PendingOrder):
+        self.orders.append(order)
+
+    def cancel(self, order_number: int):
+        for i, o in enumerate(self.orders):
+            if o.order_number == order_number:
+                return self.orders.pop(i)
+        return None
+
+    def triggered(self, price: float):
+        hit, keep = [], []
+        for o in self.orders:
+            if o.kind == "LIMIT":
+                fired = price <= o.price if o.side == "BUY" else price >= o.price
+            else:
+                fired = price >= o.price if o.side == "BUY" else price <= o.price
+            (hit if fired else keep).append(o)
+        self.orders = keep
+        return hit
+
+
+def make_order(number: int, price: float, rng: random.Random) -> PendingOrder:
+    # Resting orders away from the market, like a grid or a set of brackets
+    side = rng.choice(("BUY", "SELL"))
+    kind = rng.choice(("LIMIT", "STOP"))
+    distance = rng.randint(1, 400) * 0.25
+    below = (side == "BUY") == (kind == "LIMIT")
+    return PendingOrder(number, "ES", side, kind, 1, price - distance if below else price + distance, None)
+
+
+def run(book, prices, resting: int, seed: int):
+    """Keep `resting` orders in the book: replace every fill, cancel one order every 10 ticks."""
+    rng = random.Random(seed)
+    number = 0
+    live = []  # every number submitted, filled or not
+    for _ in range(resting):
+        number += 1
+        order = make_order(number, prices[0], rng)
+        book.add(order)
+        live.append(order.order_number)
+    fills = []
+    start = time.perf_counter()
+    for i, price in enumerate(prices):
+        hit = book.triggered(price)
+        fills.extend(o.order_number for o in hit)
+        if i % 10 == 0 and live:
+            # Cancel a random order (a no-op if it already filled); replace it if it was resting
+            if book.cancel(live[rng.randrange(len(live))]) is not None:
+                hit = hit + [None]
+        for _ in hit:
+            number += 1
+            order = make_order(number, price, rng)
+            book.add(order)
+            live.append(order.order_number)
+    return fills, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pending order book")
+    parser.add_argument("--ticks", type=int, default=100_000)
+    parser.add_argument("--resting", type=str, default="10,100,1000,10000", help="Resting order counts to test")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    prices = [p for _, chunk in iter_synthetic_chunks(args.ticks, seed=args.seed, kind="ticks") for p in chunk.tolist()]
+    print(f"{'resting':>8} {'fills':>8} {'scan us/tick':>13} {'heap us/tick':>13} {'speedup':>8} {'same fills':>11}")
+    for resting in (int(x) for x in args.resting.split(",")):
+        # The scan is O(orders) per tick; cap its run so large books stay quick
+        scan_prices = prices[:max(1_000, min(len(prices), 20_000_000 // resting))]
+        heap_fills, heap_time = run(OrderBook(), scan_prices, resting, args.seed)
+        scan_fills, scan_time = run(ScanBook(), scan_prices, resting, args.seed)
+        same = sorted(heap_fills) == sorted(scan_fills)
+        _, full_time = run(OrderBook(), prices, resting, args.seed)
+        print(f"{resting:>8} {len(heap_fills):>8} {scan_time / len(scan_prices) * 1e6:>13.3f} "
+              f"{full_time / len(prices) * 1e6:>13.3f} {scan_time / heap_time:>7.1f}x {str(same):>11}")
+        if not same:
+            sys.exit(f"Order book fills differ from the reference scan with {resting} resting orders")
+
+
+if __name__ == "__main__":
+    main()
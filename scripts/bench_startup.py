@@ -0,0 +1,77 @@
+# Benchmark: CLI startup time and which heavy modules each command imports (python -X importtime)
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY = ("numpy", "pandas", "pyarrow", "rich")
+
+COMMANDS = {
+    "import cli": ["-c", "import topstep_demo.cli"],
+    "--help": ["-m", "topstep_demo", "--help"],
+    "backtest (rich)": ["-m", "topstep_demo", "--csv", "{csv}"],
+    "backtest --report json": ["-m", "topstep_demo", "--csv", "{csv}", "--report", "json", "--log-format", "json"],
+    "backtest --report none": ["-m", "topstep_demo", "--csv", "{csv}", "--report", "none", "--log-format", "json"],
+}
+
+
+def run(args, env):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, *args], env=env, capture_output=True, text=True, cwd=ROOT)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        sys.exit(f"{' '.join(args)} failed:\n{proc.stderr}")
+    return elapsed, proc.stderr
+
+
+def import_profile(stderr: str):
+    """Total self time (us) and the cumulative time (us) spent importing each heavy package."""
+    total, heavy = 0, {}
+    depth = {}  # shallowest nesting level seen per heavy package
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, raw = line[len("import time:"):].split("|")
+        total += int(self_us)
+        name = raw.strip()
+        package = name.split(".")[0]
+        if package not in HEAVY:
+            continue
+        # Modules are listed after the ones they import, indented one level deeper
+        # per nesting; only the outermost imports of a package are summed
+        level = len(raw) - len(raw.lstrip())
+        if level < depth.get(package, level + 1):
+            depth[package], heavy[package] = level, 0
+        if level == depth[package]:
+            heavy[package] += int(cumulative)
+    return total, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup")
+    parser.add_argument("--runs", type=int, default=10, help="Wall-clock runs per command (best is reported)")
+    parser.add_argument("--csv", type=str, default="data/sample_prices.csv")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=str(ROOT / "src"))
+    with tempfile.TemporaryDirectory() as tmp:
+        # A private copy, so the price cache build is paid once here and not by a timed run
+        csv = Path(tmp) / "prices.csv"
+        csv.write_bytes((ROOT / args.csv).read_bytes())
+        run(COMMANDS["backtest --report none"][:-2] + ["--csv", str(csv)], env)
+
+        print(f"{'command':<24} {'best ms':>8} {'import ms':>10}  heavy imports (cumulative ms)")
+        for name, template in COMMANDS.items():
+            command = [part.format(csv=csv) for part in template]
+            best = min(run(command, env)[0] for _ in range(args.runs))
+            total, heavy = import_profile(run(["-X", "importtime", *command], env)[1])
+            loaded = ", ".join(f"{k} {v / 1000:.0f}" for k, v in sorted(heavy.items())) or "-"
+            print(f"{name:<24} {best * 1000:>8.1f} {total / 1000:>10.1f}  {loaded}")
+
+
+if __name__ == "__main__":
+    main()
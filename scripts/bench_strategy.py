@@ -0,0 +1,79 @@
+# Microbenchmark: incremental vs. re-summing moving averages
+import argparse
+import math
+import random
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from topstep_demo.strategy import MovingAverageCrossoverStrategy
+
+
+class LegacyCrossover:
+    """The original per-tick implementation: re-sums both windows every tick."""
+
+    def __init__(self, fast_window: int, slow_window: int):
+        self.fast_window = fast_window
+        self.slow_window = slow_window
+        self.prices = deque(maxlen=slow_window + 1)
+        self.prev_fast = None
+        self.prev_slow = None
+
+    def on_price(self, timestamp, price: float) -> str:
+        self.prices.append(price)
+        if len(self.prices) < self.slow_window:
+            return "HOLD"
+        curr_fast = sum(list(self.prices)[-self.fast_window:]) / self.fast_window
+        curr_slow = sum(list(self.prices)[-self.slow_window:]) / self.slow_window
+        signal = "HOLD"
+        if self.prev_fast is not None and self.prev_slow is not None:
+            if self.prev_fast <= self.prev_slow and curr_fast > curr_slow:
+                signal = "BUY"
+            elif self.prev_fast >= self.prev_slow and curr_fast < curr_slow:
+                signal = "SELL"
+        self.prev_fast = curr_fast
+        self.prev_slow = curr_slow
+        return signal
+
+
+def make_prices(n: int, seed: int):
+    rng = random.Random(seed)
+    prices = []
+    price = 4050.0
+    for i in range(n):
+        price += rng.gauss(0.0, 0.5) + math.sin(i / 50.0) * 0.05
+        prices.append(round(price * 4) / 4)  # ES tick size
+    return prices
+
+
+def run(strategy, prices):
+    on_price = strategy.on_price
+    start = time.perf_counter()
+    signals = [on_price(None, p) for p in prices]
+    return time.perf_counter() - start, signals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MA crossover per-tick cost")
+    parser.add_argument("--ticks", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--windows", type=str, default="10:20,50:200,100:500,200:2000",
+                        help="Comma separated fast:slow pairs")
+    args = parser.parse_args()
+
+    prices = make_prices(args.ticks, args.seed)
+    print(f"{'fast/slow':>10} {'legacy us/tick':>15} {'new us/tick':>12} {'speedup':>8} {'signals':>8}")
+    for pair in args.windows.split(","):
+        fast, slow = (int(x) for x in pair.split(":"))
+        t_old, s_old = run(LegacyCrossover(fast, slow), prices)
+        t_new, s_new = run(MovingAverageCrossoverStrategy(fast, slow), prices)
+        match = "match" if s_old == s_new else "DIFF"
+        print(f"{fast:>4}/{slow:<5} {t_old / len(prices) * 1e6:>15.2f} {t_new / len(prices) * 1e6:>12.2f} "
+              f"{t_old / t_new:>7.1f}x {match:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# Benchmark suite: per-stage throughput on seeded synthetic data, checked against a baseline
+import argparse
+import contextlib
+import io
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import numpy as np
+
+from topstep_demo.analytics import analyze, trade_pnl
+from topstep_demo.broker import MockBroker
+from topstep_demo.config import BotConfig
+from topstep_demo.data import load_price_arrays, load_price_feed, merge_price_feeds
+from topstep_demo.portfolio import run_portfolio
+from topstep_demo.report import generate_report
+from topstep_demo.risk import RiskManager
+from topstep_demo.strategy import MovingAverageCrossoverStrategy
+from topstep_demo.synthetic import write_synthetic_csv
+from topstep_demo.vectorized import ma_crossover_signals, run_vectorized_backtest
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "bench_baseline.json"
+# Run settings a baseline must share for its throughput to be comparable
+META_KEYS = ("rows", "kind", "seed", "loop_rows", "symbols")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def bench_load_csv(ctx):
+    return ctx["rows"], timed(lambda: load_price_arrays(ctx["csv"], use_cache=False))
+
+
+def bench_load_cache(ctx):
+    load_price_arrays(ctx["csv"])  # make sure the cache exists
+    return ctx["rows"], timed(lambda: np.asarray(load_price_arrays(ctx["csv"])[1]).sum())
+
+
+def bench_strategy(ctx):
+    prices = ctx["loop_prices"]
+    strategy = MovingAverageCrossoverStrategy(10, 20)
+    on_price = strategy.on_price
+    def run():
+        for p in prices:
+            on_price(None, p)
+    return len(prices), timed(run)
+
+
+def bench_strategy_vectorized(ctx):
+    prices = ctx["prices"]
+    return len(prices), timed(lambda: ma_crossover_signals(prices, 10, 20))
+
+
+def bench_risk(ctx):
+    prices = ctx["loop_prices"]
+    config = BotConfig(symbol="ES", qty=1, sl_pct=0.9, tp_pct=0.9)
+    broker = MockBroker()
+    risk = RiskManager(config, broker)
+    broker.place_order("ES", 1, "BUY", prices[0], None)
+    risk.update_position_state("BUY", prices[0], None)
+    check_exit = risk.check_exit
+    def run():
+        for p in prices:
+            check_exit(p, None)
+    return len(prices), timed(run)
+
+
+def bench_broker(ctx):
+    fills = min(len(ctx["loop_prices"]), 500_000)
+    prices = ctx["loop_prices"][:fills]
+    broker = MockBroker(max_trades=100)
+    place = broker.place_order
+    ts = datetime(2024, 1, 2)
+    def run():
+        side = "BUY"
+        for p in prices:
+            place("ES", 1, side, p, ts)
+            side = "SELL" if side == "BUY" else "BUY"
+    return fills, timed(run)
+
+
+def bench_backtest_vectorized(ctx):
+    config = BotConfig(symbol="ES", qty=1, sl_pct=0.002, tp_pct=0.004)
+    return ctx["rows"], timed(lambda: run_vectorized_backtest(config, ctx["timestamps"], ctx["prices"]))
+
+
+def bench_report(ctx):
+    config = BotConfig(symbol="ES", qty=1, sl_pct=0.002, tp_pct=0.004)
+    result = run_vectorized_backtest(config, ctx["timestamps"], ctx["prices"])
+    import rich.console, rich.table  # noqa: E401,F401 -- print_report imports Rich lazily; keep that out of the timing
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_report(result.trades, result.final_cash, config.initial_cash, result.equity_curve)
+    return len(result.equity_curve), timed(run)
+
+
+def bench_analytics(ctx):
+    config = BotConfig(symbol="ES", qty=1, sl_pct=0.002, tp_pct=0.004)
+    result = run_vectorized_backtest(config, ctx["timestamps"], ctx["prices"])
+    closed_pnl, commissions = trade_pnl(result.trades)
+    return len(result.equity_curve), timed(lambda: analyze(
+        result.equity_curve, ctx["timestamps"], result.position, closed_pnl, commissions, config.initial_cash))
+
+
+def bench_merge_feeds(ctx):
+    paths = ctx["symbol_csvs"]
+    for path in paths.values():
+        load_price_arrays(path)  # time the merge, not the first CSV parse
+    def run():
+        for _ in merge_price_feeds({symbol: load_price_feed(path) for symbol, path in paths.items()}):
+            pass
+    return ctx["symbol_rows"], timed(run)
+
+
+def bench_portfolio(ctx):
+    config = BotConfig(symbol="ES", qty=1, sl_pct=0.002, tp_pct=0.004)
+    feeds = {symbol: str(path) for symbol, path in ctx["symbol_csvs"].items()}
+    for path in ctx["symbol_csvs"].values():
+        load_price_arrays(path)
+    return ctx["symbol_rows"], timed(lambda: run_portfolio(config, feeds, fast_mode=True, report="none"))
+
+
+STAGES = {
+    "load_csv": bench_load_csv,
+    "load_cache": bench_load_cache,
+    "strategy": bench_strategy,
+    "strategy_vectorized": bench_strategy_vectorized,
+    "risk_check_exit": bench_risk,
+    "broker_fills": bench_broker,
+    "backtest_vectorized": bench_backtest_vectorized,
+    "report": bench_report,
+    "analytics": bench_analytics,
+    "merge_feeds": bench_merge_feeds,
+    "portfolio": bench_portfolio,
+}
+# Stages that run on the --symbols per-symbol feeds
+MULTI_SYMBOL_STAGES = ("merge_feeds", "portfolio")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic rows to generate (1M-100M)")
+    parser.add_argument("--loop-rows", type=int, default=1_000_000,
+                        help="Cap for the per-tick Python stages (strategy, risk, broker)")
+    parser.add_argument("--kind", choices=["bars", "ticks"], default="bars")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--symbols", type=int, default=4,
+                        help="Feeds for the multi-symbol stages (merge, portfolio); --loop-rows ticks in total")
+    parser.add_argument("--stages", type=str, default=",".join(STAGES), help="Comma separated stage names")
+    parser.add_argument("--baseline", type=str, default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed throughput drop vs baseline before flagging a regression")
+    parser.add_argument("--output", type=str, help="Also write this run's results to JSON")
+    parser.add_argument("--workdir", type=str, help="Where to write generated data (default: temp dir)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(args.workdir or tmp)
+        csv_path = workdir / f"bench_{args.kind}_{args.rows}_{args.seed}.csv"
+        if not csv_path.exists():
+            print(f"Generating {args.rows:,} {args.kind} -> {csv_path}")
+            write_synthetic_csv(csv_path, args.rows, seed=args.seed, kind=args.kind,
+                                interval_s=60.0 if args.kind == "bars" else 0.25)
+        timestamps, prices = load_price_arrays(csv_path)
+        prices = np.array(prices)
+        ctx = {
+            "csv": csv_path,
+            "rows": len(prices),
+            "timestamps": np.array(timestamps),
+            "prices": prices,
+            "loop_prices": prices[:args.loop_rows].tolist(),
+        }
+        if any(name in MULTI_SYMBOL_STAGES for name in stages):
+            # One seeded series per symbol, like generate_data.py --symbols
+            per_symbol = max(1, min(args.rows, args.loop_rows) // args.symbols)
+            ctx["symbol_csvs"] = {}
+            for i in range(args.symbols):
+                path = workdir / f"bench_{args.kind}_{per_symbol}_{args.seed + i}.csv"
+                if not path.exists():
+                    write_synthetic_csv(path, per_symbol, seed=args.seed + i, kind=args.kind,
+                                        interval_s=60.0 if args.kind == "bars" else 0.25)
+                ctx["symbol_csvs"][f"SYM{i + 1}"] = path
+            ctx["symbol_rows"] = per_symbol * args.symbols
+
+        results = {}
+        for name in stages:
+            items, seconds = STAGES[name](ctx)
+            results[name] = {"items": items, "seconds": seconds, "items_per_sec": items / seconds if seconds else 0.0}
+
+    meta = {
+        "rows": args.rows, "kind": args.kind, "seed": args.seed, "loop_rows": args.loop_rows, "symbols": args.symbols,
+        "python": platform.python_version(), "machine": platform.machine(),
+    }
+    baseline = {}
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists() and not args.save_baseline:
+        saved = json.loads(baseline_path.read_text())
+        saved_meta = saved.get("meta", {})
+        differs = [f"{key}={saved_meta.get(key)!r} (this run {meta[key]!r})"
+                   for key in META_KEYS if saved_meta.get(key) != meta[key]]
+        if differs:
+            print(f"\nBaseline {baseline_path} was recorded with {', '.join(differs)}; "
+                  f"not comparing (rerun with matching options or --save-baseline)")
+        else:
+            baseline = saved.get("stages", {})
+
+    regressions = []
+    print(f"\n{'stage':<22} {'items':>12} {'seconds':>9} {'items/sec':>14} {'vs baseline':>12}")
+    for name, r in results.items():
+        compare = ""
+        base = baseline.get(name)
+        if base and base["items_per_sec"]:
+            ratio = r["items_per_sec"] / base["items_per_sec"]
+            compare = f"{ratio:>10.2f}x"
+            if ratio < 1 - args.tolerance:
+                compare += " !"
+                regressions.append(name)
+        print(f"{name:<22} {r['items']:>12,} {r['seconds']:>9.3f} {r['items_per_sec']:>14,.0f} {compare:>12}")
+
+    report = {"meta": meta, "stages": results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nSaved baseline to {baseline_path}")
+    elif regressions:
+        print(f"\nREGRESSION (> {args.tolerance:.0%} slower than baseline): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
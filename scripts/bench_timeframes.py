@@ -0,0 +1,91 @@
+# Benchmark: shared incremental multi-timeframe cache vs one TickBarAggregator per timeframe, with bar parity
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from topstep_demo.bars import TickBarAggregator
+from topstep_demo.data import iter_price_arrays
+from topstep_demo.synthetic import iter_synthetic_chunks
+from topstep_demo.timeframes import TimeframeCache, parse_timeframe
+
+SETS = [("1m",), ("1m", "5m"), ("1m", "5m", "1h"), ("1m", "5m", "15m", "1h", "4h", "1d")]
+
+
+def ticks(rows: int, seed: int):
+    chunks = list(iter_synthetic_chunks(rows, seed=seed, kind="ticks", interval_s=2.0))
+    timestamps = np.concatenate([t for t, _ in chunks])
+    prices = np.concatenate([p for _, p in chunks])
+    return list(iter_price_arrays(timestamps, prices))
+
+
+def separate(feed, timeframes):
+    """Reference: every consumer aggregates the feed itself."""
+    aggregators = [TickBarAggregator(interval_s=parse_timeframe(tf)) for tf in timeframes]
+    bars = [[] for _ in timeframes]
+    updates = [(a.update, out.append) for a, out in zip(aggregators, bars)]
+    start = time.perf_counter()
+    for ts, price in feed:
+        for update, append in updates:
+            bar = update(ts, price)
+            if bar is not None:
+                append(bar)
+    elapsed = time.perf_counter() - start
+    for aggregator, out in zip(aggregators, bars):
+        last = aggregator.flush()
+        if last is not None:
+            out.append(last)
+    return elapsed, bars
+
+
+def cached(feed, timeframes):
+    cache = TimeframeCache(timeframes, history=len(feed))
+    update = cache.update
+    start = time.perf_counter()
+    for ts, price in feed:
+        update(ts, price)
+    elapsed = time.perf_counter() - start
+    cache.flush()
+    return elapsed, [list(cache.series(tf).bars) for tf in timeframes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the multi-timeframe cache")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--seeds", type=int, default=2)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    failures = 0
+    print(f"{'timeframes':<28} {'separate ns/tick':>17} {'cache ns/tick':>14} {'speedup':>8} {'parity':>7}")
+    for timeframes in SETS:
+        t_sep = t_cache = 0.0
+        total = 0
+        ok = True
+        for seed in range(args.seeds):
+            feed = ticks(args.rows, seed)
+            elapsed, expected = separate(feed, timeframes)
+            t_sep += elapsed
+            elapsed, got = cached(feed, timeframes)
+            t_cache += elapsed
+            total += len(feed)
+            for tf, a, b in zip(timeframes, expected, got):
+                if a != b:
+                    first = next((i for i, (x, y) in enumerate(zip(a, b)) if x != y), min(len(a), len(b)))
+                    print(f"  MISMATCH {tf} seed {seed} at bar {first} ({len(a)} vs {len(b)} bars)")
+                    ok = False
+        failures += not ok
+        print(f"{','.join(timeframes):<28} {t_sep / total * 1e9:>17.0f} {t_cache / total * 1e9:>14.0f} "
+              f"{t_sep / t_cache:>7.1f}x {'match' if ok else 'DIFF':>7}")
+
+    if failures:
+        sys.exit(f"{failures} timeframe sets differ from direct aggregation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# Parity check and timing: per-tick on_price vs batch on_prices for every registered strategy,
+# and the MA crossover vs its original re-summing implementation
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from topstep_demo.config import BotConfig
+from topstep_demo.strategy import SIGNAL_NAMES, STRATEGIES, build_strategy
+from topstep_demo.synthetic import iter_synthetic_chunks
+
+# Parameter sets per strategy: defaults, plus short and long windows
+PARAMS = {
+    "ma": [dict(fast_ma=10, slow_ma=20), dict(fast_ma=3, slow_ma=5), dict(fast_ma=50, slow_ma=400)],
+    "ema": [{}, dict(fast=3, slow=5), dict(fast=50, slow=400)],
+    "rsi": [{}, dict(period=2, oversold=10, overbought=90), dict(period=100, oversold=45, overbought=55)],
+    "bollinger": [{}, dict(window=2, k=0.5), dict(window=500, k=1.0)],
+    "donchian": [{}, dict(window=1), dict(window=1000)],
+}
+
+
+def make_config(name: str, params: dict) -> BotConfig:
+    ma = {k: params[k] for k in ("fast_ma", "slow_ma") if k in params}
+    other = {k: float(v) for k, v in params.items() if k not in ma}
+    return BotConfig(symbol="SIM", qty=1, sl_pct=0.01, tp_pct=0.02, strategy=name, strategy_params=other, **ma)
+
+
+def series(kind: str, rows: int, seed: int, **kwargs) -> np.ndarray:
+    chunks = iter_synthetic_chunks(rows, seed=seed, kind=kind, **kwargs)
+    return np.concatenate([prices for _, prices in chunks])
+
+
+def cent_series(rows: int, seed: int):
+    """0.01-tick prices (not exact in binary) that sit flat or flip between two levels: MA ties everywhere."""
+    walk = series("ticks", rows, seed, tick_size=0.01, start_price=100.0)
+    flip = np.where(np.arange(rows) // (seed + 2) % 2 == 0, 100.0, 100.01)
+    return [("cents", seed, walk), ("cents-flip", seed, flip)]
+
+
+def legacy_ma(prices: List[float], fast: int, slow: int) -> List[str]:
+    """The original MA crossover: sum(window) / window re-summed every tick."""
+    signals = []
+    prev = None
+    for i in range(len(prices)):
+        if i + 1 < slow:
+            signals.append("HOLD")
+            continue
+        curr = (sum(prices[i + 1 - fast:i + 1]) / fast, sum(prices[i + 1 - slow:i + 1]) / slow)
+        signal = "HOLD"
+        if prev is not None:
+            if prev[0] <= prev[1] and curr[0] > curr[1]:
+                signal = "BUY"
+            elif prev[0] >= prev[1] and curr[0] < curr[1]:
+                signal = "SELL"
+        prev = curr
+        signals.append(signal)
+    return signals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check batch/per-tick signal parity of all strategies")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--seeds", type=int, default=3, help="Synthetic series per data kind")
+    args = parser.parse_args()
+
+    datasets = [(kind, seed, series(kind, args.rows, seed)) for kind in ("bars", "ticks") for seed in range(args.seeds)]
+    # Edge cases: flat prices and series shorter than the windows
+    datasets.append(("flat", 0, np.full(5_000, 4000.0)))
+    datasets.append(("short", 0, datasets[0][2][:7]))
+    for seed in range(args.seeds):
+        datasets += cent_series(min(args.rows, 20_000), seed)
+
+    failures = 0
+    print(f"{'strategy':<10} {'params':<40} {'tick us/px':>10} {'batch us/px':>11} {'speedup':>8} {'parity':>8}")
+    for name in sorted(STRATEGIES):
+        if not hasattr(STRATEGIES[name], "on_prices"):
+            continue  # per-tick only (e.g. mtf needs timestamps); nothing to compare
+        for params in PARAMS.get(name, [{}]):
+            config = make_config(name, params)
+            t_tick = t_batch = 0.0
+            total = 0
+            ok = True
+            for kind, seed, prices in datasets:
+                strategy = build_strategy(config)
+                on_price = strategy.on_price
+                values = prices.tolist()
+                start = time.perf_counter()
+                per_tick = [on_price(None, p) for p in values]
+                t_tick += time.perf_counter() - start
+
+                start = time.perf_counter()
+                codes = build_strategy(config).on_prices(prices)
+                t_batch += time.perf_counter() - start
+                total += len(values)
+
+                batch = [SIGNAL_NAMES[c + 1] for c in codes.tolist()]
+                if codes.dtype != np.int8 or batch != per_tick:
+                    first = next((i for i, (a, b) in enumerate(zip(per_tick, batch)) if a != b), len(batch))
+                    print(f"  MISMATCH {name} {params} on {kind}/{seed} at index {first}")
+                    ok = False
+                if name == "ma":
+                    # The incremental MAs must also reproduce the original implementation
+                    legacy = legacy_ma(values, config.fast_ma, config.slow_ma)
+                    if legacy != per_tick:
+                        first = next(i for i, (a, b) in enumerate(zip(per_tick, legacy)) if a != b)
+                        print(f"  MISMATCH {name} {params} vs original sum(window) on {kind}/{seed} at index {first}")
+                        ok = False
+            failures += not ok
+            label = ", ".join(f"{k}={v}" for k, v in params.items()) or "defaults"
+            print(f"{name:<10} {label:<40} {t_tick / total * 1e6:>10.3f} {t_batch / total * 1e6:>11.3f} "
+                  f"{t_tick / t_batch:>7.1f}x {'match' if ok else 'DIFF':>8}")
+
+    if failures:
+        sys.exit(f"{failures} strategy configurations differ between on_price and on_prices")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# Parity check and timing: loop engine (strategy -> RiskManager -> MockBroker per tick) vs the vectorized backtest
+import argparse
+import itertools
+import logging
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from topstep_demo.broker import MockBroker
+from topstep_demo.config import BotConfig
+from topstep_demo.data import iter_price_arrays, load_price_arrays
+from topstep_demo.risk import RiskManager
+from topstep_demo.runner import process_tick
+from topstep_demo.strategy import build_strategy
+from topstep_demo.synthetic import iter_synthetic_chunks
+from topstep_demo.vectorized import run_vectorized_backtest
+
+WINDOWS = [(10, 20), (5, 50), (20, 100)]
+QTYS = [1, 3]
+# The order model changes fill prices and cash, so it gets its own pass
+ORDER_MODELS = [dict(), dict(multiplier=50.0, commission=2.5, tick_size=0.25, slippage="ticks:1")]
+OTHER_STRATEGIES = [("ema", {}), ("rsi", dict(period=7.0)), ("bollinger", {}), ("donchian", {})]
+
+
+def configs():
+    base = BotConfig(symbol="SIM", qty=1, sl_pct=0.002, tp_pct=0.004)
+    for (fast, slow), qty, short in itertools.product(WINDOWS, QTYS, (False, True)):
+        yield replace(base, fast_ma=fast, slow_ma=slow, qty=qty, allow_short=short)
+    for model, short in itertools.product(ORDER_MODELS[1:], (False, True)):
+        yield replace(base, allow_short=short, **model)
+    for name, params in OTHER_STRATEGIES:
+        yield replace(base, allow_short=True, strategy=name, strategy_params=params)
+
+
+def run_loop(config: BotConfig, timestamps: np.ndarray, prices: np.ndarray):
+    """The loop engine's per-tick path, as run_simulation runs it without batch signals."""
+    broker = MockBroker.from_config(config)
+    strategy = build_strategy(config)
+    risk_manager = RiskManager(config, broker)
+    equity = []
+    for timestamp, price in iter_price_arrays(timestamps, prices):
+        process_tick(config, strategy, risk_manager, broker, timestamp, price)
+        equity.append(broker.get_cash() + broker.get_position(config.symbol) * price * broker.multiplier)
+    return list(broker.get_trades()), broker.get_cash(), equity
+
+
+def synthetic(kind: str, rows: int, seed: int, **kwargs):
+    chunks = list(iter_synthetic_chunks(rows, seed=seed, kind=kind, **kwargs))
+    return np.concatenate([t for t, _ in chunks]), np.concatenate([p for _, p in chunks])
+
+
+def cent_datasets(rows: int, seed: int):
+    """0.01-tick prices (not exact in binary) that sit flat or flip between two levels: MA ties everywhere."""
+    timestamps, walk = synthetic("ticks", rows, seed, tick_size=0.01, start_price=100.0)
+    flip = np.where(np.arange(rows) // (seed + 2) % 2 == 0, 100.0, 100.01)
+    return [(f"cents/{seed}", timestamps, walk), (f"cents-flip/{seed}", timestamps, flip)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check loop vs vectorized backtest parity")
+    parser.add_argument("--rows", type=int, default=50_000, help="Rows per synthetic series")
+    parser.add_argument("--seeds", type=int, default=2, help="Synthetic series per data kind")
+    parser.add_argument("--csv", type=str, default="data/sample_prices.csv")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    datasets = [(args.csv, *load_price_arrays(Path(args.csv)))]
+    datasets += [(f"{kind}/{seed}", *synthetic(kind, args.rows, seed))
+                 for kind in ("bars", "ticks") for seed in range(args.seeds)]
+    for seed in range(args.seeds):
+        datasets += cent_datasets(min(args.rows, 20_000), seed)
+
+    failures = 0
+    print(f"{'data':<24} {'config':<44} {'fills':>6} {'loop s':>7} {'vector s':>9} {'parity':>7}")
+    for name, timestamps, prices in datasets:
+        for config in configs():
+            start = time.perf_counter()
+            trades, cash, equity = run_loop(config, timestamps, prices)
+            t_loop = time.perf_counter() - start
+            start = time.perf_counter()
+            result = run_vectorized_backtest(config, timestamps, prices)
+            t_vector = time.perf_counter() - start
+
+            problems = []
+            if trades != result.trades:
+                first = next((i for i, (a, b) in enumerate(zip(trades, result.trades)) if a != b),
+                             min(len(trades), len(result.trades)))
+                problems.append(f"trades differ at fill {first} ({len(trades)} vs {len(result.trades)})")
+            if cash != result.final_cash:
+                problems.append(f"final cash {cash!r} vs {result.final_cash!r}")
+            if equity != result.equity_curve.tolist():
+                problems.append("equity curves differ")
+            for problem in problems:
+                print(f"  MISMATCH {name} {config.strategy}: {problem}")
+            failures += bool(problems)
+
+            if config.strategy == "ma":
+                label = f"ma {config.fast_ma}/{config.slow_ma}"
+            else:
+                label = config.strategy
+            label += f" qty={config.qty} short={config.allow_short}"
+            if config.commission:
+                label += " +orders"
+            print(f"{name[-24:]:<24} {label:<44} {len(trades):>6} {t_loop:>7.2f} {t_vector:>9.3f} "
+                  f"{'match' if not problems else 'DIFF':>7}")
+
+    if failures:
+        sys.exit(f"{failures} runs differ between the loop and vectorized engines")
+
+
+if __name__ == "__main__":
+    main()
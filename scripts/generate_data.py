@@ -1,8 +1,13 @@
 # Generating realistic sample data
+import argparse
 import csv
 import math
 import random
+import sys
 from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
 
 def generate_csv(path):
     start_price = 4050.0 # Realistic ES price
@@ -27,6 +32,39 @@ def generate_csv(path):
         writer.writeheader()
         writer.writerows(rows)
 
+# Start prices and tick sizes for multi-symbol runs; unknown symbols use 100 / 0.01
+START_PRICES = {"ES": 4050.0, "NQ": 15000.0, "CL": 80.0, "GC": 1950.0}
+TICK_SIZES = {"ES": 0.25, "NQ": 0.25, "CL": 0.01, "GC": 0.1}
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate price data. Without --rows, rebuilds the 1000-row sample.")
+    parser.add_argument("--rows", type=int, help="Rows per symbol for a large seeded synthetic series")
+    parser.add_argument("--out", type=str, default="data/sample_prices.csv",
+                        help="Output CSV (with several symbols, _SYMBOL is added before the suffix)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--kind", type=str, choices=["bars", "ticks"], default="bars", help="Evenly spaced bars or raw ticks")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="Seconds between bars, or mean seconds between ticks (default 60 / 0.25)")
+    parser.add_argument("--symbols", type=str, default=None, help="Comma separated symbols, e.g. ES,NQ,CL,GC")
+    args = parser.parse_args()
+
+    if args.rows is None:
+        generate_csv(args.out)
+        print(f"Generated {args.out}")
+        return
+
+    from topstep_demo.synthetic import write_synthetic_csv
+
+    interval = args.interval or (60.0 if args.kind == "bars" else 0.25)
+    out = Path(args.out)
+    symbols = args.symbols.split(",") if args.symbols else [None]
+    for i, symbol in enumerate(symbols):
+        path = out if symbol is None else out.with_name(f"{out.stem}_{symbol}{out.suffix}")
+        start_price = START_PRICES.get(symbol, 100.0) if symbol else 4050.0
+        tick_size = TICK_SIZES.get(symbol, 0.01) if symbol else 0.25
+        write_synthetic_csv(path, args.rows, seed=args.seed + i, kind=args.kind,
+                            interval_s=interval, start_price=start_price, tick_size=tick_size)
+        print(f"Generated {path} ({args.rows} {args.kind})")
+
 if __name__ == "__main__":
-    generate_csv("data/sample_prices.csv")
-    print("Generated data/sample_prices.csv")
+    main()
@@ -0,0 +1,525 @@
+from dataclasses import replace
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import csv
+import logging
+import math
+
+import numpy as np
+
+from .config import BotConfig
+from .broker import MockBroker, Trade, parse_slippage
+from .kernel import (apply_fill, daily_floor, exit_levels, market_fill_price, stop_hit, target_hit,
+                     trailing_floor, within_contract_cap)
+from .metrics import MetricsAccumulator
+from .risk import RiskManager
+from .runner import flatten_position, process_signal
+from .strategy import SIGNAL_BUY, SIGNAL_HOLD, SIGNAL_NAMES
+
+logger = logging.getLogger("topstep_demo.accounts")
+
+METRICS_BLOCK = 256  # ticks of equity buffered per account before the drawdown pass
+# Below this many accounts, one MockBroker + RiskManager per account steps faster than the arrays
+VECTOR_MIN_ACCOUNTS = 8
+
+# Per-account BotConfig fields an accounts CSV may override, with their parsers
+ACCOUNT_FIELDS = {
+    "qty": int,
+    "sl_pct": float,
+    "tp_pct": float,
+    "allow_short": lambda v: v.strip().lower() in ("1", "true", "yes", "y"),
+    "initial_cash": float,
+    "max_trailing_drawdown": float,
+    "daily_loss_limit": float,
+    "max_contracts": int,
+    "multiplier": float,
+    "commission": float,
+    "tick_size": float,
+    "slippage": str,
+}
+
+_SIGNAL_CODES = {name: code - 1 for code, name in enumerate(SIGNAL_NAMES)}
+
+class AccountBook:
+    """
+    Many accounts trading one signal stream, held as struct-of-arrays state
+    (one NumPy array per field, one slot per account) so a tick updates every
+    account in a handful of vectorized operations instead of one
+    MockBroker + RiskManager + AccountLimits object graph each.
+
+    Each account has its own BotConfig: qty, SL/TP, allow_short, cash, order
+    model (multiplier, commission, tick size, slippage) and account limits.
+    step() applies the loop engine's per-tick rules to all of them at once:
+    SL/TP market exits first, then the signal's entries and opposing exits,
+    then the equity mark and the limits (flattening on a breach). The fill,
+    SL/TP and limit arithmetic is the kernel module's, the same functions
+    MockBroker, RiskManager and AccountLimits apply to a single account, so
+    fills, PnL, equity and breaches match runner.process_signal and
+    enforce_limits bit for bit.
+
+    With fewer than VECTOR_MIN_ACCOUNTS accounts (or vectorized=False) the
+    book steps one MockBroker + RiskManager per account instead, which is
+    cheaper than a handful of NumPy calls per tick. Fill prices are computed
+    once per distinct order model and side, so slippage and tick rounding
+    cost nothing per account. Market exits only (no bracket orders); all
+    accounts share one trading day start hour.
+    """
+    def __init__(self, configs: Sequence[BotConfig], names: Optional[Sequence[str]] = None,
+                 keep_trades: bool = True, vectorized: Optional[bool] = None):
+        if not configs:
+            raise ValueError("AccountBook needs at least one account")
+        if any(c.exit_orders != "market" for c in configs):
+            raise ValueError("Bracket exits are only supported by the loop engine")
+        if len({c.trading_day_start_hour for c in configs}) > 1:
+            raise ValueError("All accounts must share one trading day start hour")
+        if any(c.qty <= 0 for c in configs):
+            raise ValueError("Account qty must be > 0")
+        n = len(configs)
+        self.configs = list(configs)
+        self.names = list(names) if names is not None else [f"acct-{i + 1}" for i in range(n)]
+        if len(self.names) != n:
+            raise ValueError("One name per account")
+
+        def column(values, dtype):
+            return np.array(list(values), dtype=dtype)
+
+        # Settings
+        self.qty = column((c.qty for c in configs), np.int64)
+        self.sl_pct = column((c.sl_pct for c in configs), np.float64)
+        self.tp_pct = column((c.tp_pct for c in configs), np.float64)
+        self.allow_short = column((c.allow_short for c in configs), bool)
+        self.initial_cash = column((c.initial_cash for c in configs), np.float64)
+        self.multiplier = column((c.multiplier for c in configs), np.float64)
+        self.commission = column((c.commission for c in configs), np.float64)
+        # Unset limits become +inf, so their floors sit at -inf and never trigger
+        self.max_trailing_drawdown = column((math.inf if c.max_trailing_drawdown is None
+                                             else c.max_trailing_drawdown for c in configs), np.float64)
+        self.daily_loss_limit = column((math.inf if c.daily_loss_limit is None
+                                        else c.daily_loss_limit for c in configs), np.float64)
+        self.max_contracts = column((np.iinfo(np.int64).max if c.max_contracts is None
+                                     else c.max_contracts for c in configs), np.int64)
+        self.day_start_hour = configs[0].trading_day_start_hour
+        self._limited = any(c.max_trailing_drawdown is not None or c.daily_loss_limit is not None
+                            or c.max_contracts is not None for c in configs)
+
+        # Order models: (slippage, tick_size) per distinct setting
+        models: Dict[Tuple[str, float], int] = {}
+        codes = [models.setdefault((c.slippage, c.tick_size), len(models)) for c in configs]
+        self._models = [(parse_slippage(spec, tick), tick) for spec, tick in models]
+        self._model = column(codes, np.intp)
+        self._plain = all(slippage is None and tick <= 0 for slippage, tick in self._models)
+
+        # Broker state
+        self.cash = self.initial_cash.copy()
+        self.position = np.zeros(n, dtype=np.int64)
+        self.avg_entry = np.zeros(n, dtype=np.float64)
+        self.realized_pnl = np.zeros(n, dtype=np.float64)
+        self.commissions = np.zeros(n, dtype=np.float64)
+        self.orders = np.zeros(n, dtype=np.int64)  # per-account order counter (ORD-%04d)
+
+        # Risk state: SL/TP of the open position (stale while flat)
+        self.sl = np.zeros(n, dtype=np.float64)
+        self.tp = np.zeros(n, dtype=np.float64)
+        self._open = 0  # accounts holding a position
+        # Tightest levels over all open positions: no exit can trigger strictly between them
+        self._exit_below = -math.inf
+        self._exit_above = math.inf
+
+        # Account limits (AccountLimits semantics)
+        self.high_water = self.initial_cash.copy()
+        self.day_start_equity = self.initial_cash.copy()
+        self.daily_floor = np.full(n, -math.inf)
+        self.failed = np.zeros(n, dtype=bool)
+        self.day_halted = np.zeros(n, dtype=bool)
+        self.breaches: List[Tuple[Any, int, str, float]] = []  # (timestamp, account, kind, equity)
+        self._next_day = None
+        # Working thresholds: -inf / +inf once an account can no longer breach them
+        self._drawdown_limit = self.max_trailing_drawdown.copy()
+        self._daily_stop = self.daily_floor.copy()
+        self._stop = np.empty(n, dtype=np.float64)  # scratch: tightest floor per account
+        self._hits = np.empty(n, dtype=bool)
+
+        # Metrics (MetricsAccumulator semantics), drawdown folded in per block of ticks
+        self.fills = np.zeros(n, dtype=np.int64)
+        self.wins = np.zeros(n, dtype=np.int64)
+        self.losses = np.zeros(n, dtype=np.int64)
+        self.peak = np.full(n, -math.inf)
+        self.max_drawdown = np.zeros(n, dtype=np.float64)
+        self.last_equity = self.initial_cash.copy()
+        self.bars = 0
+        self._block = np.empty((METRICS_BLOCK, n), dtype=np.float64)
+        self._peaks = np.empty_like(self._block)
+        self._drawdowns = np.empty_like(self._block)
+        self._rows = 0
+
+        # Fill log, one set of columns per tick that filled
+        self.keep_trades = keep_trades
+        self._log: List[Tuple[Any, np.ndarray, np.ndarray, np.ndarray, np.ndarray,
+                              np.ndarray, np.ndarray, np.ndarray]] = []
+
+        self.vectorized = n >= VECTOR_MIN_ACCOUNTS if vectorized is None else vectorized
+        if not self.vectorized:
+            self._views = [self._view(config) for config in configs]
+            self._equity = np.empty(n, dtype=np.float64)
+            self.step = self._step_views
+
+    def _view(self, config: BotConfig) -> Tuple[MockBroker, RiskManager, MetricsAccumulator]:
+        """One account as the loop engine runs it: MockBroker + RiskManager, metrics fed per fill."""
+        metrics = MetricsAccumulator()
+        broker = MockBroker.from_config(config, max_trades=None if self.keep_trades else 1,
+                                        on_fill_pnl=metrics.record)
+        return broker, RiskManager(config, broker), metrics
+
+    def __len__(self) -> int:
+        return len(self.qty)
+
+    def _fill_prices(self, price: float, idx: np.ndarray, side: np.ndarray):
+        """Fill price per account in idx; computed once per (order model, side)."""
+        if self._plain:
+            return price
+        table = np.array([[market_fill_price(slippage, tick, "SELL", price),
+                           market_fill_price(slippage, tick, "BUY", price)]
+                          for slippage, tick in self._models])
+        return table[self._model[idx], (side > 0).astype(np.intp)]
+
+    def _fill(self, idx: np.ndarray, side: np.ndarray, qty: np.ndarray, price: float, timestamp):
+        """
+        Market orders for accounts idx (unique): side +1 buy / -1 sell, qty
+        contracts, at the tick price plus each account's slippage and tick
+        rounding, booked by kernel.apply_fill. SL/TP are set from the tick
+        price on entries, like RiskManager.update_position_state.
+        """
+        fill_price = self._fill_prices(price, idx, side)
+        current = self.position[idx]
+        cash, new, avg, pnl, fee = apply_fill(self.cash[idx], current, self.avg_entry[idx], side, qty, fill_price,
+                                              self.multiplier[idx], self.commission[idx], np.where)
+        closing = pnl == pnl
+        if closing.any():
+            closed = idx[closing]
+            self.realized_pnl[closed] += pnl[closing]
+            self.wins[closed] += pnl[closing] > 0
+            self.losses[closed] += pnl[closing] < 0
+        self.cash[idx] = cash
+        self.avg_entry[idx] = avg
+        self.position[idx] = new
+        self.commissions[idx] += fee
+        self.fills[idx] += 1
+        self.orders[idx] += 1
+
+        opened = (current == 0) & (new != 0)
+        if opened.any():
+            entered = idx[opened]
+            self.sl[entered], self.tp[entered] = exit_levels(np.sign(new[opened]), price,
+                                                             self.sl_pct[entered], self.tp_pct[entered])
+        self._update_exit_levels()
+
+        if self.keep_trades:
+            self._log.append((timestamp, idx.astype(np.uint32), side.astype(np.int8), qty,
+                              np.broadcast_to(fill_price, idx.shape).astype(np.float64), pnl, fee,
+                              self.orders[idx]))
+
+    def _update_exit_levels(self):
+        position = self.position
+        self._open = int(np.count_nonzero(position))
+        if not self._open:
+            self._exit_below, self._exit_above = -math.inf, math.inf
+            return
+        long, short = position > 0, position < 0
+        # Longs exit at or below their SL and at or above their TP; shorts the other way round
+        self._exit_below = float(np.where(long, self.sl, np.where(short, self.tp, -math.inf)).max())
+        self._exit_above = float(np.where(long, self.tp, np.where(short, self.sl, math.inf)).min())
+
+    def _allows(self) -> np.ndarray:
+        """AccountLimits.allows(qty) for every account."""
+        allowed = within_contract_cap(np.abs(self.position), self.qty, self.max_contracts)
+        if self._limited:
+            allowed &= ~(self.failed | self.day_halted)
+        return allowed
+
+    def step(self, timestamp, price: float, signal: int = SIGNAL_HOLD) -> np.ndarray:
+        """
+        Run one tick with a SIGNAL_* code for every account and return their
+        equity marked at price (before any limit flattening, as the loop
+        records it). The array is a view that later steps overwrite; copy it to
+        keep it.
+        """
+        position = self.position
+        side = None
+        if self._open and (price <= self._exit_below or price >= self._exit_above):
+            # SL/TP market exits (RiskManager.check_exit)
+            direction = np.sign(position)
+            side = np.where((direction != 0) & (stop_hit(direction, price, self.sl) | target_hit(direction, price, self.tp)),
+                            -direction, 0)
+
+        if signal != SIGNAL_HOLD:
+            # Accounts that just exited ignore the signal this tick
+            free = side == 0 if side is not None else True
+            if side is None:
+                side = np.zeros(len(position), dtype=np.int64)
+            flat = position == 0
+            if signal == SIGNAL_BUY:
+                act = (flat & self._allows()) | (position < 0)
+            else:
+                enter = flat & self.allow_short & self._allows()
+                # Long-only accounts cannot sell through to net short (MockBroker rejects it)
+                close = (position > 0) & (self.allow_short | (position >= self.qty))
+                act = enter | close
+            side[act & free] = signal
+
+        if side is not None:
+            idx = np.flatnonzero(side)
+            if idx.size:
+                self._fill(idx, side[idx], self.qty[idx], price, timestamp)
+
+        # cash + position * price * multiplier, written straight into the metrics block
+        equity = np.multiply(position, price, out=self._block[self._rows])
+        equity *= self.multiplier
+        equity += self.cash
+        if self._limited:
+            self._check_limits(equity, price, timestamp)
+
+        self._rows += 1
+        if self._rows == METRICS_BLOCK:
+            self._flush_metrics()
+        return equity
+
+    def _step_views(self, timestamp, price: float, signal: int = SIGNAL_HOLD) -> np.ndarray:
+        """step() on the per-account objects: the loop engine's process_signal and enforce_limits."""
+        name = SIGNAL_NAMES[signal + 1]
+        equity = self._equity
+        for i, (config, (broker, risk_manager, metrics)) in enumerate(zip(self.configs, self._views)):
+            process_signal(config, risk_manager, broker, timestamp, price, name)
+            value = broker.get_cash() + broker.get_position(config.symbol) * price * broker.multiplier
+            limits = risk_manager.limits
+            if limits is not None and limits.update(value, timestamp):
+                self.breaches.append((timestamp, i, "drawdown" if limits.failed else "daily_loss", value))
+                flatten_position(config, risk_manager, broker, price, timestamp)
+            metrics.update_equity(value)
+            equity[i] = value
+        self.bars += 1
+        return equity
+
+    def _sync_views(self):
+        """Copy the per-account objects' state into the arrays summary() reads."""
+        for i, (config, (broker, risk_manager, metrics)) in enumerate(zip(self.configs, self._views)):
+            self.cash[i] = broker.get_cash()
+            self.position[i] = broker.get_position(config.symbol)
+            self.avg_entry[i] = broker.get_average_entry(config.symbol)
+            self.realized_pnl[i] = broker.get_realized_pnl()
+            self.commissions[i] = broker.get_commissions()
+            self.fills[i] = metrics.total_trades
+            self.wins[i] = metrics.wins
+            self.losses[i] = metrics.losses
+            self.peak[i] = metrics.peak
+            self.max_drawdown[i] = metrics.max_drawdown
+            if metrics.last_equity is not None:
+                self.last_equity[i] = metrics.last_equity
+            limits = risk_manager.limits
+            if limits is not None:
+                self.high_water[i] = limits.high_water
+                self.failed[i] = limits.failed
+                self.day_halted[i] = limits.day_halted
+
+    def _check_limits(self, equity: np.ndarray, price: float, timestamp):
+        """AccountLimits.update for every account; flatten the ones that breach."""
+        if self._next_day is None or timestamp >= self._next_day:
+            self._roll_day(equity, timestamp)
+        high_water = np.maximum(self.high_water, equity, out=self.high_water)
+        floor = trailing_floor(high_water, self._drawdown_limit, self.initial_cash, np.minimum)
+        stop = np.maximum(floor, self._daily_stop, out=self._stop)
+        if not np.count_nonzero(np.less_equal(equity, stop, out=self._hits)):
+            return
+        # The drawdown check comes first: an account breaching both fails
+        drawdown = equity <= floor
+        daily = ~drawdown & (equity <= self._daily_stop)
+        breached = drawdown | daily
+        self.failed |= drawdown
+        self.day_halted |= daily
+        self._drawdown_limit[drawdown] = math.inf
+        self._daily_stop[breached] = -math.inf
+        for i in np.flatnonzero(breached).tolist():
+            kind = "drawdown" if drawdown[i] else "daily_loss"
+            self.breaches.append((timestamp, i, kind, float(equity[i])))
+        logger.warning(f"{int(drawdown.sum())} accounts hit the trailing drawdown and "
+                       f"{int(daily.sum())} the daily loss limit at {timestamp} | flattening")
+
+        idx = np.flatnonzero(breached & (self.position != 0))
+        if idx.size:
+            held = self.position[idx]
+            self._fill(idx, -np.sign(held), np.abs(held), price, timestamp)
+
+    def _roll_day(self, equity: np.ndarray, timestamp):
+        boundary = timestamp.replace(hour=self.day_start_hour, minute=0, second=0, microsecond=0)
+        if boundary <= timestamp:
+            boundary += timedelta(days=1)
+        self._next_day = boundary
+        self.day_start_equity[:] = equity
+        self.daily_floor = daily_floor(equity, self.daily_loss_limit)
+        if self.day_halted.any():
+            logger.info(f"New trading day {timestamp}: daily loss halt lifted for "
+                        f"{int(self.day_halted.sum())} accounts")
+        self.day_halted[:] = False
+        self._daily_stop = np.where(self.failed, -math.inf, self.daily_floor)
+
+    def _flush_metrics(self):
+        count = self._rows
+        if not count:
+            return
+        rows = self._block[:count]
+        peaks = self._peaks[:count]
+        # Running peak row by row: every pass is one contiguous account vector
+        np.maximum(self.peak, rows[0], out=peaks[0])
+        for r in range(1, count):
+            np.maximum(peaks[r - 1], rows[r], out=peaks[r])
+        if peaks[0].min() > 0:
+            # Peaks never fall, so none of this block's can be <= 0
+            drawdown = np.subtract(peaks, rows, out=self._drawdowns[:count])
+            drawdown /= peaks
+        else:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                drawdown = np.where(peaks > 0, (peaks - rows) / peaks, 0.0)
+        np.maximum(self.max_drawdown, drawdown.max(axis=0), out=self.max_drawdown)
+        self.peak = peaks[-1].copy()
+        self.last_equity = rows[-1].copy()
+        self.bars += count
+        self._rows = 0
+
+    def trades(self, account: int) -> List[Trade]:
+        """The fills of one account, as MockBroker.get_trades() would list them."""
+        if not self.keep_trades:
+            raise ValueError("Fills were not kept (keep_trades=False)")
+        if not self.vectorized:
+            return list(self._views[account][0].get_trades())
+        symbol = self.configs[account].symbol
+        out = []
+        for timestamp, idx, side, qty, price, pnl, fee, order in self._log:
+            hit = np.flatnonzero(idx == account)
+            if hit.size:
+                j = hit[0]
+                realized = float(pnl[j])
+                out.append(Trade(timestamp=timestamp, symbol=symbol, side=SIGNAL_NAMES[side[j] + 1],
+                                 qty=int(qty[j]), price=float(price[j]), order_id=f"ORD-{order[j]:04d}",
+                                 realized_pnl=None if realized != realized else realized,
+                                 commission=float(fee[j])))
+        return out
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Per-account results, in MetricsAccumulator / report terms; brings the state arrays up to date."""
+        if self.vectorized:
+            self._flush_metrics()
+        else:
+            self._sync_views()
+        rows = []
+        for i, name in enumerate(self.names):
+            fills = int(self.fills[i])
+            status = "failed" if self.failed[i] else "halted" if self.day_halted[i] else "ok"
+            rows.append({
+                "account": name,
+                "qty": int(self.qty[i]),
+                "fills": fills,
+                "wins": int(self.wins[i]),
+                "losses": int(self.losses[i]),
+                "win_rate": self.wins[i] / fills * 100 if fills else 0.0,
+                "realized_pnl": float(self.realized_pnl[i]),
+                "commissions": float(self.commissions[i]),
+                "final_equity": float(self.last_equity[i]) if self.bars else None,
+                "max_drawdown": float(self.max_drawdown[i]),
+                "position": int(self.position[i]),
+                "status": status
+            })
+        return rows
+
+def load_accounts(path: str, base: BotConfig) -> Tuple[List[str], List[BotConfig]]:
+    """
+    Read an accounts CSV: an optional 'name' column plus any ACCOUNT_FIELDS
+    columns. Each row is one account; empty cells keep base's value.
+    """
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        unknown = set(reader.fieldnames or ()) - set(ACCOUNT_FIELDS) - {"name"}
+        if unknown:
+            raise ValueError(f"Unknown account columns: {', '.join(sorted(unknown))} "
+                             f"(known: name, {', '.join(ACCOUNT_FIELDS)})")
+        names, configs = [], []
+        for row in reader:
+            overrides = {}
+            for key, value in row.items():
+                if key == "name" or value is None or not value.strip():
+                    continue
+                try:
+                    overrides[key] = ACCOUNT_FIELDS[key](value)
+                except ValueError:
+                    raise ValueError(f"{path} line {reader.line_num}: invalid {key} {value!r}") from None
+            names.append((row.get("name") or "").strip() or f"acct-{len(names) + 1}")
+            configs.append(replace(base, **overrides))
+    if not configs:
+        raise ValueError(f"{path} lists no accounts")
+    for config in configs:
+        parse_slippage(config.slippage, config.tick_size)
+    return names, configs
+
+def run_accounts(config: BotConfig, accounts: str, csv_path: Optional[str] = None,
+                 report: str = "rich", output: Optional[str] = None) -> AccountBook:
+    """
+    Backtest config's strategy once and trade its signals on every account
+    of the accounts CSV (see load_accounts) through one AccountBook.
+    """
+    import time
+    from .data import iter_price_arrays, iter_price_signals, load_price_arrays
+    from .strategy import build_strategy
+
+    names, configs = load_accounts(accounts, config)
+    book = AccountBook(configs, names, keep_trades=False)
+    timestamps, prices = load_price_arrays(Path(csv_path or "data/sample_prices.csv"))
+    strategy = build_strategy(config)
+    logger.info(f"Starting ACCOUNTS BACKTEST | {config.symbol} | {len(book)} accounts | {len(prices)} ticks")
+
+    start_time = time.perf_counter()
+    if hasattr(strategy, "on_prices"):
+        feed = iter_price_signals(timestamps, prices, strategy.on_prices(prices))
+    else:
+        feed = ((ts, price, _SIGNAL_CODES[strategy.on_price(ts, price)])
+                for ts, price in iter_price_arrays(timestamps, prices))
+    step = book.step
+    for timestamp, price, code in feed:
+        step(timestamp, price, code)
+    results = book.summary()
+    logger.info(f"Stepped {len(book)} accounts over {book.bars} ticks in {time.perf_counter() - start_time:.2f}s")
+
+    if report == "rich":
+        print_accounts(results)
+    elif report == "json":
+        import json
+        print(json.dumps(results))
+    if output:
+        write_accounts_csv(results, output)
+        logger.info(f"Account results written to {output}")
+    return book
+
+def write_accounts_csv(results: List[Dict[str, Any]], path: str):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+
+def print_accounts(results: List[Dict[str, Any]], top: int = 50):
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title=f"Accounts: {len(results)}", show_header=True, header_style="bold magenta")
+    for name in ("Account", "Qty", "Fills", "Win Rate", "Realized PnL", "Final Equity", "Max DD", "Status"):
+        table.add_column(name, style="cyan" if name == "Account" else "green")
+    for row in results[:top]:
+        status = row["status"]
+        table.add_row(row["account"], str(row["qty"]), str(row["fills"]), f"{row['win_rate']:.1f}%",
+                      f"${row['realized_pnl']:,.2f}",
+                      "-" if row["final_equity"] is None else f"${row['final_equity']:,.2f}",
+                      f"{row['max_drawdown'] * 100:.2f}%",
+                      status if status == "ok" else f"[red]{status}[/red]")
+    console = Console()
+    console.print(table)
+    if len(results) > top:
+        console.print(f"... {len(results) - top} more (write them all with --accounts-out)")
+    failed = sum(row["status"] == "failed" for row in results)
+    console.print(f"{failed} of {len(results)} accounts failed the trailing drawdown")
@@ -0,0 +1,252 @@
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+import csv
+import json
+import logging
+import math
+
+import numpy as np
+
+from .broker import _EPOCH, _ONE_US, Trade
+
+logger = logging.getLogger("topstep_demo.analytics")
+
+_US_PER_DAY = 86_400 * 1_000_000
+_DAYS_PER_YEAR = 365.25
+TRADING_DAYS_PER_YEAR = 252
+
+@dataclass
+class Analytics:
+    """Scalar performance metrics (None where undefined) plus the per-day PnL table."""
+    metrics: Dict[str, Any]
+    daily: Dict[str, np.ndarray] = field(default_factory=dict)  # date, pnl, equity, return
+
+    def daily_rows(self) -> List[Dict[str, Any]]:
+        if not self.daily:
+            return []
+        return [{"date": str(d), "pnl": p, "equity": e, "return": _finite(r)}
+                for d, p, e, r in zip(self.daily["date"], self.daily["pnl"].tolist(),
+                                      self.daily["equity"].tolist(), self.daily["return"].tolist())]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"metrics": self.metrics, "daily": self.daily_rows()}
+
+    def write(self, path: str):
+        """Metrics and daily PnL as JSON, or the metrics alone as metric,value CSV for a .csv path."""
+        if Path(path).suffix.lower() == ".csv":
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["metric", "value"])
+                for name, value in self.metrics.items():
+                    writer.writerow([name, "" if value is None else value])
+        else:
+            with open(path, "w") as f:
+                json.dump(self.to_dict(), f, indent=2)
+                f.write("\n")
+
+    def write_daily(self, path: str):
+        """Per-day PnL as date,pnl,equity,return CSV."""
+        if not self.daily:
+            raise ValueError("Daily PnL needs bar timestamps")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["date", "pnl", "equity", "return"])
+            for row in self.daily_rows():
+                writer.writerow([row["date"], row["pnl"], row["equity"], "" if row["return"] is None else row["return"]])
+
+def _finite(value) -> Optional[float]:
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+def _ratio(num: float, den: float) -> Optional[float]:
+    return num / den if den > 0 else None
+
+def _epoch_us(timestamps) -> np.ndarray:
+    ts = np.asarray(timestamps)
+    if ts.dtype.kind == "M":
+        return ts.astype("datetime64[us]").astype(np.int64)
+    return ts.astype(np.int64)
+
+def trade_pnl(trades: Iterable[Trade]):
+    """(realized PnL of each closing fill, total commissions) from a trade list or TradeLedger."""
+    closed = array("d")
+    commissions = 0.0
+    for t in trades:
+        if t.realized_pnl is not None:
+            closed.append(t.realized_pnl)
+        commissions += t.commission
+    return np.frombuffer(closed, dtype=np.float64) if closed else np.empty(0), commissions
+
+def analyze(equity, timestamps=None, positions=None, closed_pnl=None, commissions: float = 0.0,
+            initial_equity: Optional[float] = None, day_start_hour: int = 0) -> Analytics:
+    """
+    Full metrics set from per-bar arrays, in a fixed number of vectorized passes.
+
+    equity is the marked-to-market equity after every bar. timestamps
+    (datetime64 or epoch microseconds, ascending) enable the time-based
+    metrics: CAGR, Calmar, drawdown duration in days and per-day PnL, with
+    days starting at day_start_hour like the account limits. positions (net
+    contracts after every bar) enable exposure. closed_pnl holds the realized
+    PnL of every closing fill; flat (0.0) closes count as neither wins nor
+    losses.
+
+    Per-bar Sharpe/Sortino match MetricsAccumulator's; the annualized ones
+    use daily returns.
+    """
+    eq = np.asarray(equity, dtype=np.float64)
+    n = len(eq)
+    if n == 0:
+        raise ValueError("Cannot analyze an empty equity curve")
+    start = float(eq[0]) if initial_equity is None else float(initial_equity)
+    final = float(eq[-1])
+    m: Dict[str, Any] = {
+        "bars": n,
+        "initial_equity": start,
+        "final_equity": final,
+        "net_pnl": final - start,
+        "total_return": _ratio(final - start, start)
+    }
+
+    # Per-bar returns; a zero equity has no defined return and is skipped
+    prev = eq[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = eq[1:] / prev
+    zero = prev == 0
+    if zero.any():
+        returns = returns[~zero]
+    returns -= 1.0
+    k = len(returns)
+    if k >= 2:
+        mean = float(returns.mean())
+        std = float(returns.std(ddof=1))
+        downside = np.minimum(returns, 0.0)
+        downside_dev = math.sqrt(float(np.dot(downside, downside)) / k)
+        m["sharpe"] = _ratio(mean, std)
+        m["sortino"] = _ratio(mean, downside_dev)
+        m["volatility"] = std
+    else:
+        m["sharpe"] = m["sortino"] = m["volatility"] = None
+
+    # Drawdown from the running peak; underwater stretches run between bars at a peak
+    peak = np.maximum.accumulate(eq)
+    drawdown = peak - eq
+    at_peak = np.flatnonzero(drawdown <= 0)
+    if peak[0] > 0:
+        max_dd = float((drawdown / peak).max())
+    else:
+        positive = peak > 0
+        max_dd = float((drawdown[positive] / peak[positive]).max()) if positive.any() else 0.0
+    underwater = np.diff(np.append(at_peak, n)) - 1
+    longest = int(np.argmax(underwater))
+    m["max_drawdown"] = max_dd
+    m["max_drawdown_abs"] = float(drawdown.max())
+    m["max_drawdown_bars"] = int(underwater[longest])
+    m["time_underwater"] = float(n - len(at_peak)) / n
+    m["exposure"] = None if positions is None else float(np.count_nonzero(positions)) / n
+
+    m["cagr"] = m["calmar"] = m["max_drawdown_days"] = None
+    m["sharpe_annualized"] = m["sortino_annualized"] = None
+    m["trading_days"] = m["best_day"] = m["worst_day"] = m["positive_days"] = None
+    daily: Dict[str, np.ndarray] = {}
+    if timestamps is not None:
+        ts = _epoch_us(timestamps)
+        if len(ts) != n:
+            raise ValueError(f"{len(ts)} timestamps for {n} equity points")
+        years = (ts[-1] - ts[0]) / _US_PER_DAY / _DAYS_PER_YEAR
+        if years > 0 and start > 0 and final > 0:
+            m["cagr"] = (final / start) ** (1.0 / years) - 1.0
+            m["calmar"] = _ratio(m["cagr"], max_dd)
+        if underwater[longest]:
+            # Peak to recovery, or to the last bar if still underwater
+            end = at_peak[longest + 1] if longest + 1 < len(at_peak) else n - 1
+            m["max_drawdown_days"] = float(ts[end] - ts[at_peak[longest]]) / _US_PER_DAY
+
+        day = (ts - day_start_hour * 3_600_000_000) // _US_PER_DAY
+        last = np.flatnonzero(np.diff(day))
+        last = np.append(last, n - 1)
+        closes = eq[last]
+        opens = np.concatenate(([start], closes[:-1]))
+        pnl = closes - opens
+        with np.errstate(divide="ignore", invalid="ignore"):
+            day_returns = np.where(opens != 0, pnl / opens, np.nan)
+        daily = {
+            "date": day[last].astype("datetime64[D]"),  # calendar date the trading day starts on
+            "pnl": pnl,
+            "equity": closes,
+            "return": day_returns
+        }
+        m["trading_days"] = len(last)
+        m["best_day"] = float(pnl.max())
+        m["worst_day"] = float(pnl.min())
+        m["positive_days"] = float(np.count_nonzero(pnl > 0)) / len(last)
+        valid = day_returns[np.isfinite(day_returns)]
+        if len(valid) >= 2:
+            mean = float(valid.mean())
+            std = float(valid.std(ddof=1))
+            downside = np.minimum(valid, 0.0)
+            downside_dev = math.sqrt(float(np.dot(downside, downside)) / len(valid))
+            scale = math.sqrt(TRADING_DAYS_PER_YEAR)
+            m["sharpe_annualized"] = None if std <= 0 else mean / std * scale
+            m["sortino_annualized"] = None if downside_dev <= 0 else mean / downside_dev * scale
+
+    pnl = np.empty(0) if closed_pnl is None else np.asarray(closed_pnl, dtype=np.float64)
+    gains = pnl[pnl > 0]
+    losses = pnl[pnl < 0]
+    gross_profit = float(gains.sum())
+    gross_loss = -float(losses.sum())
+    m.update({
+        "closed_trades": len(pnl),
+        "wins": len(gains),
+        "losses": len(losses),
+        "flat": len(pnl) - len(gains) - len(losses),
+        "win_rate": _ratio(len(gains), len(pnl)),
+        "gross_profit": gross_profit,
+        "gross_loss": gross_loss,
+        "profit_factor": _ratio(gross_profit, gross_loss),
+        "expectancy": float(pnl.mean()) if len(pnl) else None,
+        "avg_win": float(gains.mean()) if len(gains) else None,
+        "avg_loss": float(losses.mean()) if len(losses) else None,
+        "largest_win": float(gains.max()) if len(gains) else None,
+        "largest_loss": float(losses.min()) if len(losses) else None,
+        "commissions": commissions
+    })
+    m["payoff_ratio"] = (m["avg_win"] / -m["avg_loss"]) if m["avg_win"] is not None and m["avg_loss"] else None
+    metrics = {name: _finite(value) if isinstance(value, float) else value for name, value in m.items()}
+    return Analytics(metrics=metrics, daily=daily)
+
+class AnalyticsRecorder:
+    """
+    Per-bar equity, timestamp and position columns plus every closing fill's
+    PnL, for loop engines that want analyze() at the end. About 24 bytes per
+    bar; only created when analytics are requested.
+    """
+    def __init__(self):
+        self.timestamps = array("q")  # epoch microseconds
+        self.equity = array("d")
+        self.positions = array("q")
+        self.closed_pnl = array("d")
+        self.commissions = 0.0
+
+    def update(self, timestamp: datetime, equity: float, position: int):
+        self.timestamps.append((timestamp - _EPOCH) // _ONE_US)
+        self.equity.append(equity)
+        self.positions.append(position)
+
+    def record_fill(self, trade: Trade):
+        self.record(trade.realized_pnl, trade.commission)
+
+    def record(self, pnl: Optional[float], commission: float):
+        if pnl is not None:
+            self.closed_pnl.append(pnl)
+        self.commissions += commission
+
+    def analyze(self, initial_equity: Optional[float] = None, day_start_hour: int = 0) -> Analytics:
+        return analyze(np.frombuffer(self.equity, dtype=np.float64),
+                       timestamps=np.frombuffer(self.timestamps, dtype=np.int64),
+                       positions=np.frombuffer(self.positions, dtype=np.int64),
+                       closed_pnl=np.frombuffer(self.closed_pnl, dtype=np.float64),
+                       commissions=self.commissions, initial_equity=initial_equity,
+                       day_start_hour=day_start_hour)
@@ -0,0 +1,189 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger("topstep_demo.bars")
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Tick CSV rows parsed per step when building bars; bounds memory on any file size
+_TICK_CHUNK = 65_536
+
+@dataclass(slots=True)
+class Bar:
+    timestamp: datetime  # bar open time
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float = 0.0
+
+class TickBarAggregator:
+    """
+    Streaming tick -> bar aggregator. Single pass, constant memory: only the
+    bar being built is held.
+    
+    Time bars (interval_s) are aligned to multiples of the interval since the
+    epoch and stamped with their start time; empty intervals produce no bar.
+    Volume bars (volume) close on the tick that brings the bar's volume to the
+    threshold (volume=N with size-1 ticks gives N-tick bars).
+    """
+    def __init__(self, interval_s: Optional[float] = None, volume: Optional[float] = None):
+        if (interval_s is None) == (volume is None):
+            raise ValueError("Specify exactly one of interval_s or volume")
+        if (interval_s is not None and interval_s <= 0) or (volume is not None and volume <= 0):
+            raise ValueError("Bar interval/volume must be positive")
+        self.interval = timedelta(seconds=interval_s) if interval_s is not None else None
+        self.volume_threshold = volume
+        self._bar: Optional[Bar] = None
+        self._bar_end: Optional[datetime] = None
+
+    def _start_bar(self, timestamp: datetime, price: float, size: float):
+        if self.interval is not None:
+            start = _EPOCH + ((timestamp - _EPOCH) // self.interval) * self.interval
+            self._bar_end = start + self.interval
+        else:
+            start = timestamp
+        self._bar = Bar(start, price, price, price, price, size)
+
+    def update(self, timestamp: datetime, price: float, size: float = 1.0) -> Optional[Bar]:
+        """Add one tick. Returns the bar it completed, if any."""
+        bar = self._bar
+        if bar is None:
+            self._start_bar(timestamp, price, size)
+            return self._close_if_full()
+            
+        if self.interval is not None and timestamp >= self._bar_end:
+            self._start_bar(timestamp, price, size)
+            return bar
+            
+        if price > bar.high:
+            bar.high = price
+        elif price < bar.low:
+            bar.low = price
+        bar.close = price
+        bar.volume += size
+        return self._close_if_full()
+
+    def _close_if_full(self) -> Optional[Bar]:
+        if self.volume_threshold is not None and self._bar.volume >= self.volume_threshold:
+            bar, self._bar = self._bar, None
+            return bar
+        return None
+
+    def flush(self) -> Optional[Bar]:
+        """Return the partial bar in progress (end of stream)."""
+        bar, self._bar = self._bar, None
+        return bar
+
+def aggregate_ticks(ticks: Iterable[Tuple], interval_s: Optional[float] = None,
+                    volume: Optional[float] = None) -> Iterator[Bar]:
+    """
+    Turn a (timestamp, price) or (timestamp, price, size) stream into bars.
+    Size defaults to 1 per tick. The final partial bar is emitted at the end.
+    """
+    aggregator = TickBarAggregator(interval_s=interval_s, volume=volume)
+    update = aggregator.update
+    for tick in ticks:
+        bar = update(*tick)
+        if bar is not None:
+            yield bar
+    last = aggregator.flush()
+    if last is not None:
+        yield last
+
+def load_bar_feed(csv_path: Path) -> Iterator[Bar]:
+    """
+    Load an OHLC(V) CSV with timestamp,open,high,low,close[,volume] columns.
+    Rows with missing or invalid fields are dropped and reported once.
+    """
+    import pandas as pd
+    logger.info(f"Loading bars from {csv_path}")
+    df = pd.read_csv(csv_path)
+    missing = {"timestamp", "open", "high", "low", "close"} - set(df.columns)
+    if missing:
+        raise ValueError(f"{csv_path} is missing bar columns: {', '.join(sorted(missing))}")
+        
+    timestamps = pd.to_datetime(df["timestamp"], format="ISO8601", utc=True, errors="coerce")
+    columns = {name: pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+               for name in ("open", "high", "low", "close")}
+    if "volume" in df.columns:
+        columns["volume"] = pd.to_numeric(df["volume"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        columns["volume"] = np.zeros(len(df))
+        
+    bad = timestamps.isna().to_numpy().copy()
+    for values in columns.values():
+        bad |= np.isnan(values)
+    if bad.any():
+        logger.warning(f"Skipped {int(bad.sum())} invalid bars out of {len(df)} in {csv_path}")
+        
+    keep = ~bad
+    ts_list = timestamps[keep].dt.tz_localize(None).to_numpy("datetime64[us]").tolist()
+    rows = zip(ts_list, *(columns[name][keep].tolist() for name in ("open", "high", "low", "close", "volume")))
+    for ts, o, h, l, c, v in rows:
+        yield Bar(ts, o, h, l, c, v)
+
+def _floats(values) -> np.ndarray:
+    """String column -> float64, NaN where missing or invalid. Parsed like float(), so values match data.py."""
+    import pandas as pd
+    try:
+        return values.astype("float64").to_numpy(dtype=np.float64, na_value=np.nan)
+    except ValueError:
+        ok = pd.to_numeric(values, errors="coerce").notna().to_numpy()
+        out = np.full(len(values), np.nan)
+        out[ok] = values[ok].astype("float64").to_numpy(dtype=np.float64)
+        return out
+
+def stream_ticks(csv_path: Path, chunksize: int = _TICK_CHUNK) -> Iterator[Tuple[datetime, float, float]]:
+    """
+    Stream (timestamp, price, size) ticks from a timestamp,price[,size] CSV,
+    reading chunksize rows at a time. Memory is bounded by one chunk and, unlike
+    data.load_price_feed, no price cache is written. Size comes from a 'size'
+    (or else 'volume') column and is 1 per tick without one. Rows with a
+    missing or invalid field are dropped and reported once at the end.
+    """
+    import pandas as pd
+    header = pd.read_csv(csv_path, nrows=0).columns
+    missing = {"timestamp", "price"} - set(header)
+    if missing:
+        raise ValueError(f"{csv_path} is missing tick columns: {', '.join(sorted(missing))}")
+    size_column = next((name for name in ("size", "volume") if name in header), None)
+    columns = ["timestamp", "price"] + ([size_column] if size_column else [])
+    
+    total = skipped = 0
+    for chunk in pd.read_csv(csv_path, usecols=columns, dtype="string", chunksize=chunksize):
+        timestamps = pd.to_datetime(chunk["timestamp"], format="ISO8601", utc=True, errors="coerce")
+        prices = _floats(chunk["price"])
+        sizes = _floats(chunk[size_column]) if size_column else np.ones(len(chunk))
+        bad = timestamps.isna().to_numpy() | np.isnan(prices) | np.isnan(sizes)
+        total += len(chunk)
+        if bad.any():
+            skipped += int(bad.sum())
+            keep = ~bad
+            timestamps, prices, sizes = timestamps[keep], prices[keep], sizes[keep]
+        ts_list = timestamps.dt.tz_localize(None).to_numpy("datetime64[us]").tolist()
+        yield from zip(ts_list, prices.tolist(), sizes.tolist())
+    if skipped:
+        logger.warning(f"Skipped {skipped} invalid ticks out of {total} in {csv_path}")
+
+def open_bar_feed(spec: str, csv_path: str) -> Iterator[Bar]:
+    """
+    Bar source from a CLI spec: 'ohlc' reads csv_path as OHLCV bars;
+    'time:SECONDS' or 'volume:N' streams csv_path's ticks (see stream_ticks)
+    through a TickBarAggregator in one pass, without a price cache. Volume bars
+    sum the CSV's size column; without one every tick counts 1, i.e. tick bars.
+    """
+    kind, _, value = spec.partition(":")
+    if kind == "ohlc" and not value:
+        return load_bar_feed(Path(csv_path))
+    if kind in ("time", "volume") and value:
+        ticks = stream_ticks(Path(csv_path))
+        if kind == "time":
+            return aggregate_ticks(ticks, interval_s=float(value))
+        return aggregate_ticks(ticks, volume=float(value))
+    raise ValueError(f"Invalid bar spec '{spec}', expected ohlc, time:SECONDS or volume:N")
@@ -1,11 +1,16 @@
-from typing import Protocol, List, Dict, Optional, Any
+from typing import Protocol, List, Dict, Optional, Any, Callable, Iterator, Sequence, Tuple, Union
+from array import array
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta
+import heapq
 import logging
+import math
+
+from .kernel import apply_fill, market_fill_price, round_to_tick
 
 logger = logging.getLogger("topstep_demo.broker")
 
-@dataclass
+@dataclass(slots=True)
 class Trade:
     timestamp: datetime
     symbol: str
@@ -14,27 +19,373 @@ class Trade:
     price: float
     order_id: str
     realized_pnl: Optional[float] = None
+    commission: float = 0.0
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_US = timedelta(microseconds=1)
+_NO_TS = -(2 ** 63)  # timestamp kept in TradeLedger._other_ts instead
+
+_SIDE_CODES = {"BUY": 1, "SELL": -1}
+_SIDE_NAMES = {1: "BUY", -1: "SELL"}
+
+class TradeLedger:
+    """
+    Compact, append-only trade history stored as parallel typed columns
+    (about 51 bytes per fill). Symbols are interned to small integer codes and
+    sides to +1/-1. Indexing or iterating builds Trade objects on demand.
+    
+    With max_trades set, only the most recent fills are retained; old rows are
+    dropped in bulk once the columns reach twice the limit (amortized O(1)).
+    """
+    __slots__ = ("max_trades", "_ts", "_symbol", "_side", "_qty", "_price", "_order", "_pnl",
+                 "_fee", "_symbols", "_symbol_codes", "_other_ts", "_dropped")
+
+    def __init__(self, max_trades: Optional[int] = None):
+        self.max_trades = max_trades
+        self._ts = array("q")        # naive datetime as epoch microseconds
+        self._symbol = array("H")
+        self._side = array("b")
+        self._qty = array("q")
+        self._price = array("d")
+        self._order = array("q")     # order number, ORD-%04d
+        self._pnl = array("d")       # NaN when the fill realized nothing
+        self._fee = array("d")       # commission charged on the fill
+        self._symbols: List[str] = []
+        self._symbol_codes: Dict[str, int] = {}
+        # Timestamps that are not naive datetimes, keyed by absolute fill number
+        self._other_ts: Dict[int, Any] = {}
+        self._dropped = 0
+
+    def append(self, timestamp, symbol: str, side: str, qty: int, price: float,
+               order_number: int, realized_pnl: Optional[float], commission: float = 0.0):
+        code = self._symbol_codes.get(symbol)
+        if code is None:
+            code = len(self._symbols)
+            self._symbols.append(symbol)
+            self._symbol_codes[symbol] = code
+            
+        if type(timestamp) is datetime and timestamp.tzinfo is None:
+            self._ts.append((timestamp - _EPOCH) // _ONE_US)
+        else:
+            self._other_ts[self._dropped + len(self._ts)] = timestamp
+            self._ts.append(_NO_TS)
+            
+        self._symbol.append(code)
+        self._side.append(_SIDE_CODES[side])
+        self._qty.append(qty)
+        self._price.append(price)
+        self._order.append(order_number)
+        self._pnl.append(math.nan if realized_pnl is None else realized_pnl)
+        self._fee.append(commission)
+        
+        if self.max_trades and len(self._ts) >= 2 * self.max_trades:
+            self._trim()
+
+    def _trim(self):
+        drop = len(self._ts) - self.max_trades
+        for column in (self._ts, self._symbol, self._side, self._qty, self._price, self._order, self._pnl, self._fee):
+            del column[:drop]
+        self._dropped += drop
+        if self._other_ts:
+            self._other_ts = {k: v for k, v in self._other_ts.items() if k >= self._dropped}
+
+    @property
+    def total_fills(self) -> int:
+        """Fills ever appended, including ones no longer retained."""
+        return self._dropped + len(self._ts)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the column buffers."""
+        return sum(c.itemsize * len(c) for c in
+                   (self._ts, self._symbol, self._side, self._qty, self._price, self._order, self._pnl, self._fee))
+
+    def _start(self) -> int:
+        n = len(self._ts)
+        return n - self.max_trades if self.max_trades and n > self.max_trades else 0
+
+    def __len__(self) -> int:
+        return len(self._ts) - self._start()
+
+    def _trade(self, row: int) -> Trade:
+        raw_ts = self._ts[row]
+        timestamp = (self._other_ts[self._dropped + row] if raw_ts == _NO_TS
+                     else _EPOCH + timedelta(microseconds=raw_ts))
+        pnl = self._pnl[row]
+        return Trade(
+            timestamp=timestamp,
+            symbol=self._symbols[self._symbol[row]],
+            side=_SIDE_NAMES[self._side[row]],
+            qty=self._qty[row],
+            price=self._price[row],
+            order_id=f"ORD-{self._order[row]:04d}",
+            realized_pnl=None if pnl != pnl else pnl,
+            commission=self._fee[row]
+        )
+
+    def __getitem__(self, index: Union[int, slice]):
+        start = self._start()
+        if isinstance(index, slice):
+            return [self._trade(start + i) for i in range(*index.indices(len(self)))]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("trade index out of range")
+        return self._trade(start + index)
+
+    def __iter__(self) -> Iterator[Trade]:
+        for row in range(self._start(), len(self._ts)):
+            yield self._trade(row)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Picklable state of the retained rows only (bounded by max_trades)."""
+        start = self._start()
+        dropped = self._dropped + start
+        return {
+            "max_trades": self.max_trades,
+            "columns": [c[start:] for c in
+                        (self._ts, self._symbol, self._side, self._qty, self._price, self._order, self._pnl, self._fee)],
+            "symbols": list(self._symbols),
+            "other_ts": {k: v for k, v in self._other_ts.items() if k >= dropped},
+            "dropped": dropped
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        self.max_trades = state["max_trades"]
+        (self._ts, self._symbol, self._side, self._qty,
+         self._price, self._order, self._pnl, self._fee) = (array(c.typecode, c) for c in state["columns"])
+        self._symbols = list(state["symbols"])
+        self._symbol_codes = {name: code for code, name in enumerate(self._symbols)}
+        self._other_ts = dict(state["other_ts"])
+        self._dropped = state["dropped"]
+
+class PendingOrder:
+    """A resting limit or stop order."""
+    __slots__ = ("order_number", "symbol", "side", "kind", "qty", "price", "timestamp")
+
+    def __init__(self, order_number: int, symbol: str, side: str, kind: str, qty: int, price: float, timestamp):
+        self.order_number = order_number
+        self.symbol = symbol
+        self.side = side    # BUY or SELL
+        self.kind = kind    # LIMIT or STOP
+        self.qty = qty
+        self.price = price  # limit / stop price
+        self.timestamp = timestamp
+
+    @property
+    def order_id(self) -> str:
+        return f"ORD-{self.order_number:04d}"
+
+    def __repr__(self) -> str:
+        return f"PendingOrder({self.order_id} {self.side} {self.kind} {self.qty} {self.symbol} @ {self.price})"
+
+class OrderBook:
+    """
+    Resting orders of one symbol in four price-sorted heaps, keyed so that each
+    heap's top is the order the market reaches first:
+    
+    - buy limits, highest price first (fill when price <= limit)
+    - sell limits, lowest first (price >= limit)
+    - buy stops, lowest first (price >= stop)
+    - sell stops, highest first (price <= stop)
+    
+    A tick compares the price with the four tops only and pops just the
+    triggered orders: O(1) when nothing triggers, O(log n) per fill, however
+    many orders rest. Cancels are lazy (the heap entry is skipped when it
+    surfaces); the heaps are rebuilt once dead entries outnumber live ones.
+    """
+    __slots__ = ("_buy_limits", "_sell_limits", "_buy_stops", "_sell_stops", "_live", "_dead")
+
+    def __init__(self):
+        # (sort key, order number, order); the number keeps equal prices FIFO
+        self._buy_limits: List[Tuple[float, int, PendingOrder]] = []
+        self._sell_limits: List[Tuple[float, int, PendingOrder]] = []
+        self._buy_stops: List[Tuple[float, int, PendingOrder]] = []
+        self._sell_stops: List[Tuple[float, int, PendingOrder]] = []
+        self._live: Dict[int, PendingOrder] = {}
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def add(self, order: PendingOrder):
+        if order.kind == "LIMIT":
+            if order.side == "BUY":
+                heapq.heappush(self._buy_limits, (-order.price, order.order_number, order))
+            else:
+                heapq.heappush(self._sell_limits, (order.price, order.order_number, order))
+        elif order.side == "BUY":
+            heapq.heappush(self._buy_stops, (order.price, order.order_number, order))
+        else:
+            heapq.heappush(self._sell_stops, (-order.price, order.order_number, order))
+        self._live[order.order_number] = order
+
+    def cancel(self, order_number: int) -> Optional[PendingOrder]:
+        order = self._live.pop(order_number, None)
+        if order is not None:
+            self._dead += 1
+            if self._dead > len(self._live) + 64:
+                self._compact()
+        return order
+
+    def _compact(self):
+        for heap in (self._buy_limits, self._sell_limits, self._buy_stops, self._sell_stops):
+            heap[:] = [entry for entry in heap if entry[1] in self._live]
+            heapq.heapify(heap)
+        self._dead = 0
+
+    def orders(self) -> List[PendingOrder]:
+        return sorted(self._live.values(), key=lambda o: o.order_number)
+
+    def triggered(self, price: float) -> List[PendingOrder]:
+        """Remove and return the orders this price triggers, oldest first."""
+        live = self._live
+        out = []
+        heap = self._buy_limits
+        while heap and price <= -heap[0][0]:
+            order = live.pop(heapq.heappop(heap)[1], None)
+            if order is None:
+                self._dead -= 1
+            else:
+                out.append(order)
+        heap = self._sell_limits
+        while heap and price >= heap[0][0]:
+            order = live.pop(heapq.heappop(heap)[1], None)
+            if order is None:
+                self._dead -= 1
+            else:
+                out.append(order)
+        heap = self._buy_stops
+        while heap and price >= heap[0][0]:
+            order = live.pop(heapq.heappop(heap)[1], None)
+            if order is None:
+                self._dead -= 1
+            else:
+                out.append(order)
+        heap = self._sell_stops
+        while heap and price <= -heap[0][0]:
+            order = live.pop(heapq.heappop(heap)[1], None)
+            if order is None:
+                self._dead -= 1
+            else:
+                out.append(order)
+        if len(out) > 1:
+            out.sort(key=lambda o: o.order_number)
+        return out
+
+class FixedTickSlippage:
+    """Market and stop fills move `ticks` ticks against the order."""
+    def __init__(self, ticks: float, tick_size: float):
+        if tick_size <= 0:
+            raise ValueError("Tick slippage needs a tick size")
+        self.offset = ticks * tick_size
+
+    def apply(self, side: str, price: float) -> float:
+        return price + self.offset if side == "BUY" else price - self.offset
+
+class BpsSlippage:
+    """Market and stop fills move `bps` basis points against the order."""
+    def __init__(self, bps: float):
+        self.rate = bps / 10_000.0
+
+    def apply(self, side: str, price: float) -> float:
+        return price * (1.0 + self.rate) if side == "BUY" else price * (1.0 - self.rate)
+
+def parse_slippage(spec: str, tick_size: float = 0.0):
+    """'none', 'ticks:N' or 'bps:N' -> slippage model (None for 'none')."""
+    kind, _, value = spec.partition(":")
+    if kind == "none" and not value:
+        return None
+    try:
+        amount = float(value)
+    except ValueError:
+        raise ValueError(f"Invalid slippage: {spec!r} (expected 'none', 'ticks:N' or 'bps:N')") from None
+    if amount < 0:
+        raise ValueError("Slippage must be >= 0")
+    if kind == "ticks":
+        return FixedTickSlippage(amount, tick_size)
+    if kind == "bps":
+        return BpsSlippage(amount)
+    raise ValueError(f"Invalid slippage: {spec!r} (expected 'none', 'ticks:N' or 'bps:N')")
 
 class Broker(Protocol):
     def get_cash(self) -> float: ...
     def get_position(self, symbol: str) -> int: ...
     def get_average_entry(self, symbol: str) -> float: ...
     def place_order(self, symbol: str, qty: int, side: str, price: float, timestamp: datetime) -> str: ...
-    def get_trades(self) -> List[Trade]: ...
+    def get_trades(self) -> Sequence[Trade]: ...
     def get_realized_pnl(self) -> float: ...
 
 class MockBroker:
-    def __init__(self, initial_cash: float = 100_000.0, allow_short: bool = False):
+    def __init__(self, initial_cash: float = 100_000.0, allow_short: bool = False,
+                 max_trades: Optional[int] = None, on_fill: Optional[Callable[[Trade], None]] = None,
+                 multiplier: float = 1.0, commission: float = 0.0, tick_size: float = 0.0,
+                 slippage=None, journal=None,
+                 on_fill_pnl: Optional[Callable[[Optional[float], float], None]] = None):
+        """
+        max_trades bounds the retained trade history to the most recent fills
+        (None keeps everything). on_fill is called with every Trade, which is
+        built from the ledger for it; consumers that only need the numbers
+        (e.g. MetricsAccumulator.record) should use on_fill_pnl instead, called
+        with (realized_pnl, commission) per fill without building a Trade.
+        
+        Order model: multiplier is the contract value per point (cash and PnL
+        scale by it), commission is charged per contract on every fill,
+        tick_size > 0 puts fills and resting prices on the price grid, and
+        slippage (see parse_slippage) worsens market and stop fills. The
+        defaults fill exactly at the given price. set_contract gives a symbol
+        its own settings, for portfolios that mix contracts.
+        
+        journal (a journal.EventJournal) receives fills, rejections and
+        resting order events.
+        """
         self.cash = initial_cash
         self.initial_cash = initial_cash
         self.allow_short = allow_short
+        self.multiplier = multiplier
+        self.commission = commission
+        self.tick_size = tick_size
+        self.slippage = slippage
+        # symbol -> (multiplier, commission, tick_size, slippage) overriding the defaults above
+        self.contracts: Dict[str, Tuple[float, float, float, Any]] = {}
         
         self.positions: Dict[str, int] = {}
         self.avg_entries: Dict[str, float] = {} # Track avg entry price
         
-        self.trades: List[Trade] = []
+        self.books: Dict[str, OrderBook] = {}
+        self.open_orders = 0  # resting orders across all books (cheap per-tick check)
+        
+        self.trades = TradeLedger(max_trades)
+        self.on_fill = on_fill
+        self.on_fill_pnl = on_fill_pnl
+        self.journal = journal
         self._order_counter = 0
         self._realized_pnl = 0.0
+        self._commissions = 0.0
+
+    @classmethod
+    def from_config(cls, config, max_trades: Optional[int] = None,
+                    on_fill: Optional[Callable[[Trade], None]] = None, journal=None,
+                    on_fill_pnl: Optional[Callable[[Optional[float], float], None]] = None) -> "MockBroker":
+        """A broker with the account and order model settings of a BotConfig."""
+        return cls(initial_cash=config.initial_cash, allow_short=config.allow_short,
+                   max_trades=max_trades, on_fill=on_fill, multiplier=config.multiplier,
+                   commission=config.commission, tick_size=config.tick_size,
+                   slippage=parse_slippage(config.slippage, config.tick_size), journal=journal,
+                   on_fill_pnl=on_fill_pnl)
+
+    def set_contract(self, symbol: str, multiplier: float, commission: float, tick_size: float, slippage=None):
+        """Fill, charge and value symbol with its own contract settings instead of the defaults."""
+        self.contracts[symbol] = (multiplier, commission, tick_size, slippage)
+
+    def get_multiplier(self, symbol: str) -> float:
+        spec = self.contracts.get(symbol)
+        return self.multiplier if spec is None else spec[0]
+
+    def _tick_size(self, symbol: str) -> float:
+        spec = self.contracts.get(symbol)
+        return self.tick_size if spec is None else spec[2]
 
     def get_cash(self) -> float:
         return self.cash
@@ -42,111 +393,183 @@ class MockBroker:
     def get_realized_pnl(self) -> float:
         return self._realized_pnl
 
+    def get_commissions(self) -> float:
+        return self._commissions
+
     def get_position(self, symbol: str) -> int:
         return self.positions.get(symbol, 0)
         
     def get_average_entry(self, symbol: str) -> float:
         return self.avg_entries.get(symbol, 0.0)
 
+    def _market_fill_price(self, symbol: str, side: str, price: float) -> float:
+        spec = self.contracts.get(symbol)
+        if spec is not None:
+            return market_fill_price(spec[3], spec[2], side, price)
+        return market_fill_price(self.slippage, self.tick_size, side, price)
+
+    def _rejected(self, symbol: str, qty: int, side: str, price: float, timestamp) -> bool:
+        # Rule Check: Long-Only
+        current_pos = self.positions.get(symbol, 0)
+        # Cannot SELL if we don't have a position
+        if side == "SELL" and current_pos <= 0:
+            logger.warning("REJECTED: Sell %s %s - Short selling disabled and no long position.", qty, symbol)
+            reason = "no_position"
+        # Cannot Sell more than we own (no net short)
+        elif side == "SELL" and (current_pos - qty) < 0:
+            logger.warning("REJECTED: Sell %s %s - Cannot flip to net short.", qty, symbol)
+            reason = "net_short"
+        else:
+            return False
+        if self.journal is not None:
+            self.journal.reject(timestamp, symbol, side, qty, price, reason)
+        return True
+
     def place_order(self, symbol: str, qty: int, side: str, price: float, timestamp: datetime) -> str:
         """
-        Execute an assumed market order fill at the given price.
+        Execute an assumed market order fill at the given price (plus slippage
+        and tick rounding, if configured).
         Enforces Long-Only if allow_short is False.
         """
         side = side.upper()
-        current_pos = self.positions.get(symbol, 0)
-        
-        # Rule Check: Long-Only
-        if not self.allow_short:
-            # Cannot SELL if we don't have a position
-            if side == "SELL" and current_pos <= 0:
-                logger.warning(f"REJECTED: Sell {qty} {symbol} - Short selling disabled and no long position.")
-                return ""
-                
-            # Cannot Sell more than we own (no net short)
-            if side == "SELL" and (current_pos - qty) < 0:
-                 logger.warning(f"REJECTED: Sell {qty} {symbol} - Cannot flip to net short.")
-                 return ""
-
+        if not self.allow_short and side == "SELL" and self._rejected(symbol, qty, side, price, timestamp):
+            return ""
         self._order_counter += 1
-        order_id = f"ORD-{self._order_counter:04d}"
+        if self.slippage is not None or self.tick_size > 0 or self.contracts:
+            price = self._market_fill_price(symbol, side, price)
+        self._fill(symbol, qty, side, price, timestamp, self._order_counter)
+        return f"ORD-{self._order_counter:04d}"
+
+    def _fill(self, symbol: str, qty: int, side: str, price: float, timestamp, order_number: int):
+        sign = _SIDE_CODES.get(side)
+        if sign is None:
+            raise ValueError(f"Invalid side: {side}")
+        multiplier, commission = self.multiplier, self.commission
+        if self.contracts:
+            spec = self.contracts.get(symbol)
+            if spec is not None:
+                multiplier, commission = spec[0], spec[1]
         
-        cost = qty * price
+        # The account arithmetic (PnL on the closed part, average entry, cash) is the kernel's
+        self.cash, self.positions[symbol], self.avg_entries[symbol], pnl, fee = apply_fill(
+            self.cash, self.positions.get(symbol, 0), self.avg_entries.get(symbol, 0.0),
+            sign, qty, price, multiplier, commission)
         trade_pnl = None
-        
-        if side == "BUY":
-            # Opening (or adding to) Long, OR Closing Short
-            
-            # If we are Short, this BUY is closing/reducing
-            if current_pos < 0:
-                # Calculate PnL on the portion closed
-                # Entry: avg_entry, Exit: price. Short profit = Entry - Exit
-                avg_entry = self.avg_entries.get(symbol, 0.0)
-                qty_closing = min(abs(current_pos), qty)
-                pnl = (avg_entry - price) * qty_closing
-                self._realized_pnl += pnl
-                trade_pnl = pnl
-                
-            # Update Avg Entry?
-            # If flipping from Short to Long, or adding to Long.
-            # Simplified: Weighted Average if Adding to Same Side. 
-            # Reset if flipping.
-            new_pos = current_pos + qty
-            if current_pos >= 0:
-                # Adding to Long
-                total_val = (current_pos * self.avg_entries.get(symbol, 0.0)) + (qty * price)
-                self.avg_entries[symbol] = total_val / new_pos if new_pos != 0 else 0.0
-            elif new_pos > 0:
-                # Flipped from Short to Long
-                # The remaining qty is new Long
-                self.avg_entries[symbol] = price
+        if pnl == pnl:
+            self._realized_pnl += pnl
+            trade_pnl = pnl
+        if fee:
+            self._commissions += fee
             
-            self.cash -= cost
-            self.positions[symbol] = new_pos
-            
-        elif side == "SELL":
-            # Opening Short, OR Closing Long
-            
-            # If we are Long, this SELL is closing/reducing
-            if current_pos > 0:
-                # Calculate PnL
-                # Entry: avg_entry, Exit: price. Long profit = Exit - Entry
-                avg_entry = self.avg_entries.get(symbol, 0.0)
-                qty_closing = min(current_pos, qty)
-                pnl = (price - avg_entry) * qty_closing
-                self._realized_pnl += pnl
-                trade_pnl = pnl
-                
-            # Update Avg Entry?
-            new_pos = current_pos - qty
-            if current_pos <= 0:
-                # Adding to Short
-                # Note: keeping avg_entry positive for calc
-                total_val = (abs(current_pos) * self.avg_entries.get(symbol, 0.0)) + (qty * price)
-                self.avg_entries[symbol] = total_val / abs(new_pos) if new_pos != 0 else 0.0
-            elif new_pos < 0:
-                # Flipped from Long to Short
-                self.avg_entries[symbol] = price
-                
-            self.cash += cost
-            self.positions[symbol] = new_pos
-        else:
-            raise ValueError(f"Invalid side: {side}")
-            
-        trade = Trade(
-            timestamp=timestamp,
-            symbol=symbol,
-            side=side,
-            qty=qty,
-            price=price,
-            order_id=order_id,
-            realized_pnl=trade_pnl
-        )
-        self.trades.append(trade)
+        self.trades.append(timestamp, symbol, side, qty, price, order_number, trade_pnl, fee)
+        if self.on_fill_pnl is not None:
+            self.on_fill_pnl(trade_pnl, fee)
+        if self.on_fill is not None:
+            self.on_fill(self.trades[-1])
+        if self.journal is not None:
+            self.journal.fill(timestamp, symbol, side, qty, price, trade_pnl, order_number)
         
-        pnl_str = f" | PnL: ${trade_pnl:.2f}" if trade_pnl is not None else ""
-        logger.info(f"FILLED: {side} {qty} {symbol} @ {price:.2f}{pnl_str} | Id: {order_id} | Pos: {self.positions[symbol]}")
-        return order_id
+        # Only format the fill line when INFO is actually emitted
+        if logger.isEnabledFor(logging.INFO):
+            pnl_str = f" | PnL: ${trade_pnl:.2f}" if trade_pnl is not None else ""
+            logger.info(f"FILLED: {side} {qty} {symbol} @ {price:.2f}{pnl_str} | Id: ORD-{order_number:04d} | Pos: {self.positions[symbol]}")
+
+    def place_limit_order(self, symbol: str, qty: int, side: str, limit_price: float, timestamp) -> str:
+        """Rest a limit order; it fills at the limit or better once the price reaches it."""
+        # Round towards the passive side: a buy limit never rests above its price
+        side = side.upper()
+        return self._rest(symbol, qty, side, "LIMIT", round_to_tick(limit_price, self._tick_size(symbol), up=side == "SELL"), timestamp)
+
+    def place_stop_order(self, symbol: str, qty: int, side: str, stop_price: float, timestamp) -> str:
+        """Rest a stop order; once the price trades through it, it fills as a market order."""
+        side = side.upper()
+        return self._rest(symbol, qty, side, "STOP", round_to_tick(stop_price, self._tick_size(symbol), up=side == "BUY"), timestamp)
+
+    def _rest(self, symbol: str, qty: int, side: str, kind: str, price: float, timestamp) -> str:
+        if side not in _SIDE_CODES:
+            raise ValueError(f"Invalid side: {side}")
+        if qty <= 0:
+            raise ValueError("Order quantity must be > 0")
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook()
+        self._order_counter += 1
+        book.add(PendingOrder(self._order_counter, symbol, side, kind, qty, price, timestamp))
+        self.open_orders += 1
+        logger.debug("RESTING: %s %s %s %s @ %.2f | Id: ORD-%04d", side, kind, qty, symbol, price, self._order_counter)
+        if self.journal is not None:
+            self.journal.order(timestamp, symbol, side, qty, price, self._order_counter, kind)
+        return f"ORD-{self._order_counter:04d}"
+
+    def cancel_order(self, order_id: str, timestamp=None) -> bool:
+        """Cancel a resting order; False if it already filled or was cancelled."""
+        order_number = int(order_id.rpartition("-")[2])
+        for symbol, book in self.books.items():
+            if book.cancel(order_number) is not None:
+                self.open_orders -= 1
+                if self.journal is not None:
+                    self.journal.cancel(timestamp, symbol, order_number)
+                return True
+        return False
+
+    def get_open_orders(self, symbol: Optional[str] = None) -> List[PendingOrder]:
+        books = [self.books[symbol]] if symbol in self.books else [] if symbol else self.books.values()
+        return [order for book in books for order in book.orders()]
+
+    def process_pending(self, symbol: str, price: float, timestamp) -> List[Trade]:
+        """
+        Fill the resting orders of symbol that price triggers, oldest first,
+        and return the resulting trades. Limits fill at their price, or at the
+        tick price when it gapped through; stops fill like market orders at the
+        tick price. A triggered order the long-only rule rejects is dropped.
+        """
+        book = self.books.get(symbol)
+        if not book:
+            return []
+        triggered = book.triggered(price)
+        self.open_orders -= len(triggered)
+        fills = []
+        for order in triggered:
+            side = order.side
+            if not self.allow_short and side == "SELL" and self._rejected(symbol, order.qty, side, price, timestamp):
+                continue
+            if order.kind == "LIMIT":
+                fill_price = min(price, order.price) if side == "BUY" else max(price, order.price)
+            else:
+                fill_price = self._market_fill_price(symbol, side, price)
+            self._fill(symbol, order.qty, side, fill_price, timestamp, order.order_number)
+            fills.append(self.trades[-1])
+        return fills
         
-    def get_trades(self) -> List[Trade]:
+    def get_trades(self) -> TradeLedger:
         return self.trades
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Picklable account state: cash, positions, entries, resting orders and the retained ledger."""
+        return {
+            "cash": self.cash,
+            "initial_cash": self.initial_cash,
+            "positions": dict(self.positions),
+            "avg_entries": dict(self.avg_entries),
+            "order_counter": self._order_counter,
+            "realized_pnl": self._realized_pnl,
+            "commissions": self._commissions,
+            "open_orders": [(o.order_number, o.symbol, o.side, o.kind, o.qty, o.price, o.timestamp)
+                            for o in self.get_open_orders()],
+            "trades": self.trades.snapshot()
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        self.cash = state["cash"]
+        self.initial_cash = state["initial_cash"]
+        self.positions = dict(state["positions"])
+        self.avg_entries = dict(state["avg_entries"])
+        self._order_counter = state["order_counter"]
+        self._realized_pnl = state["realized_pnl"]
+        self._commissions = state["commissions"]
+        self.books = {}
+        for fields in state["open_orders"]:
+            order = PendingOrder(*fields)
+            self.books.setdefault(order.symbol, OrderBook()).add(order)
+        self.open_orders = len(state["open_orders"])
+        self.trades.restore(state["trades"])
@@ -0,0 +1,94 @@
+from pathlib import Path
+from typing import Optional, Tuple
+import logging
+import os
+import struct
+import zlib
+
+import numpy as np
+
+logger = logging.getLogger("topstep_demo.cache")
+
+# Columnar price cache layout (little-endian):
+#   64-byte header | int64 epoch-ns timestamps[count] | float64 prices[count]
+# The header records the source CSV's size and mtime so edits invalidate it.
+MAGIC = b"TSPC"
+VERSION = 1
+CACHE_SUFFIX = ".tspc"
+_HEADER = struct.Struct("<4sHHQQqI")  # magic, version, reserved, count, src_size, src_mtime_ns, payload_crc
+HEADER_SIZE = 64
+
+def cache_path_for(csv_path: Path) -> Path:
+    """Cache file that sits next to the source CSV."""
+    return csv_path.with_name(csv_path.name + CACHE_SUFFIX)
+
+def _payload_crc(timestamps: np.ndarray, prices: np.ndarray) -> int:
+    return zlib.crc32(memoryview(prices).cast("B"), zlib.crc32(memoryview(timestamps).cast("B")))
+
+def write_price_cache(cache_path: Path, source: Path, timestamps: np.ndarray, prices: np.ndarray):
+    """
+    Write the arrays to cache_path atomically (temp file + rename).
+    timestamps must be datetime64[ns] (or int64 epoch-ns).
+    """
+    ts = np.ascontiguousarray(timestamps).view(np.int64).astype("<i8", copy=False)
+    px = np.ascontiguousarray(prices, dtype="<f8")
+    if len(ts) != len(px):
+        raise ValueError("timestamps and prices must have the same length")
+        
+    stat = source.stat()
+    header = _HEADER.pack(MAGIC, VERSION, 0, len(px), stat.st_size, stat.st_mtime_ns, _payload_crc(ts, px))
+    header += (HEADER_SIZE - len(header) - 4) * b"\0"
+    header += struct.pack("<I", zlib.crc32(header))
+    
+    tmp_path = cache_path.with_name(cache_path.name + f".{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(memoryview(ts).cast("B"))
+            f.write(memoryview(px).cast("B"))
+        os.replace(tmp_path, cache_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    logger.debug(f"Wrote price cache {cache_path} ({len(px)} rows)")
+
+def open_price_cache(cache_path: Path, source: Optional[Path] = None,
+                     verify: bool = False) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Memory-map a price cache and return zero-copy (datetime64[ns], float64) views.
+    Returns None if the cache is missing, corrupt, or older than `source`.
+    verify=True also checks the payload CRC (reads the whole file).
+    """
+    try:
+        with open(cache_path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+    except OSError:
+        return None
+        
+    if len(header) != HEADER_SIZE or zlib.crc32(header[:-4]) != struct.unpack("<I", header[-4:])[0]:
+        logger.warning(f"Ignoring corrupt price cache {cache_path}")
+        return None
+    magic, version, _, count, src_size, src_mtime_ns, payload_crc = _HEADER.unpack_from(header)
+    if magic != MAGIC or version != VERSION:
+        return None
+    if source is not None:
+        stat = source.stat()
+        if stat.st_size != src_size or stat.st_mtime_ns != src_mtime_ns:
+            logger.info(f"Price cache {cache_path} is stale, rebuilding")
+            return None
+    if cache_path.stat().st_size != HEADER_SIZE + 16 * count:
+        logger.warning(f"Ignoring truncated price cache {cache_path}")
+        return None
+        
+    if count == 0:
+        return np.empty(0, dtype="datetime64[ns]"), np.empty(0, dtype=np.float64)
+        
+    buf = np.memmap(cache_path, dtype=np.uint8, mode="r")
+    ts = buf[HEADER_SIZE:HEADER_SIZE + 8 * count].view("<i8")
+    px = buf[HEADER_SIZE + 8 * count:].view("<f8")
+    
+    if verify and _payload_crc(ts, px) != payload_crc:
+        logger.warning(f"Price cache {cache_path} failed checksum, rebuilding")
+        return None
+        
+    return ts.view("datetime64[ns]"), px
@@ -0,0 +1,123 @@
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, Optional
+import logging
+import os
+import pickle
+import time
+
+from .config import BotConfig
+
+logger = logging.getLogger("topstep_demo.checkpoint")
+
+CHECKPOINT_VERSION = 3
+
+# Every config field changes what the restored state means (positions, costs,
+# SL/TP levels, account limit state), so a checkpoint taken with a different
+# value cannot be resumed. The exceptions only apply to runs that never
+# checkpoint: bar_fill is for bar mode.
+_RESUMABLE_CONFIG_FIELDS = ("bar_fill",)
+
+def capture_state(config: BotConfig, strategy, risk_manager, broker, metrics,
+                  offset: int, source: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Collect the engine state after `offset` feed events. Every part is O(1) in
+    the run length except the broker ledger (bounded by max_trades) and a
+    retained equity curve.
+    """
+    return {
+        "version": CHECKPOINT_VERSION,
+        "config": asdict(config),
+        "source": source,
+        "offset": offset,
+        "strategy": strategy.snapshot(),
+        "risk": risk_manager.snapshot(),
+        "broker": broker.snapshot(),
+        "metrics": metrics.snapshot()
+    }
+
+def save_checkpoint(path: Path, state: Dict[str, Any]):
+    """Write a checkpoint atomically (temp file + fsync + rename)."""
+    tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+def load_checkpoint(path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Read a checkpoint written by save_checkpoint, or None if there is none.
+    Checkpoints are pickles: only load files this tool wrote.
+    """
+    try:
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    if not isinstance(state, dict) or state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"{path} is not a version {CHECKPOINT_VERSION} checkpoint")
+    return state
+
+def restore_state(state: Dict[str, Any], config: BotConfig, strategy, risk_manager, broker, metrics,
+                  source: Optional[str] = None) -> int:
+    """
+    Load a captured state into freshly built components and return the number
+    of feed events it already covers. Raises ValueError if the checkpoint was
+    taken with a different feed or engine-relevant config.
+    """
+    saved = state["config"]
+    current = asdict(config)
+    changed = [name for name in current
+               if name not in _RESUMABLE_CONFIG_FIELDS and saved.get(name) != current[name]]
+    if changed:
+        raise ValueError(f"Checkpoint config differs in: {', '.join(changed)}")
+    if source is not None and state["source"] is not None and state["source"] != source:
+        raise ValueError(f"Checkpoint is for feed {state['source']}, not {source}")
+
+    strategy.restore(state["strategy"])
+    risk_manager.restore(state["risk"])
+    broker.restore(state["broker"])
+    metrics.restore(state["metrics"])
+    return state["offset"]
+
+class Checkpointer:
+    """
+    Saves the engine state every `every` feed events (and on demand) to one
+    file, replacing the previous checkpoint.
+    """
+    def __init__(self, path: str, config: BotConfig, strategy, risk_manager, broker, metrics,
+                 every: int = 10_000, source: Optional[str] = None):
+        if every < 1:
+            raise ValueError("Checkpoint interval must be >= 1")
+        self.path = Path(path)
+        self.every = every
+        self.source = source
+        self._components = (config, strategy, risk_manager, broker, metrics)
+        self._next = every
+        self.saves = 0
+
+    def resume(self) -> int:
+        """Restore from the checkpoint file if present; returns the feed offset to skip to."""
+        state = load_checkpoint(self.path)
+        if state is None:
+            return 0
+        offset = restore_state(state, *self._components, source=self.source)
+        self._next = offset + self.every
+        logger.info(f"Resumed from checkpoint {self.path} at event {offset}")
+        return offset
+
+    def maybe_save(self, offset: int):
+        if offset >= self._next:
+            self.save(offset)
+
+    def save(self, offset: int):
+        start = time.perf_counter()
+        save_checkpoint(self.path, capture_state(*self._components, offset=offset, source=self.source))
+        self._next = offset + self.every
+        self.saves += 1
+        logger.debug(f"Checkpoint {self.path} at event {offset} in {(time.perf_counter() - start) * 1e3:.2f}ms")
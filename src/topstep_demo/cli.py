@@ -1,8 +1,70 @@
 import argparse
-from .runner import run_simulation
-from .config import BotConfig
+from .config import BotConfig, CONTRACT_SPECS, TOPSTEP_PLANS
 from .logging_utils import setup_logging
 
+def _add_strategy_arguments(parser):
+    from .strategy import STRATEGIES
+    parser.add_argument("--strategy", type=str, choices=sorted(STRATEGIES), default="ma",
+                        help="Signal strategy (ma uses --fast-ma/--slow-ma)")
+    parser.add_argument("--param", type=str, action="append", metavar="KEY=VALUE",
+                        help="Strategy parameter, repeatable (e.g. --param period=14)")
+
+def _strategy_options(args) -> dict:
+    from .strategy import parse_strategy_params
+    try:
+        return dict(strategy=args.strategy, strategy_params=parse_strategy_params(args.param))
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+def _add_limit_arguments(parser):
+    parser.add_argument("--topstep", type=str, choices=sorted(TOPSTEP_PLANS),
+                        help="Apply a Topstep evaluation plan: account size and the limits below")
+    parser.add_argument("--max-drawdown", type=float, help="Trailing max drawdown from the equity high (account currency)")
+    parser.add_argument("--daily-loss", type=float, help="Daily loss limit (account currency)")
+    parser.add_argument("--max-contracts", type=int, help="Max open contracts")
+    parser.add_argument("--day-start-hour", type=int, default=0, help="Feed clock hour at which a trading day starts")
+
+def _limit_options(args) -> dict:
+    """BotConfig fields for the account limits; explicit flags override a --topstep plan."""
+    cash, drawdown, daily, contracts = TOPSTEP_PLANS[args.topstep] if args.topstep else (None, None, None, None)
+    return dict(
+        initial_cash=args.initial_cash if args.initial_cash is not None else (cash or 100_000.0),
+        max_trailing_drawdown=args.max_drawdown if args.max_drawdown is not None else drawdown,
+        daily_loss_limit=args.daily_loss if args.daily_loss is not None else daily,
+        max_contracts=args.max_contracts if args.max_contracts is not None else contracts,
+        trading_day_start_hour=args.day_start_hour
+    )
+
+def _add_order_arguments(parser, exits: bool = True):
+    parser.add_argument("--contract", type=str, choices=sorted(CONTRACT_SPECS),
+                        help="Futures contract preset: multiplier and tick size (e.g. ES = $50/point, 0.25)")
+    parser.add_argument("--multiplier", type=float, help="Account currency per point and contract (default 1)")
+    parser.add_argument("--commission", type=float, default=0.0, help="Commission per contract and fill")
+    parser.add_argument("--tick-size", type=float, help="Price grid for fills and resting orders (default none)")
+    parser.add_argument("--slippage", type=str, default="none", metavar="SPEC",
+                        help="Market/stop fill slippage: 'none', 'ticks:N' or 'bps:N'")
+    if exits:
+        parser.add_argument("--exit-orders", type=str, choices=["market", "bracket"], default="market",
+                            help="SL/TP as market exits on touch, or as resting stop/limit bracket orders")
+
+def _order_options(args) -> dict:
+    """BotConfig fields for the order model; explicit flags override a --contract preset."""
+    from .broker import parse_slippage
+    multiplier, tick_size = CONTRACT_SPECS[args.contract] if args.contract else (1.0, 0.0)
+    options = dict(
+        multiplier=args.multiplier if args.multiplier is not None else multiplier,
+        commission=args.commission,
+        tick_size=args.tick_size if args.tick_size is not None else tick_size,
+        slippage=args.slippage
+    )
+    if hasattr(args, "exit_orders"):
+        options["exit_orders"] = args.exit_orders
+    try:
+        parse_slippage(options["slippage"], options["tick_size"])
+    except ValueError as e:
+        raise SystemExit(str(e))
+    return options
+
 def main():
     parser = argparse.ArgumentParser(description="Topstep Trading Bot Demo")
     
@@ -10,27 +72,233 @@ def main():
     parser.add_argument("--qty", type=int, default=1, help="Order Quantity")
     parser.add_argument("--sl-pct", type=float, default=0.01, help="Stop Loss Percentage")
     parser.add_argument("--tp-pct", type=float, default=0.02, help="Take Profit Percentage")
-    parser.add_argument("--initial-cash", type=float, default=100_000.0, help="Initial Cash")
+    parser.add_argument("--initial-cash", type=float, default=None, help="Initial Cash (default 100000)")
     parser.add_argument("--allow-short", action="store_true", help="Allow Short Selling")
     
     parser.add_argument("--fast-ma", type=int, default=10, help="Fast MA Window")
     parser.add_argument("--slow-ma", type=int, default=20, help="Slow MA Window")
+    _add_strategy_arguments(parser)
+    
+    _add_limit_arguments(parser)
+    _add_order_arguments(parser)
     
     parser.add_argument("--csv", type=str, help="Custom CSV")
+    parser.add_argument("--feed", type=str, action="append", metavar="SYMBOL=CSV[:CONTRACT[:COMMISSION]]",
+                        help="Portfolio mode: add a symbol feed (repeat for each symbol), optionally with its own "
+                             "--contract preset and commission (e.g. CL=data/cl.csv:CL:2.5)")
+    parser.add_argument("--accounts", type=str, metavar="CSV",
+                        help="Trade the signals on every account of this CSV (per-account qty, SL/TP, cash, limits, ...)")
+    parser.add_argument("--accounts-out", type=str, metavar="CSV", help="Write every account's results to this CSV")
     
     # Mode selection
     parser.add_argument("--mode", type=str, choices=["backtest", "sim"], default="backtest", 
                         help="Run mode: backtest (fast, no delay) or sim (real-time simulation)")
     parser.add_argument("--fast", action="store_true", help="Legacy flag, alias for --mode backtest")
+    parser.add_argument("--engine", type=str, choices=["loop", "vectorized"], default="loop",
+                        help="Backtest engine: loop (per-tick) or vectorized (NumPy arrays, backtest mode only)")
+    
+    # Reporting
+    parser.add_argument("--bars", type=str, metavar="SPEC",
+                        help="Bar mode: 'ohlc' (--csv is OHLCV), 'time:SECONDS' or 'volume:N' (aggregate --csv ticks)")
+    parser.add_argument("--bar-fill", type=str, choices=["worst", "best", "close"], default="worst",
+                        help="Intrabar SL/TP fill when a bar touches both levels (worst = stop first)")
+    parser.add_argument("--equity-out", type=str, help="Keep the equity curve and write it to this CSV")
+    parser.add_argument("--curve-every", type=int, default=1, help="Downsample the kept equity curve to every Nth bar")
+    parser.add_argument("--trade-history", type=int, default=100,
+                        help="Recent trades kept in memory for the report (0 keeps every trade)")
+    parser.add_argument("--ratios", action="store_true", help="Include per-bar Sharpe/Sortino in the report")
+    parser.add_argument("--report", type=str, choices=["rich", "json", "none"], default="rich",
+                        help="Final report: Rich tables, one JSON object on stdout, or nothing")
+    parser.add_argument("--analytics", type=str, metavar="PATH",
+                        help="Write the full metrics set (Calmar, profit factor, exposure, ...) as JSON, or CSV for .csv")
+    parser.add_argument("--daily-out", type=str, metavar="CSV", help="Write per-day PnL to this CSV")
+    parser.add_argument("--checkpoint", type=str, metavar="PATH",
+                        help="Resume from this state file if it exists, and keep it updated during the run")
+    parser.add_argument("--checkpoint-every", type=int, default=10_000, help="Ticks between checkpoint saves")
+    parser.add_argument("--profile", action="store_true", help="Record per-stage tick loop latencies (loop engine)")
+    parser.add_argument("--profile-json", type=str, help="Write the tick loop latency histograms to this JSON (implies --profile)")
+    parser.add_argument("--journal", type=str, metavar="PATH",
+                        help="Write an event journal: JSON lines, or binary for a .bin/.tsj suffix")
+    parser.add_argument("--trade-log", type=str, metavar="CSV",
+                        help="Write every fill to this canonical CSV (compare runs with the diff command)")
+    parser.add_argument("--digest", type=str, metavar="PATH",
+                        help="Write a JSON run digest: SHA-256 of the fills and the per-bar equity")
     
     parser.add_argument("--log-level", type=str, default="INFO", help="Logging level")
+    parser.add_argument("--log-format", type=str, choices=["rich", "json"], default=None,
+                        help="Console log format: rich text or JSON lines on stderr (default: rich, json with --report json/none)")
+    
+    subparsers = parser.add_subparsers(dest="command")
+    sweep = subparsers.add_parser("sweep", help="Grid-search strategy/risk parameters in parallel")
+    sweep.add_argument("--symbol", type=str, default="SIM-ES", help="Trading Symbol")
+    sweep.add_argument("--qty", type=int, default=1, help="Order Quantity")
+    sweep.add_argument("--initial-cash", type=float, default=100_000.0, help="Initial Cash")
+    sweep.add_argument("--allow-short", action="store_true", help="Allow Short Selling")
+    sweep.add_argument("--csv", type=str, help="Custom CSV")
+    _add_order_arguments(sweep, exits=False)
+    sweep.add_argument("--fast-ma", type=str, default="5:20:5", help="Fast MA grid: list '5,10' or range 'start:stop:step'")
+    sweep.add_argument("--slow-ma", type=str, default="20:60:10", help="Slow MA grid")
+    sweep.add_argument("--sl-pct", type=str, default="0.005,0.01", help="Stop Loss grid")
+    sweep.add_argument("--tp-pct", type=str, default="0.01,0.02", help="Take Profit grid")
+    sweep.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    sweep.add_argument("--rank-by", type=str, choices=["pnl", "win_rate", "max_drawdown"], default="pnl",
+                       help="Ranking metric")
+    sweep.add_argument("--top", type=int, default=20, help="Rows to show in the results table")
+    sweep.add_argument("--output", type=str, help="Write the full ranked results to this CSV")
+    sweep.add_argument("--log-level", type=str, default="INFO", help="Logging level")
+    
+    wf = subparsers.add_parser("walkforward", help="Walk-forward optimization: re-fit on rolling train windows, trade the next window")
+    wf.add_argument("--symbol", type=str, default="SIM-ES", help="Trading Symbol")
+    wf.add_argument("--qty", type=int, default=1, help="Order Quantity")
+    wf.add_argument("--initial-cash", type=float, default=100_000.0, help="Initial Cash")
+    wf.add_argument("--allow-short", action="store_true", help="Allow Short Selling")
+    wf.add_argument("--csv", type=str, help="Custom CSV")
+    _add_order_arguments(wf, exits=False)
+    wf.add_argument("--fast-ma", type=str, default="5:20:5", help="Fast MA grid: list '5,10' or range 'start:stop:step'")
+    wf.add_argument("--slow-ma", type=str, default="20:60:10", help="Slow MA grid")
+    wf.add_argument("--sl-pct", type=str, default="0.005,0.01", help="Stop Loss grid")
+    wf.add_argument("--tp-pct", type=str, default="0.01,0.02", help="Take Profit grid")
+    wf.add_argument("--train-bars", type=int, default=500, help="Bars per train (in-sample) window")
+    wf.add_argument("--test-bars", type=int, default=100, help="Bars per test (out-of-sample) window")
+    wf.add_argument("--anchored", action="store_true", help="Grow train windows from the first bar instead of rolling")
+    wf.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    wf.add_argument("--rank-by", type=str, choices=["pnl", "win_rate", "max_drawdown"], default="pnl",
+                    help="Metric used to pick each fold's parameters")
+    wf.add_argument("--folds-out", type=str, help="Write the per-fold parameters and results to this CSV")
+    wf.add_argument("--equity-out", type=str, help="Write the stitched out-of-sample equity curve to this CSV")
+    wf.add_argument("--ratios", action="store_true", help="Include per-bar Sharpe/Sortino in the report")
+    wf.add_argument("--log-level", type=str, default="INFO", help="Logging level")
+    
+    live = subparsers.add_parser("live", help="Trade an async TCP tick feed (or an in-process CSV replay)")
+    live.add_argument("--symbol", type=str, default="SIM-ES", help="Trading Symbol")
+    live.add_argument("--qty", type=int, default=1, help="Order Quantity")
+    live.add_argument("--sl-pct", type=float, default=0.01, help="Stop Loss Percentage")
+    live.add_argument("--tp-pct", type=float, default=0.02, help="Take Profit Percentage")
+    live.add_argument("--initial-cash", type=float, default=None, help="Initial Cash (default 100000)")
+    live.add_argument("--allow-short", action="store_true", help="Allow Short Selling")
+    live.add_argument("--fast-ma", type=int, default=10, help="Fast MA Window")
+    live.add_argument("--slow-ma", type=int, default=20, help="Slow MA Window")
+    _add_strategy_arguments(live)
+    _add_limit_arguments(live)
+    _add_order_arguments(live)
+    live.add_argument("--host", type=str, default="127.0.0.1", help="Feed host")
+    live.add_argument("--port", type=int, default=9700, help="Feed port")
+    live.add_argument("--replay", type=str, metavar="CSV", help="Start a local replay server for CSV and connect to it")
+    live.add_argument("--speed", type=float, default=0.0, help="Replay speed multiplier (0 = as fast as possible)")
+    live.add_argument("--policy", type=str, choices=["conflate", "queue"], default="conflate",
+                      help="When behind: conflate to the latest tick, or queue with backpressure")
+    live.add_argument("--queue-size", type=int, default=1024, help="Pending ticks allowed with --policy queue")
+    live.add_argument("--checkpoint", type=str, metavar="PATH",
+                      help="Restore state from this file if it exists, and keep it updated during the session")
+    live.add_argument("--checkpoint-every", type=int, default=10_000, help="Ticks between checkpoint saves")
+    live.add_argument("--journal", type=str, metavar="PATH",
+                      help="Write an event journal: JSON lines, or binary for a .bin/.tsj suffix")
+    live.add_argument("--report", type=str, choices=["rich", "json", "none"], default="rich",
+                      help="Final report: Rich tables, one JSON object on stdout, or nothing")
+    live.add_argument("--log-level", type=str, default="INFO", help="Logging level")
+    live.add_argument("--log-format", type=str, choices=["rich", "json"], default=None,
+                      help="Console log format: rich text or JSON lines on stderr (default: rich, json with --report json/none)")
+    
+    mc = subparsers.add_parser("montecarlo", help="Monte Carlo robustness: bootstrap price paths or reshuffle trades")
+    mc.add_argument("--symbol", type=str, default="SIM-ES", help="Trading Symbol")
+    mc.add_argument("--qty", type=int, default=1, help="Order Quantity")
+    mc.add_argument("--sl-pct", type=float, default=0.01, help="Stop Loss Percentage")
+    mc.add_argument("--tp-pct", type=float, default=0.02, help="Take Profit Percentage")
+    mc.add_argument("--initial-cash", type=float, default=None, help="Initial Cash (default 100000)")
+    mc.add_argument("--allow-short", action="store_true", help="Allow Short Selling")
+    mc.add_argument("--fast-ma", type=int, default=10, help="Fast MA Window")
+    mc.add_argument("--slow-ma", type=int, default=20, help="Slow MA Window")
+    _add_strategy_arguments(mc)
+    _add_limit_arguments(mc)
+    _add_order_arguments(mc)
+    mc.add_argument("--csv", type=str, help="Custom CSV")
+    mc.add_argument("--paths", type=int, default=1000, help="Number of simulated paths")
+    mc.add_argument("--method", type=str, choices=["bootstrap", "trades"], default="bootstrap",
+                    help="bootstrap: block-resampled price paths through the full pipeline; trades: reshuffle the original trades")
+    mc.add_argument("--block-size", type=int, default=50, help="Bootstrap block length in bars")
+    mc.add_argument("--seed", type=int, default=0, help="Random seed (results do not depend on --workers)")
+    mc.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    mc.add_argument("--output", type=str, help="Write every path's outcome to this CSV")
+    mc.add_argument("--report", type=str, choices=["rich", "json", "none"], default="rich",
+                    help="Summary: Rich tables, one JSON object on stdout, or nothing")
+    mc.add_argument("--log-level", type=str, default="INFO", help="Logging level")
+    mc.add_argument("--log-format", type=str, choices=["rich", "json"], default=None,
+                    help="Console log format: rich text or JSON lines on stderr (default: rich, json with --report json/none)")
+    
+    replay = subparsers.add_parser("replay-server", help="Stream a CSV over TCP as a market-data feed")
+    replay.add_argument("--csv", type=str, default="data/sample_prices.csv", help="CSV to replay")
+    replay.add_argument("--host", type=str, default="127.0.0.1", help="Bind host")
+    replay.add_argument("--port", type=int, default=9700, help="Bind port")
+    replay.add_argument("--speed", type=float, default=1.0, help="Speed multiplier of the CSV timestamps (0 = max)")
+    replay.add_argument("--log-level", type=str, default="INFO", help="Logging level")
+    
+    journal = subparsers.add_parser("journal", help="Replay or summarize an event journal")
+    journal.add_argument("path", type=str, help="Journal file (JSON lines or binary)")
+    journal.add_argument("--events", type=str, help="Only these event kinds, comma-separated (e.g. fill,reject)")
+    journal.add_argument("--limit", type=int, help="Print at most N events")
+    journal.add_argument("--summary", action="store_true", help="Print event counts and fill statistics instead")
+    journal.add_argument("--log-level", type=str, default="INFO", help="Logging level")
+    
+    diff = subparsers.add_parser("diff", help="Compare two runs' trade logs or digests; show the first diverging fill")
+    diff.add_argument("run_a", type=str, help="Trade log (--trade-log) or digest (--digest) of run A")
+    diff.add_argument("run_b", type=str, help="Same for run B")
+    diff.add_argument("--context", type=int, default=3, help="Fills shown before and after the divergence")
+    diff.add_argument("--log-level", type=str, default="INFO", help="Logging level")
     
     args = parser.parse_args()
     
-    setup_logging(args.log_level)
+    log_format = args.log_format
+    if log_format is None:
+        # RichHandler writes to stdout: keep it (and the rich import) out of JSON/no-report runs unless asked for
+        log_format = "rich" if getattr(args, "report", "rich") == "rich" else "json"
+    setup_logging(args.log_level, log_format)
+    
+    if args.command == "sweep":
+        run_sweep_command(args)
+        return
+    if args.command == "walkforward":
+        run_walk_forward_command(args)
+        return
+    if args.command == "montecarlo":
+        run_monte_carlo_command(args)
+        return
+    if args.command in ("live", "replay-server"):
+        run_live_command(args)
+        return
+    if args.command == "journal":
+        run_journal_command(args)
+        return
+    if args.command == "diff":
+        run_diff_command(args)
+        return
     
     # Handle legacy fast flag
     is_fast = args.mode == "backtest" or args.fast
+    if args.engine == "vectorized" and not is_fast:
+        parser.error("--engine vectorized requires --mode backtest")
+    if args.curve_every < 1:
+        parser.error("--curve-every must be >= 1")
+    if args.bars and (args.engine != "loop" or args.feed):
+        parser.error("--bars only supports a single feed with --engine loop")
+    if args.engine != "loop" and (args.topstep or args.max_drawdown or args.daily_loss or args.max_contracts):
+        parser.error("Account limits are only enforced by --engine loop")
+    if args.checkpoint and (args.engine != "loop" or args.feed or args.bars):
+        parser.error("--checkpoint only supports a single tick feed with --engine loop")
+    if (args.analytics or args.daily_out) and (args.feed or args.checkpoint):
+        parser.error("--analytics/--daily-out need a single feed run without --checkpoint")
+    if (args.trade_log or args.digest) and (args.feed or args.checkpoint):
+        parser.error("--trade-log/--digest need a single feed run without --checkpoint")
+    if args.checkpoint_every < 1:
+        parser.error("--checkpoint-every must be >= 1")
+    if args.exit_orders != "market" and (args.engine != "loop" or args.bars):
+        parser.error("--exit-orders bracket only supports tick feeds with --engine loop")
+    report_options = dict(
+        equity_out=args.equity_out,
+        curve_every=args.curve_every,
+        trade_history=args.trade_history or None,
+        show_ratios=args.ratios,
+        report=args.report
+    )
     
     config = BotConfig(
         symbol=args.symbol,
@@ -38,12 +306,202 @@ def main():
         sl_pct=args.sl_pct,
         tp_pct=args.tp_pct,
         allow_short=args.allow_short,
+        fast_ma=args.fast_ma,
+        slow_ma=args.slow_ma,
+        bar_fill=args.bar_fill,
+        **_strategy_options(args),
+        **_limit_options(args),
+        **_order_options(args)
+    )
+    
+    if args.accounts:
+        if args.feed or args.bars or args.checkpoint or not is_fast:
+            parser.error("--accounts backtests a single tick feed (no --feed, --bars, --checkpoint or --mode sim)")
+        if args.journal or args.trade_log or args.digest or args.analytics or args.daily_out or args.equity_out:
+            parser.error("--accounts writes only --accounts-out (no journal, trade log, digest, analytics or equity curve)")
+        from .accounts import run_accounts
+        try:
+            run_accounts(config, args.accounts, csv_path=args.csv, report=args.report, output=args.accounts_out)
+        except (OSError, ValueError) as e:
+            raise SystemExit(str(e))
+        return
+    
+    if args.feed:
+        if args.engine != "loop":
+            parser.error("Portfolio mode (--feed) only supports --engine loop")
+        from .portfolio import parse_feed_specs, run_portfolio
+        try:
+            feeds, contracts = parse_feed_specs(args.feed)
+        except ValueError as e:
+            parser.error(str(e))
+        run_portfolio(config, feeds, fast_mode=is_fast, journal=args.journal, contracts=contracts, **report_options)
+        return
+    
+    from .runner import run_simulation
+    try:
+        run_simulation(config, fast_mode=is_fast, csv_path=args.csv, engine=args.engine,
+                       profile=args.profile, profile_out=args.profile_json, bars=args.bars,
+                       checkpoint=args.checkpoint, checkpoint_every=args.checkpoint_every,
+                       journal=args.journal, analytics_out=args.analytics, daily_out=args.daily_out,
+                       trade_log=args.trade_log, digest=args.digest, **report_options)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+def _grid_configs(args):
+    from .sweep import parse_grid, build_grid
+    
+    base = BotConfig(
+        symbol=args.symbol,
+        qty=args.qty,
+        sl_pct=0.0,
+        tp_pct=0.0,
+        allow_short=args.allow_short,
         initial_cash=args.initial_cash,
+        **_order_options(args)
+    )
+    configs = build_grid(
+        base,
+        parse_grid(args.fast_ma, int),
+        parse_grid(args.slow_ma, int),
+        parse_grid(args.sl_pct),
+        parse_grid(args.tp_pct)
+    )
+    if not configs:
+        raise SystemExit("Sweep grid is empty (every fast MA >= slow MA?)")
+    return configs
+
+def run_sweep_command(args):
+    from pathlib import Path
+    from .data import load_price_arrays
+    from .sweep import run_sweep, print_results, write_results_csv
+    
+    configs = _grid_configs(args)
+    # Parse the CSV once; every config reuses the same arrays
+    timestamps, prices = load_price_arrays(Path(args.csv or "data/sample_prices.csv"))
+    results = run_sweep(configs, timestamps, prices, workers=args.workers, rank_by=args.rank_by)
+    
+    print_results(results, top=args.top)
+    if args.output:
+        write_results_csv(results, args.output)
+
+def run_walk_forward_command(args):
+    from pathlib import Path
+    from .data import load_price_arrays
+    from .metrics import MetricsAccumulator
+    from .report import print_report
+    from .walkforward import run_walk_forward, print_folds, write_folds_csv
+    
+    configs = _grid_configs(args)
+    timestamps, prices = load_price_arrays(Path(args.csv or "data/sample_prices.csv"))
+    try:
+        result = run_walk_forward(configs, timestamps, prices, args.train_bars, args.test_bars,
+                                  anchored=args.anchored, workers=args.workers, rank_by=args.rank_by)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    
+    print_folds(result.folds)
+    metrics = MetricsAccumulator(keep_curve=args.equity_out is not None)
+    for trade in result.trades:
+        metrics.record_fill(trade)
+    metrics.update_equity_batch(result.equity_curve)
+    print_report(metrics, result.trades[-5:], args.initial_cash, show_ratios=args.ratios)
+    if args.folds_out:
+        write_folds_csv(result.folds, args.folds_out)
+    if args.equity_out:
+        metrics.write_curve(args.equity_out)
+
+def run_monte_carlo_command(args):
+    import json
+    from pathlib import Path
+    from .data import load_price_arrays
+    from .montecarlo import print_summary, run_monte_carlo, write_paths_csv
+    
+    config = BotConfig(
+        symbol=args.symbol,
+        qty=args.qty,
+        sl_pct=args.sl_pct,
+        tp_pct=args.tp_pct,
+        allow_short=args.allow_short,
         fast_ma=args.fast_ma,
-        slow_ma=args.slow_ma
+        slow_ma=args.slow_ma,
+        **_strategy_options(args),
+        **_limit_options(args),
+        **_order_options(args)
     )
+    timestamps, prices = load_price_arrays(Path(args.csv or "data/sample_prices.csv"))
+    try:
+        result = run_monte_carlo(config, timestamps, prices, paths=args.paths, method=args.method,
+                                 block_size=args.block_size, seed=args.seed, workers=args.workers)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    
+    if args.report == "rich":
+        print_summary(result)
+    elif args.report == "json":
+        print(json.dumps(result.summary()))
+    if args.output:
+        write_paths_csv(result, args.output)
+
+def run_live_command(args):
+    import asyncio
+    from . import live
+    
+    if args.command == "replay-server":
+        try:
+            asyncio.run(live.serve_forever(args.csv, args.host, args.port, args.speed))
+        except KeyboardInterrupt:
+            pass
+        return
+        
+    config = BotConfig(
+        symbol=args.symbol,
+        qty=args.qty,
+        sl_pct=args.sl_pct,
+        tp_pct=args.tp_pct,
+        allow_short=args.allow_short,
+        fast_ma=args.fast_ma,
+        slow_ma=args.slow_ma,
+        **_strategy_options(args),
+        **_limit_options(args),
+        **_order_options(args)
+    )
+    options = dict(policy=args.policy, queue_size=args.queue_size,
+                   checkpoint=args.checkpoint, checkpoint_every=args.checkpoint_every, journal=args.journal,
+                   report=args.report)
+    if args.replay:
+        asyncio.run(live.run_live_replay(config, args.replay, speed=args.speed, **options))
+    else:
+        asyncio.run(live.run_live(config, args.host, args.port, **options))
+
+def run_journal_command(args):
+    import itertools
+    import json
+    from .journal import EVENT_NAMES, iter_journal, load_journal, summarize_journal
+    
+    try:
+        if args.summary:
+            print(json.dumps(summarize_journal(load_journal(args.path)), indent=2))
+            return
+        events = args.events.split(",") if args.events else None
+        unknown = set(events or ()) - set(EVENT_NAMES)
+        if unknown:
+            raise SystemExit(f"Unknown event kinds: {', '.join(sorted(unknown))} (known: {', '.join(EVENT_NAMES)})")
+        for event in itertools.islice(iter_journal(args.path, events), args.limit):
+            print(json.dumps(event))
+    except FileNotFoundError as e:
+        raise SystemExit(str(e))
+
+def run_diff_command(args):
+    import sys
+    from .digest import compare_runs, print_divergence
     
-    run_simulation(config, fast_mode=is_fast, csv_path=args.csv)
+    try:
+        divergence = compare_runs(args.run_a, args.run_b, context=args.context)
+    except (OSError, ValueError) as e:
+        raise SystemExit(str(e))
+    print_divergence(divergence, args.run_a, args.run_b)
+    if divergence is not None:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
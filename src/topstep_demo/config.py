@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Dict, Optional
 
 @dataclass
 class BotConfig:
@@ -14,3 +15,58 @@ class BotConfig:
     initial_cash: float = 100_000.0
     fast_ma: int = 10
     slow_ma: int = 20
+    
+    # Registered strategy name (see strategy.STRATEGIES) and its parameters;
+    # 'ma' uses fast_ma / slow_ma
+    strategy: str = "ma"
+    strategy_params: Dict[str, float] = field(default_factory=dict)
+    
+    # Intrabar SL/TP resolution for OHLC bars:
+    # 'worst' - stop wins when a bar touches both SL and TP
+    # 'best'  - target wins when a bar touches both
+    # 'close' - ignore high/low, check the close only (tick-style)
+    bar_fill: str = "worst"
+    
+    # Account limits (Topstep rules, in account currency; None disables):
+    # max_trailing_drawdown - equity may not fall this far below its intraday
+    #   high-water mark; the threshold stops trailing at initial_cash
+    # daily_loss_limit - max loss from the equity at the start of the trading day
+    # max_contracts - open contracts across all symbols
+    max_trailing_drawdown: Optional[float] = None
+    daily_loss_limit: Optional[float] = None
+    max_contracts: Optional[int] = None
+    trading_day_start_hour: int = 0  # feed clock hour at which a new trading day starts
+    
+    # Order model (see broker.MockBroker):
+    # multiplier - account currency per point and contract (ES: 50)
+    # commission - per contract and fill
+    # tick_size - price grid for fills and resting orders (0 = none)
+    # slippage - market/stop fills: 'none', 'ticks:N' or 'bps:N'
+    multiplier: float = 1.0
+    commission: float = 0.0
+    tick_size: float = 0.0
+    slippage: str = "none"
+    
+    # SL/TP exits:
+    # 'market'  - RiskManager watches each price and exits at market
+    # 'bracket' - resting stop (SL) and limit (TP) orders, one cancels the other
+    exit_orders: str = "market"
+
+# Topstep evaluation presets: account size, trailing max loss, daily loss limit, max contracts
+TOPSTEP_PLANS = {
+    "50k": (50_000.0, 2_000.0, 1_000.0, 5),
+    "100k": (100_000.0, 3_000.0, 2_000.0, 10),
+    "150k": (150_000.0, 4_500.0, 3_000.0, 15),
+}
+
+# Futures contract presets: multiplier (per point), tick size
+CONTRACT_SPECS = {
+    "ES": (50.0, 0.25),
+    "MES": (5.0, 0.25),
+    "NQ": (20.0, 0.25),
+    "MNQ": (2.0, 0.25),
+    "YM": (5.0, 1.0),
+    "RTY": (50.0, 0.1),
+    "CL": (1_000.0, 0.01),
+    "GC": (100.0, 0.1),
+}
@@ -1,49 +1,161 @@
-import csv
 from pathlib import Path
-from typing import Iterator, Tuple, List, Optional
-from datetime import datetime
+from typing import Dict, Iterator, Tuple, Optional
+from operator import itemgetter
+from datetime import datetime, timedelta
+import heapq
+import itertools
 import logging
 
+import numpy as np
+
+from .cache import cache_path_for, open_price_cache, write_price_cache
+
 logger = logging.getLogger("topstep_demo.data")
 
-def load_price_feed(csv_path: Optional[Path] = None) -> Iterator[Tuple[datetime, float]]:
+# Rows converted back to Python objects per step when iterating cached arrays
+_ITER_CHUNK = 65_536
+
+# pandas (and pyarrow, when installed) are only imported to parse a CSV;
+# runs served from the price cache never load them
+_CSV_ENGINE: Optional[str] = None
+
+def _csv_engine() -> str:
+    global _CSV_ENGINE
+    if _CSV_ENGINE is None:
+        try:
+            import pyarrow  # noqa: F401
+            _CSV_ENGINE = "pyarrow"
+        except ImportError:
+            _CSV_ENGINE = "c"
+    return _CSV_ENGINE
+
+def _read_csv_columns(csv_path: Path, price_dtype: str):
+    import pandas as pd
+    engine = _csv_engine()
+    kwargs = {}
+    if engine == "c":
+        # Default C parser is not correctly rounded; match float() exactly
+        kwargs["float_precision"] = "round_trip"
+    return pd.read_csv(
+        csv_path,
+        usecols=["timestamp", "price"],
+        dtype={"timestamp": "string", "price": price_dtype},
+        engine=engine,
+        **kwargs
+    )
+
+def _parse_csv(csv_path: Path) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Load price data from a CSV file or fallback to an in-memory generator.
-    Yields (timestamp, price) tuples.
+    Bulk-parse the CSV into (datetime64[ns], float64) arrays in one pass.
+    Timezone-aware timestamps are normalized to naive UTC. Rows with an
+    unparseable timestamp or price are dropped and reported in one summary.
     """
-    if csv_path and csv_path.exists():
-        logger.info(f"Loading prices from {csv_path}")
-        try:
-            with open(csv_path, 'r', newline='') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Expecting 'timestamp' and 'price' columns
-                    # Assuming timestamp is ISO format or close to it
-                    try:
-                        ts = datetime.fromisoformat(row['timestamp'])
-                        price = float(row['price'])
-                        yield ts, price
-                    except (ValueError, KeyError) as e:
-                        logger.warning(f"Skipping invalid row {row}: {e}")
-            return
-        except Exception as e:
-            logger.error(f"Failed to read CSV: {e}. Falling back to default feed.")
+    import pandas as pd
+    try:
+        df = _read_csv_columns(csv_path, "float64")
+    except ValueError:
+        # Non-numeric prices somewhere: re-read as text and coerce per value
+        df = _read_csv_columns(csv_path, "string")
+        df["price"] = pd.to_numeric(df["price"], errors="coerce")
+        
+    timestamps = pd.to_datetime(df["timestamp"], format="ISO8601", utc=True, errors="coerce")
+    prices = df["price"].to_numpy(dtype=np.float64, na_value=np.nan)
     
+    bad = timestamps.isna().to_numpy() | np.isnan(prices)
+    if bad.any():
+        bad_rows = np.flatnonzero(bad)
+        # +2: one-based line numbers after the header line
+        sample = ", ".join(str(i + 2) for i in bad_rows[:10])
+        more = " ..." if len(bad_rows) > 10 else ""
+        logger.warning(f"Skipped {len(bad_rows)} invalid rows out of {len(prices)} in {csv_path} (lines {sample}{more})")
+        timestamps = timestamps[~bad]
+        prices = prices[~bad]
+        
+    return timestamps.dt.tz_localize(None).to_numpy("datetime64[ns]"), np.ascontiguousarray(prices)
+
+def _fallback_feed() -> Iterator[Tuple[datetime, float]]:
     logger.info("Using default in-memory price feed.")
     # Fallback synthetic data: Simple sine wave + trend or random walk
     # Just a small fixed list for demo if file missing
-    base_price = 4000.0
     start_time = datetime.now()
     # 20 steps of synthetic data
-    import timedelta
-    from datetime import timedelta
-    
     prices = [
-        4000.0, 4005.0, 4010.0, 4008.0, 4012.0, 
+        4000.0, 4005.0, 4010.0, 4008.0, 4012.0,
         4015.0, 4020.0, 4018.0, 4025.0, 4030.0,
         4028.0, 4022.0, 4015.0, 4010.0, 4005.0,
         4000.0, 3995.0, 3990.0, 3985.0, 3980.0
     ]
-    
+
     for i, p in enumerate(prices):
         yield start_time + timedelta(minutes=i), p
+
+def load_price_arrays(csv_path: Optional[Path] = None, use_cache: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Load prices as (timestamps as datetime64[ns], prices as float64) arrays.
+
+    The first load of a CSV writes a columnar binary cache next to it
+    (see cache.py); later loads memory-map that cache without parsing. The
+    cache is rebuilt automatically when the CSV's size or mtime changes.
+    """
+    if csv_path and csv_path.exists():
+        try:
+            cache_path = cache_path_for(csv_path)
+            if use_cache:
+                cached = open_price_cache(cache_path, csv_path)
+                if cached is not None:
+                    logger.info(f"Loading prices from {csv_path} (cached)")
+                    return cached
+
+            logger.info(f"Loading prices from {csv_path}")
+            timestamps, prices = _parse_csv(csv_path)
+            if use_cache:
+                try:
+                    write_price_cache(cache_path, csv_path, timestamps, prices)
+                except OSError as e:
+                    logger.warning(f"Could not write price cache {cache_path}: {e}")
+            return timestamps, prices
+        except Exception as e:
+            logger.error(f"Failed to read CSV: {e}. Falling back to default feed.")
+
+    rows = list(_fallback_feed())
+    return (np.array([ts for ts, _ in rows], dtype="datetime64[ns]"),
+            np.array([p for _, p in rows], dtype=np.float64))
+
+def iter_price_arrays(timestamps: np.ndarray, prices: np.ndarray) -> Iterator[Tuple[datetime, float]]:
+    """Yield (datetime, float) tuples from price arrays, converting a chunk at a time."""
+    for start in range(0, len(prices), _ITER_CHUNK):
+        stop = start + _ITER_CHUNK
+        ts_chunk = timestamps[start:stop].astype("datetime64[us]").tolist()
+        yield from zip(ts_chunk, prices[start:stop].tolist())
+
+def iter_price_signals(timestamps: np.ndarray, prices: np.ndarray,
+                       codes: np.ndarray) -> Iterator[Tuple[datetime, float, int]]:
+    """iter_price_arrays plus each price's signal code, converting a chunk at a time."""
+    for start in range(0, len(prices), _ITER_CHUNK):
+        stop = start + _ITER_CHUNK
+        ts_chunk = timestamps[start:stop].astype("datetime64[us]").tolist()
+        yield from zip(ts_chunk, prices[start:stop].tolist(), codes[start:stop].tolist())
+
+def load_price_feed(csv_path: Optional[Path] = None, start: int = 0) -> Iterator[Tuple[datetime, float]]:
+    """
+    Load price data from a CSV file or fallback to an in-memory generator.
+    Yields (timestamp, price) tuples, beginning at row `start`.
+    """
+    if csv_path and csv_path.exists():
+        timestamps, prices = load_price_arrays(csv_path)
+        yield from iter_price_arrays(timestamps[start:], prices[start:])
+        return
+    yield from itertools.islice(_fallback_feed(), start, None)
+
+def _tag_symbol(symbol: str, feed: Iterator[Tuple[datetime, float]]) -> Iterator[Tuple[datetime, str, float]]:
+    for ts, price in feed:
+        yield ts, symbol, price
+
+def merge_price_feeds(feeds: Dict[str, Iterator[Tuple[datetime, float]]]) -> Iterator[Tuple[datetime, str, float]]:
+    """
+    Stream-merge several per-symbol feeds into one timestamp-ordered feed of
+    (timestamp, symbol, price). Heap-based k-way merge: O(log k) per tick and
+    only one pending tick per feed held in memory. Ties keep the order of `feeds`.
+    """
+    tagged = [_tag_symbol(symbol, feed) for symbol, feed in feeds.items()]
+    return heapq.merge(*tagged, key=itemgetter(0))
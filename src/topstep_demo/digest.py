@@ -0,0 +1,237 @@
+from array import array
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import sys
+
+from .broker import Trade
+
+logger = logging.getLogger("topstep_demo.digest")
+
+DIGEST_VERSION = 1
+TRADE_LOG_FIELDS = ("seq", "timestamp", "symbol", "side", "qty", "price", "realized_pnl", "commission", "order_id")
+_NUMERIC_FIELDS = ("qty", "price", "realized_pnl", "commission")
+EQUITY_BLOCK = 65_536  # bars per equity block hash
+
+def canonical_trade(seq: int, trade: Trade) -> str:
+    """
+    One fill as a canonical trade log line. Floats use repr (shortest exact
+    round trip), so two lines are equal exactly when the fills are.
+    """
+    pnl = "" if trade.realized_pnl is None else repr(trade.realized_pnl)
+    return (f"{seq},{trade.timestamp.isoformat()},{trade.symbol},{trade.side},{trade.qty},"
+            f"{trade.price!r},{pnl},{trade.commission!r},{trade.order_id}\n")
+
+class RunDigest:
+    """
+    Canonical record of a run for regression checks: every fill streamed to
+    an optional trade log, a SHA-256 over the canonical fills, and a SHA-256
+    over the equity after every bar (little-endian float64), also kept per
+    block of EQUITY_BLOCK bars so a divergence can be narrowed down.
+
+    Only data-derived values go in (no wall clock, no paths), so identical
+    fills and equity give an identical digest across runs, machines and the
+    loop and vectorized engines.
+    """
+    def __init__(self, trade_log: Optional[str] = None):
+        self.trade_log = trade_log
+        self._file = None
+        if trade_log:
+            self._file = open(trade_log, "w", newline="")
+            self._file.write(",".join(TRADE_LOG_FIELDS) + "\n")
+        self._trades_hash = hashlib.sha256()
+        self._equity_hash = hashlib.sha256()
+        self._equity = array("d")
+        self.blocks: List[str] = []
+        self.trades = 0
+        self.bars = 0
+        self.final_equity: Optional[float] = None
+
+    def record_fill(self, trade: Trade):
+        self.trades += 1
+        line = canonical_trade(self.trades, trade)
+        self._trades_hash.update(line.encode())
+        if self._file is not None:
+            self._file.write(line)
+
+    def update_equity(self, equity: float):
+        self._equity.append(equity)
+        if len(self._equity) == EQUITY_BLOCK:
+            self._flush_equity()
+
+    def update_equity_batch(self, equity):
+        """A whole equity array; same digest as update_equity per value."""
+        values = equity.tolist() if hasattr(equity, "tolist") else list(equity)
+        start = 0
+        while start < len(values):
+            room = EQUITY_BLOCK - len(self._equity)
+            self._equity.extend(values[start:start + room])
+            start += room
+            if len(self._equity) == EQUITY_BLOCK:
+                self._flush_equity()
+
+    def _flush_equity(self):
+        block = self._equity
+        if not block:
+            return
+        self.final_equity = block[-1]
+        self.bars += len(block)
+        if sys.byteorder != "little":
+            block.byteswap()
+        data = block.tobytes()
+        self._equity_hash.update(data)
+        self.blocks.append(hashlib.sha256(data).hexdigest()[:16])
+        self._equity = array("d")
+
+    def finish(self, path: Optional[str] = None, **meta) -> Dict[str, Any]:
+        """
+        Close the trade log and return the digest (written as JSON to path).
+        meta (e.g. the config) is stored for reference but not hashed.
+        """
+        self._flush_equity()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        trades_sha = self._trades_hash.hexdigest()
+        equity_sha = self._equity_hash.hexdigest()
+        digest = {
+            "version": DIGEST_VERSION,
+            "digest": hashlib.sha256(f"{trades_sha}:{equity_sha}".encode()).hexdigest(),
+            "trades": self.trades,
+            "trades_sha256": trades_sha,
+            "bars": self.bars,
+            "equity_sha256": equity_sha,
+            "final_equity": self.final_equity,
+            "equity_block": EQUITY_BLOCK,
+            "equity_blocks": self.blocks,
+            "trade_log": str(Path(self.trade_log).resolve()) if self.trade_log else None,
+            **meta
+        }
+        if path:
+            with open(path, "w") as f:
+                json.dump(digest, f, indent=2, default=str)
+                f.write("\n")
+        logger.info(f"Run digest {digest['digest'][:16]} | {self.trades} fills | {self.bars} bars")
+        return digest
+
+@dataclass
+class Divergence:
+    """First point where two runs differ."""
+    kind: str                     # 'fill', 'extra_fills', 'equity' or 'digest'
+    message: str
+    seq: Optional[int] = None     # 1-based fill number
+    line: Optional[int] = None    # line number in the trade logs
+    before: List[str] = field(default_factory=list)   # identical lines preceding it
+    left: List[str] = field(default_factory=list)     # diverging line and what follows, run A
+    right: List[str] = field(default_factory=list)    # same for run B
+    fields: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+
+def _lines(path: str) -> Iterator[str]:
+    with open(path, newline="") as f:
+        header = f.readline()
+        if header.rstrip("\r\n").split(",") != list(TRADE_LOG_FIELDS):
+            raise ValueError(f"{path} is not a trade log (expected header {','.join(TRADE_LOG_FIELDS)})")
+        yield from f
+
+def _field_changes(a: str, b: str) -> Dict[str, Tuple[str, str]]:
+    left, right = a.rstrip("\n").split(","), b.rstrip("\n").split(",")
+    changes = {}
+    for name, x, y in zip(TRADE_LOG_FIELDS, left, right):
+        if x != y:
+            changes[name] = (x, y)
+    return changes
+
+def diff_trade_logs(path_a: str, path_b: str, context: int = 3) -> Optional[Divergence]:
+    """
+    Stream two trade logs and return the first diverging fill with `context`
+    lines around it, or None if they are identical. Memory is O(context)
+    whatever the log length.
+    """
+    before = deque(maxlen=context)
+    lines_a, lines_b = _lines(path_a), _lines(path_b)
+    seq = 0
+    for a in lines_a:
+        b = next(lines_b, None)
+        seq += 1
+        if b is None:
+            return Divergence("extra_fills", f"Run A has more fills: B ends after {seq - 1}", seq=seq,
+                              line=seq + 1, before=list(before), left=[a, *islice(lines_a, context)])
+        if a != b:
+            changes = _field_changes(a, b)
+            names = ", ".join(changes) or "formatting"
+            return Divergence("fill", f"Fill #{seq} differs in {names}", seq=seq, line=seq + 1,
+                              before=list(before), left=[a, *islice(lines_a, context)],
+                              right=[b, *islice(lines_b, context)], fields=changes)
+        before.append(a)
+    b = next(lines_b, None)
+    if b is not None:
+        seq += 1
+        return Divergence("extra_fills", f"Run B has more fills: A ends after {seq - 1}", seq=seq,
+                          line=seq + 1, before=list(before), right=[b, *islice(lines_b, context)])
+    return None
+
+def load_digest(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        digest = json.load(f)
+    if digest.get("version") != DIGEST_VERSION:
+        raise ValueError(f"{path} is not a version {DIGEST_VERSION} run digest")
+    return digest
+
+def _is_digest(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(1) == b"{"
+
+def compare_runs(path_a: str, path_b: str, context: int = 3) -> Optional[Divergence]:
+    """
+    Compare two runs given as trade logs or digests. Digests are checked
+    first; when the fills differ and both name a readable trade log, the
+    logs are streamed to locate the first diverging fill.
+    """
+    if not (_is_digest(path_a) and _is_digest(path_b)):
+        if _is_digest(path_a) != _is_digest(path_b):
+            raise ValueError("Compare two trade logs or two digests, not one of each")
+        return diff_trade_logs(path_a, path_b, context=context)
+
+    a, b = load_digest(path_a), load_digest(path_b)
+    if a["digest"] == b["digest"]:
+        return None
+    if a["trades_sha256"] != b["trades_sha256"]:
+        logs = a.get("trade_log"), b.get("trade_log")
+        if all(logs) and all(Path(p).exists() for p in logs):
+            divergence = diff_trade_logs(*logs, context=context)
+            if divergence is not None:
+                return divergence
+        return Divergence("digest", f"Fills differ ({a['trades']} vs {b['trades']} fills); "
+                                    f"write --trade-log on both runs to locate the first one")
+    # Same fills, different marks: name the first equity block that differs
+    for i, (x, y) in enumerate(zip(a["equity_blocks"], b["equity_blocks"])):
+        if x != y:
+            start = i * a["equity_block"]
+            return Divergence("equity", f"Fills match but equity differs in bars "
+                                        f"{start}-{start + a['equity_block'] - 1}")
+    return Divergence("equity", f"Fills match but the runs cover {a['bars']} vs {b['bars']} bars")
+
+def print_divergence(divergence: Optional[Divergence], name_a: str = "A", name_b: str = "B"):
+    """Unified-diff style report: shared context, then each run's diverging lines."""
+    if divergence is None:
+        print("Runs are identical")
+        return
+    print(divergence.message)
+    if divergence.line is not None:
+        print(f"--- {name_a}\n+++ {name_b}\n@@ line {divergence.line} (fill #{divergence.seq}) @@")
+    for line in divergence.before:
+        print(f"  {line.rstrip()}")
+    for line in divergence.left:
+        print(f"- {line.rstrip()}")
+    for line in divergence.right:
+        print(f"+ {line.rstrip()}")
+    for name, (x, y) in divergence.fields.items():
+        delta = ""
+        if name in _NUMERIC_FIELDS and x and y:
+            delta = f" ({float(y) - float(x):+g})"
+        print(f"  {name}: {x or '-'} -> {y or '-'}{delta}")
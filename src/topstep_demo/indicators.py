@@ -0,0 +1,516 @@
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+import hashlib
+import logging
+import math
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger("topstep_demo.indicators")
+
+# Incremental indicators: one instance per (kind, params) in an IndicatorEngine,
+# updated once per tick and read by every strategy that requested it. Each
+# kind's array function does the same float operations, so per-tick values and
+# bulk arrays agree exactly. Values are None (NaN in arrays) until warmed up.
+
+class _PrefixSums:
+    """
+    Compensated running sums of price (and, once a StdDev asks, price
+    squared) with the last `depth` prefixes kept, shared by every window
+    mean. Same float operations as vectorized._compensated_prefix_sums.
+    """
+    __slots__ = ("sums", "errs", "total", "err", "sq_sums", "sq_errs", "sq_total", "sq_err", "count")
+
+    def __init__(self, depth: int = 1):
+        self.sums = deque([0.0], maxlen=depth + 1)
+        self.errs = deque([0.0], maxlen=depth + 1)
+        self.total = 0.0
+        self.err = 0.0
+        self.sq_sums: Optional[deque] = None
+        self.sq_errs: Optional[deque] = None
+        self.sq_total = 0.0
+        self.sq_err = 0.0
+        self.count = 0
+
+    def grow(self, depth: int, squares: bool = False):
+        if depth + 1 > self.sums.maxlen:
+            self.sums = deque(self.sums, maxlen=depth + 1)
+            self.errs = deque(self.errs, maxlen=depth + 1)
+            if self.sq_sums is not None:
+                self.sq_sums = deque(self.sq_sums, maxlen=depth + 1)
+                self.sq_errs = deque(self.sq_errs, maxlen=depth + 1)
+        if squares and self.sq_sums is None:
+            self.sq_sums = deque([0.0], maxlen=self.sums.maxlen)
+            self.sq_errs = deque([0.0], maxlen=self.sums.maxlen)
+
+    def update(self, price: float):
+        total = self.total + price
+        b = total - self.total
+        self.err += (self.total - (total - b)) + (price - b)
+        self.total = total
+        self.sums.append(total)
+        self.errs.append(self.err)
+        if self.sq_sums is not None:
+            value = price * price
+            total = self.sq_total + value
+            b = total - self.sq_total
+            self.sq_err += (self.sq_total - (total - b)) + (value - b)
+            self.sq_total = total
+            self.sq_sums.append(total)
+            self.sq_errs.append(self.sq_err)
+        self.count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        squares = self.sq_sums is not None
+        return {"sums": list(self.sums), "errs": list(self.errs), "total": self.total, "err": self.err,
+                "sq_sums": list(self.sq_sums) if squares else None,
+                "sq_errs": list(self.sq_errs) if squares else None,
+                "sq_total": self.sq_total, "sq_err": self.sq_err, "count": self.count}
+
+    def restore(self, state: Dict[str, Any]):
+        if (state["sq_sums"] is None) != (self.sq_sums is None):
+            raise ValueError("Indicator state was saved with different indicator requests")
+        for name in ("sums", "errs", "sq_sums", "sq_errs"):
+            if state[name] is not None:
+                values = getattr(self, name)
+                values.clear()
+                values.extend(state[name])
+        self.total, self.err, self.count = state["total"], state["err"], state["count"]
+        self.sq_total, self.sq_err = state["sq_total"], state["sq_err"]
+
+class SMA:
+    """Mean of the last `window` prices (current included), read from the shared prefix sums."""
+    __slots__ = ("window", "_sums")
+    eager = False
+
+    def __init__(self, engine: "IndicatorEngine", window: int):
+        if window < 1:
+            raise ValueError("SMA window must be at least 1")
+        self.window = window
+        self._sums = engine._prefix(window)
+
+    @property
+    def value(self) -> Optional[float]:
+        prefix, w = self._sums, self.window
+        if prefix.count < w:
+            return None
+        sums, errs = prefix.sums, prefix.errs
+        return ((sums[-1] - sums[-1 - w]) + (errs[-1] - errs[-1 - w])) / w
+
+    @staticmethod
+    def array(engine: "IndicatorEngine", prices: np.ndarray, key: str, window: int) -> np.ndarray:
+        import numpy as np
+        sums, errs = engine.array("prefix", prices, key=key)
+        out = np.full(len(prices), np.nan)
+        if len(prices) >= window:
+            hi, lo = slice(window, len(prices) + 1), slice(0, len(prices) + 1 - window)
+            out[window - 1:] = ((sums[hi] - sums[lo]) + (errs[hi] - errs[lo])) / window
+        return out
+
+class StdDev:
+    """
+    Population standard deviation of the last `window` prices, as
+    sqrt(E[x^2] - mean^2) from the shared prefix sums (negative rounding clamped to 0).
+    """
+    __slots__ = ("window", "_sums")
+    eager = False
+
+    def __init__(self, engine: "IndicatorEngine", window: int):
+        if window < 1:
+            raise ValueError("StdDev window must be at least 1")
+        self.window = window
+        self._sums = engine._prefix(window, squares=True)
+
+    @property
+    def value(self) -> Optional[float]:
+        prefix, w = self._sums, self.window
+        if prefix.count < w:
+            return None
+        sums, errs, sq_sums, sq_errs = prefix.sums, prefix.errs, prefix.sq_sums, prefix.sq_errs
+        mean = ((sums[-1] - sums[-1 - w]) + (errs[-1] - errs[-1 - w])) / w
+        var = ((sq_sums[-1] - sq_sums[-1 - w]) + (sq_errs[-1] - sq_errs[-1 - w])) / w - mean * mean
+        return math.sqrt(var if var > 0.0 else 0.0)
+
+    @staticmethod
+    def array(engine: "IndicatorEngine", prices: np.ndarray, key: str, window: int) -> np.ndarray:
+        import numpy as np
+        n, w = len(prices), window
+        out = np.full(n, np.nan)
+        if n >= w:
+            sums, errs = engine.array("prefix", prices, key=key)
+            sq_sums, sq_errs = engine.array("prefix", prices, key=key, square=True)
+            hi, lo = slice(w, n + 1), slice(0, n + 1 - w)
+            mean = ((sums[hi] - sums[lo]) + (errs[hi] - errs[lo])) / w
+            var = ((sq_sums[hi] - sq_sums[lo]) + (sq_errs[hi] - sq_errs[lo])) / w - mean * mean
+            out[w - 1:] = np.sqrt(np.maximum(var, 0.0))
+        return out
+
+class EMA:
+    """Exponential MA with alpha = 2 / (period + 1), starting at the first price."""
+    __slots__ = ("period", "_alpha", "value", "count")
+    eager = True
+
+    def __init__(self, engine: "IndicatorEngine", period: int):
+        if period < 1:
+            raise ValueError("EMA period must be at least 1")
+        self.period = period
+        self._alpha = 2.0 / (period + 1)
+        self.value: Optional[float] = None
+        self.count = 0
+
+    def update(self, price: float):
+        value = self.value
+        self.value = price if value is None else value + self._alpha * (price - value)
+        self.count += 1
+
+    @staticmethod
+    def array(engine: "IndicatorEngine", prices: np.ndarray, key: str, period: int) -> np.ndarray:
+        # A recurrence with no exact closed form in array ops: one tight loop
+        import numpy as np
+        values = prices.tolist()
+        out = [0.0] * len(values)
+        if values:
+            alpha = 2.0 / (period + 1)
+            ema = out[0] = values[0]
+            for i in range(1, len(values)):
+                ema = ema + alpha * (values[i] - ema)
+                out[i] = ema
+        return np.array(out, dtype=np.float64)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"value": self.value, "count": self.count}
+
+    def restore(self, state: Dict[str, Any]):
+        self.value, self.count = state["value"], state["count"]
+
+class RSI:
+    """
+    Wilder RSI. Averages are seeded with the mean of the first `period` price
+    changes, then smoothed with (period - 1) / period.
+    """
+    __slots__ = ("period", "value", "count", "_last_price", "_changes", "_avg_gain", "_avg_loss")
+    eager = True
+
+    def __init__(self, engine: "IndicatorEngine", period: int):
+        if period < 1:
+            raise ValueError("RSI period must be at least 1")
+        self.period = period
+        self.value: Optional[float] = None
+        self.count = 0
+        self._last_price: Optional[float] = None
+        self._changes = 0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+
+    def update(self, price: float):
+        last = self._last_price
+        self._last_price = price
+        self.count += 1
+        if last is None:
+            return
+        change = price - last
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        self._changes += 1
+        n = self.period
+        if self._changes <= n:
+            # Seed: accumulate sums, divide once the first period is complete
+            self._avg_gain += gain
+            self._avg_loss += loss
+            if self._changes < n:
+                return
+            self._avg_gain /= n
+            self._avg_loss /= n
+        else:
+            self._avg_gain = (self._avg_gain * (n - 1) + gain) / n
+            self._avg_loss = (self._avg_loss * (n - 1) + loss) / n
+        self.value = 100.0 if self._avg_loss == 0 else 100.0 - 100.0 / (1.0 + self._avg_gain / self._avg_loss)
+
+    @staticmethod
+    def array(engine: "IndicatorEngine", prices: np.ndarray, key: str, period: int) -> np.ndarray:
+        import numpy as np
+        values = prices.tolist()
+        n = period
+        out = [math.nan] * len(values)
+        avg_gain = avg_loss = 0.0
+        for i in range(1, len(values)):
+            change = values[i] - values[i - 1]
+            gain = change if change > 0 else 0.0
+            loss = -change if change < 0 else 0.0
+            if i <= n:
+                avg_gain += gain
+                avg_loss += loss
+                if i < n:
+                    continue
+                avg_gain /= n
+                avg_loss /= n
+            else:
+                avg_gain = (avg_gain * (n - 1) + gain) / n
+                avg_loss = (avg_loss * (n - 1) + loss) / n
+            out[i] = 100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        return np.array(out, dtype=np.float64)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"value": self.value, "count": self.count, "last_price": self._last_price,
+                "changes": self._changes, "avg_gain": self._avg_gain, "avg_loss": self._avg_loss}
+
+    def restore(self, state: Dict[str, Any]):
+        self.value, self.count = state["value"], state["count"]
+        self._last_price, self._changes = state["last_price"], state["changes"]
+        self._avg_gain, self._avg_loss = state["avg_gain"], state["avg_loss"]
+
+class Channel:
+    """
+    Highest (upper) and lowest (lower) of the `window` prices before the
+    current one: the Donchian channel the current price is compared against.
+    Monotonic deques, O(1) amortized per tick.
+    """
+    __slots__ = ("window", "upper", "lower", "count", "_highs", "_lows")
+    eager = True
+
+    def __init__(self, engine: "IndicatorEngine", window: int):
+        if window < 1:
+            raise ValueError("Channel window must be at least 1")
+        self.window = window
+        self.upper: Optional[float] = None
+        self.lower: Optional[float] = None
+        self.count = 0
+        self._highs = deque()  # (index, price), prices decreasing
+        self._lows = deque()   # (index, price), prices increasing
+
+    def update(self, price: float):
+        i = self.count
+        self.count += 1
+        highs, lows = self._highs, self._lows
+        if i >= self.window:
+            self.upper = highs[0][1]
+            self.lower = lows[0][1]
+        while highs and highs[-1][1] <= price:
+            highs.pop()
+        highs.append((i, price))
+        while lows and lows[-1][1] >= price:
+            lows.pop()
+        lows.append((i, price))
+        expired = i - self.window + 1
+        if highs[0][0] < expired:
+            highs.popleft()
+        if lows[0][0] < expired:
+            lows.popleft()
+
+    @staticmethod
+    def array(engine: "IndicatorEngine", prices: np.ndarray, key: str, window: int):
+        """(upper, lower) arrays."""
+        import numpy as np
+        import pandas as pd
+        n, w = len(prices), window
+        upper, lower = np.full(n, np.nan), np.full(n, np.nan)
+        if n > w:
+            # Rolling max/min over the w prices ending at each index (O(n));
+            # the channel for price i is the one ending at i - 1
+            rolling = pd.Series(prices).rolling(w)
+            upper[w:] = rolling.max().to_numpy()[w - 1:n - 1]
+            lower[w:] = rolling.min().to_numpy()[w - 1:n - 1]
+        return upper, lower
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"upper": self.upper, "lower": self.lower, "count": self.count,
+                "highs": list(self._highs), "lows": list(self._lows)}
+
+    def restore(self, state: Dict[str, Any]):
+        self.upper, self.lower, self.count = state["upper"], state["lower"], state["count"]
+        self._highs = deque(state["highs"])
+        self._lows = deque(state["lows"])
+
+INDICATORS: Dict[str, type] = {
+    "sma": SMA,
+    "std": StdDev,
+    "ema": EMA,
+    "rsi": RSI,
+    "channel": Channel
+}
+
+def _prefix_array(engine: "IndicatorEngine", prices: np.ndarray, key: str, square: bool = False):
+    """(sums, errs) of vectorized._compensated_prefix_sums over prices or their squares."""
+    from .vectorized import _compensated_prefix_sums
+    return _compensated_prefix_sums(prices * prices if square else prices)
+
+def fingerprint(prices: np.ndarray) -> str:
+    """Content hash of a price array (dtype, length and bytes), the data part of array cache keys."""
+    import numpy as np
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    digest = hashlib.blake2b(prices.data, digest_size=16)
+    digest.update(len(prices).to_bytes(8, "little"))
+    return digest.hexdigest()
+
+def _nbytes(value) -> int:
+    if isinstance(value, tuple):
+        return sum(_nbytes(v) for v in value)
+    return getattr(value, "nbytes", 0)
+
+class ArrayCache:
+    """
+    Bounded LRU of full indicator arrays keyed by (data fingerprint, kind,
+    params). Arrays are stored read-only and shared with every caller.
+    """
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute(self, key: Tuple, compute: Callable[[], Any]):
+        entries = self._entries
+        value = entries.get(key)
+        if value is not None:
+            entries.move_to_end(key)
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = compute()
+        for array in (value if isinstance(value, tuple) else (value,)):
+            array.flags.writeable = False
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return value  # would evict everything else; hand it out uncached
+        entries[key] = value
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, evicted = entries.popitem(last=False)
+            self.nbytes -= _nbytes(evicted)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+# Process-wide cache used by strategies' batch on_prices, so parameter variants
+# over the same data (sweeps, walk-forward folds) share their indicator arrays
+ARRAY_CACHE = ArrayCache()
+
+class IndicatorEngine:
+    """
+    Central, shared indicators. Strategies request indicators by kind and
+    parameters; identical requests get the same instance, so each unique
+    indicator is computed once per tick however many strategies read it.
+    Window means (sma, std) share one prefix-sum stream, so any number of
+    windows costs one compensated addition per tick plus an O(1) read.
+
+    update(price) must be called once per tick, before the strategies read
+    values. Requests are only accepted before the first tick, so every
+    indicator sees the whole stream.
+
+    array() evaluates an indicator over a whole price array for batch
+    backtests, through the bounded LRU `arrays` cache (ARRAY_CACHE by default).
+    """
+    def __init__(self, arrays: Optional[ArrayCache] = None):
+        self.arrays = ARRAY_CACHE if arrays is None else arrays
+        self._indicators: Dict[Tuple, Any] = {}
+        self._prefix_sums: Optional[_PrefixSums] = None
+        self._updates: List[Callable[[float], None]] = []
+
+    def _prefix(self, depth: int, squares: bool = False) -> _PrefixSums:
+        prefix = self._prefix_sums
+        if prefix is None:
+            prefix = self._prefix_sums = _PrefixSums(depth)
+            self._updates.insert(0, prefix.update)
+            self._compile()
+        prefix.grow(depth, squares)
+        return prefix
+
+    def request(self, kind: str, **params):
+        """The shared indicator instance for kind ('sma', 'std', 'ema', 'rsi', 'channel') and params."""
+        cls = INDICATORS.get(kind)
+        if cls is None:
+            raise ValueError(f"Unknown indicator '{kind}' (available: {', '.join(sorted(INDICATORS))})")
+        params = {k: int(v) for k, v in params.items()}
+        key = (kind, tuple(sorted(params.items())))
+        indicator = self._indicators.get(key)
+        if indicator is None:
+            if self.ticks:
+                raise ValueError(f"Indicator {kind}{params} requested after {self.ticks} ticks; "
+                                 f"request every indicator before the first update")
+            try:
+                indicator = cls(self, **params)
+            except TypeError as e:
+                raise ValueError(f"Invalid parameters for indicator '{kind}': {e}")
+            self._indicators[key] = indicator
+            if indicator.eager:
+                self._updates.append(indicator.update)
+                self._compile()
+        return indicator
+
+    def __len__(self) -> int:
+        return len(self._indicators)
+
+    @property
+    def ticks(self) -> int:
+        """Prices seen so far (every stateful indicator sees every price)."""
+        counters = [self._prefix_sums] if self._prefix_sums is not None else []
+        counters += [ind for ind in self._indicators.values() if ind.eager]
+        return counters[0].count if counters else 0
+
+    def _compile(self):
+        # update() is the per-tick hot path: bind it straight to the single
+        # update, or unroll two, instead of looping over a list every tick
+        updates = tuple(self._updates)
+        if len(updates) == 1:
+            self.update = updates[0]
+        elif len(updates) == 2:
+            first, second = updates
+            def update(price: float):
+                first(price)
+                second(price)
+            self.update = update
+        else:
+            def update(price: float):
+                for u in updates:
+                    u(price)
+            self.update = update
+
+    def update(self, price: float):
+        """Advance every indicator by one price (rebound by _compile once anything is requested)."""
+
+    def array(self, kind: str, prices: np.ndarray, key: Optional[str] = None, **params):
+        """
+        Values of an indicator after every price (NaN during warmup),
+        computed once per (data, kind, params) and served read-only from the
+        LRU cache afterwards. key is the data's fingerprint(); pass it when
+        requesting several arrays for the same prices to hash them only once.
+        """
+        import numpy as np
+        prices = np.ascontiguousarray(prices, dtype=np.float64)
+        key = fingerprint(prices) if key is None else key
+        if kind == "prefix":
+            compute = _prefix_array
+        else:
+            cls = INDICATORS.get(kind)
+            if cls is None:
+                raise ValueError(f"Unknown indicator '{kind}' (available: {', '.join(sorted(INDICATORS))})")
+            compute = cls.array
+            params = {k: int(v) for k, v in params.items()}
+        cache_key = (key, kind, tuple(sorted(params.items())))
+        return self.arrays.get_or_compute(cache_key, lambda: compute(self, prices, key, **params))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State of every indicator (checkpoints); restore into an engine with the same requests."""
+        prefix = self._prefix_sums
+        return {
+            "prefix_sums": None if prefix is None else prefix.snapshot(),
+            "indicators": {key: ind.snapshot() for key, ind in self._indicators.items() if ind.eager}
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        eager = {key for key, ind in self._indicators.items() if ind.eager}
+        if (state["prefix_sums"] is None) != (self._prefix_sums is None) or set(state["indicators"]) != eager:
+            raise ValueError("Indicator state was saved with different indicator requests")
+        if state["prefix_sums"] is not None:
+            self._prefix_sums.restore(state["prefix_sums"])
+        for key, ind_state in state["indicators"].items():
+            self._indicators[key].restore(ind_state)
@@ -0,0 +1,325 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import json
+import logging
+import math
+import struct
+import threading
+import time
+
+from .broker import _EPOCH, _NO_TS, _ONE_US
+
+logger = logging.getLogger("topstep_demo.journal")
+
+# Event kinds
+SIGNAL, FILL, REJECT, EXIT, BREACH, ORDER, CANCEL = range(7)
+EVENT_NAMES = ("signal", "fill", "reject", "exit", "breach", "order", "cancel")
+# Meaning of the numeric `value` field per kind (omitted from JSON when unused)
+VALUE_FIELDS = ("", "pnl", "", "level", "equity", "", "")
+# Reasons: strategy exits, rejections, limit breaches and resting order types;
+# binary journals store the index
+REASONS = ("", "stop", "target", "no_position", "net_short", "drawdown", "daily_loss", "limit")
+_REASON_CODES = {name: code for code, name in enumerate(REASONS)}
+_SIDE_CODES = {"": 0, "BUY": 1, "SELL": -1}
+_SIDE_NAMES = {0: "", 1: "BUY", -1: "SELL"}
+
+# Binary layout: 8-byte magic, then fixed 56-byte little-endian records
+BINARY_MAGIC = b"TSJRNL01"
+_RECORD = struct.Struct("<BbBxiqddq16s")  # kind, side, reason, qty, ts (epoch us), price, value, order, symbol
+RECORD_FIELDS = ("kind", "side", "reason", "qty", "ts", "price", "value", "order", "symbol")
+
+def record_dtype():
+    """NumPy structured dtype matching the binary record layout."""
+    import numpy as np
+    return np.dtype({
+        "names": list(RECORD_FIELDS),
+        "formats": ["u1", "i1", "u1", "<i4", "<i8", "<f8", "<f8", "<i8", "S16"],
+        "offsets": [0, 1, 2, 4, 8, 16, 24, 32, 40],
+        "itemsize": _RECORD.size
+    })
+
+def _epoch_us(timestamp) -> int:
+    if type(timestamp) is datetime and timestamp.tzinfo is None:
+        return (timestamp - _EPOCH) // _ONE_US
+    if isinstance(timestamp, datetime):
+        return (timestamp.replace(tzinfo=None) - _EPOCH - timestamp.utcoffset()) // _ONE_US
+    return _NO_TS
+
+class EventJournal:
+    """
+    Append-only journal of typed trading events (signals, fills, rejections,
+    SL/TP exits, limit breaches, resting orders), written by a background
+    thread so the tick loop never waits on I/O.
+
+    record() stores a tuple in a preallocated ring of `capacity` slots and
+    advances a counter; the writer thread drains everything between its own
+    counter and that one in batches (woken every `batch` records or every
+    `flush_interval` seconds) and encodes it as JSON lines or fixed-size
+    binary records (see BINARY_MAGIC). When the ring is full, record() waits
+    for the writer (block=True) or drops the event and counts it.
+
+    The format follows the file suffix ('.bin' / '.tsj' -> binary, otherwise
+    JSON lines) unless fmt is given.
+    """
+    def __init__(self, path: str, fmt: Optional[str] = None, capacity: int = 65_536, batch: int = 4_096,
+                 flush_interval: float = 0.2, block: bool = True, append: bool = False):
+        if fmt is None:
+            fmt = "binary" if Path(path).suffix in (".bin", ".tsj") else "jsonl"
+        if fmt not in ("jsonl", "binary"):
+            raise ValueError(f"Unknown journal format: {fmt}")
+        if capacity < 1 or not 1 <= batch <= capacity:
+            raise ValueError("Journal needs capacity >= batch >= 1")
+        self.path = Path(path)
+        self.fmt = fmt
+        self.capacity = capacity
+        self.batch = batch
+        self.flush_interval = flush_interval
+        self.block = block
+
+        self._ring: List[Optional[tuple]] = [None] * capacity
+        self._head = 0  # records handed in by record()
+        self._tail = 0  # records taken by the writer
+        self.written = 0
+        self.dropped = 0
+        self.stalls = 0
+        self._closed = False
+        self._error: Optional[BaseException] = None
+
+        self._file = open(self.path, "ab" if append else "wb")
+        if fmt == "binary" and self._file.tell() == 0:
+            self._file.write(BINARY_MAGIC)
+        self._encode = self._encode_binary if fmt == "binary" else self._encode_jsonl
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, kind: int, timestamp, symbol: str, side: str = "", qty: int = 0,
+               price: float = math.nan, value: float = math.nan, order: int = 0, reason: str = ""):
+        head = self._head
+        if head - self._tail >= self.capacity and not self._make_room():
+            return
+        self._ring[head % self.capacity] = (kind, timestamp, symbol, side, qty, price, value, order, reason)
+        self._head = head + 1
+        if head + 1 - self._tail >= self.batch and not self._wake.is_set():
+            self._wake.set()
+
+    # Typed helpers used by the engine components
+
+    def signal(self, timestamp, symbol: str, side: str, price: float):
+        self.record(SIGNAL, timestamp, symbol, side, 0, price)
+
+    def fill(self, timestamp, symbol: str, side: str, qty: int, price: float,
+             pnl: Optional[float], order: int):
+        self.record(FILL, timestamp, symbol, side, qty, price, math.nan if pnl is None else pnl, order)
+
+    def reject(self, timestamp, symbol: str, side: str, qty: int, price: float, reason: str):
+        self.record(REJECT, timestamp, symbol, side, qty, price, math.nan, 0, reason)
+
+    def exit(self, timestamp, symbol: str, side: str, price: float, level: float, reason: str):
+        self.record(EXIT, timestamp, symbol, side, 0, price, level, 0, reason)
+
+    def breach(self, timestamp, equity: float, reason: str):
+        self.record(BREACH, timestamp, "", "", 0, math.nan, equity, 0, reason)
+
+    def order(self, timestamp, symbol: str, side: str, qty: int, price: float, order: int, kind: str):
+        self.record(ORDER, timestamp, symbol, side, qty, price, math.nan, order, kind.lower())
+
+    def cancel(self, timestamp, symbol: str, order: int):
+        self.record(CANCEL, timestamp, symbol, "", 0, math.nan, math.nan, order)
+
+    def _make_room(self) -> bool:
+        if not self.block or self._error is not None:
+            self.dropped += 1
+            return False
+        self.stalls += 1
+        self._wake.set()
+        while self._head - self._tail >= self.capacity and self._thread.is_alive():
+            time.sleep(0)
+        if self._head - self._tail >= self.capacity:
+            self.dropped += 1
+            return False
+        return True
+
+    def _run(self):
+        try:
+            while True:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                done = self._closed
+                self._drain()
+                if done:
+                    break
+        except BaseException as e:  # surfaced by close()
+            self._error = e
+            logger.error(f"Journal writer for {self.path} failed: {e}")
+
+    def _drain(self):
+        head, tail = self._head, self._tail
+        if head == tail:
+            return
+        start, stop = tail % self.capacity, head % self.capacity
+        if start < stop:
+            records = self._ring[start:stop]
+        else:
+            records = self._ring[start:] + self._ring[:stop]
+        # The slots are copied: record() may reuse them from here on
+        self._tail = head
+        self._file.write(self._encode(records))
+        self._file.flush()
+        self.written += len(records)
+
+    @staticmethod
+    def _encode_jsonl(records: List[tuple]) -> bytes:
+        lines = []
+        dumps = json.dumps
+        for kind, timestamp, symbol, side, qty, price, value, order, reason in records:
+            event = {"event": EVENT_NAMES[kind],
+                     "ts": timestamp.isoformat() if isinstance(timestamp, datetime) else str(timestamp),
+                     "symbol": symbol}
+            if side:
+                event["side"] = side
+            if qty:
+                event["qty"] = qty
+            if price == price:
+                event["price"] = price
+            if value == value and VALUE_FIELDS[kind]:
+                event[VALUE_FIELDS[kind]] = value
+            if order:
+                event["order"] = order
+            if reason:
+                event["reason"] = reason
+            lines.append(dumps(event, separators=(",", ":")))
+        lines.append("")
+        return "\n".join(lines).encode()
+
+    @staticmethod
+    def _encode_binary(records: List[tuple]) -> bytes:
+        pack = _RECORD.pack
+        return b"".join(
+            pack(kind, _SIDE_CODES[side], _REASON_CODES[reason], qty, _epoch_us(timestamp),
+                 price, value, order, symbol.encode()[:16])
+            for kind, timestamp, symbol, side, qty, price, value, order, reason in records
+        )
+
+    def flush(self):
+        """Wait until every event recorded so far is written."""
+        target = self._head
+        while self.written < target and self._thread.is_alive():
+            self._wake.set()
+            time.sleep(0.001)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self._file.close()
+        if self._error is not None:
+            raise RuntimeError(f"Journal {self.path} is incomplete") from self._error
+        if self.dropped:
+            logger.warning(f"Journal {self.path}: dropped {self.dropped} events (ring full)")
+        logger.info(f"Journal {self.path}: {self.written} events ({self.fmt}), writer stalls: {self.stalls}")
+
+    def __enter__(self) -> "EventJournal":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _is_binary(path: Path) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+def load_journal(path: str):
+    """
+    The whole journal as a NumPy structured array (see record_dtype). Binary
+    journals are read directly from the file; JSON lines are parsed first.
+    """
+    import numpy as np
+    path = Path(path)
+    dtype = record_dtype()
+    if _is_binary(path):
+        return np.fromfile(path, dtype=dtype, offset=len(BINARY_MAGIC))
+    rows = []
+    kinds = {name: code for code, name in enumerate(EVENT_NAMES)}
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            kind = kinds[event["event"]]
+            value_field = VALUE_FIELDS[kind]
+            rows.append((kind, _SIDE_CODES[event.get("side", "")], _REASON_CODES[event.get("reason", "")],
+                         event.get("qty", 0), _epoch_us(datetime.fromisoformat(event["ts"])),
+                         event.get("price", math.nan), event.get(value_field, math.nan) if value_field else math.nan,
+                         event.get("order", 0), event["symbol"].encode()[:16]))
+    return np.array(rows, dtype=dtype)
+
+def iter_journal(path: str, events: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Replay a journal (either format) as event dicts in the JSON-lines schema,
+    optionally only the named event kinds.
+    """
+    wanted = set(events) if events else None
+    path = Path(path)
+    if not _is_binary(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    event = json.loads(line)
+                    if wanted is None or event["event"] in wanted:
+                        yield event
+        return
+    with open(path, "rb") as f:
+        f.seek(len(BINARY_MAGIC))
+        while True:
+            chunk = f.read(_RECORD.size * 4096)
+            if not chunk:
+                break
+            for kind, side, reason, qty, ts, price, value, order, symbol in _RECORD.iter_unpack(chunk):
+                name = EVENT_NAMES[kind]
+                if wanted is not None and name not in wanted:
+                    continue
+                event = {"event": name,
+                         "ts": (_EPOCH + timedelta(microseconds=ts)).isoformat() if ts != _NO_TS else None,
+                         "symbol": symbol.rstrip(b"\0").decode()}
+                if side:
+                    event["side"] = _SIDE_NAMES[side]
+                if qty:
+                    event["qty"] = qty
+                if price == price:
+                    event["price"] = price
+                if value == value and VALUE_FIELDS[kind]:
+                    event[VALUE_FIELDS[kind]] = value
+                if order:
+                    event["order"] = order
+                if reason:
+                    event["reason"] = REASONS[reason]
+                yield event
+
+def summarize_journal(records) -> Dict[str, Any]:
+    """Event counts, fill statistics and rejection / breach reasons from a load_journal array."""
+    import numpy as np
+    kinds = records["kind"]
+    counts = np.bincount(kinds, minlength=len(EVENT_NAMES))
+    fills = records[kinds == FILL]
+    closed = fills["value"][~np.isnan(fills["value"])]
+    summary: Dict[str, Any] = {
+        "events": int(len(records)),
+        "counts": {name: int(counts[code]) for code, name in enumerate(EVENT_NAMES) if counts[code]},
+        "contracts_traded": int(fills["qty"].sum()),
+        "closing_fills": int(len(closed)),
+        "realized_pnl": float(closed.sum()),
+        "wins": int((closed > 0).sum()),
+        "losses": int((closed < 0).sum()),
+    }
+    for kind in (EXIT, REJECT, BREACH):
+        codes = np.bincount(records["reason"][kinds == kind], minlength=len(REASONS))
+        summary[f"{EVENT_NAMES[kind]}_reasons"] = {REASONS[c]: int(n) for c, n in enumerate(codes) if n}
+    ts = records["ts"][records["ts"] != _NO_TS]
+    if len(ts):
+        summary["first"] = str((_EPOCH + timedelta(microseconds=int(ts.min()))))
+        summary["last"] = str((_EPOCH + timedelta(microseconds=int(ts.max()))))
+    return summary
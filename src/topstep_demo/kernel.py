@@ -0,0 +1,87 @@
+"""
+Account arithmetic shared by every engine: fill prices, position and PnL
+accounting, SL/TP levels and exits, and the account limit floors.
+
+The functions are stateless. They work on one account's plain numbers, as
+MockBroker, RiskManager and AccountLimits call them, and elementwise on
+NumPy arrays with one slot per account, as accounts.AccountBook calls them.
+Formulas that pick between two values take a `where` (or `minimum`): the
+defaults are a Python conditional and min(), AccountBook passes np.where
+and np.minimum. Directions and sides are +1 (long / BUY) and -1 (short /
+SELL).
+"""
+import math
+
+def _pick(condition, a, b):
+    return a if condition else b
+
+def round_to_tick(price: float, tick_size: float, up: bool) -> float:
+    """Round price onto the tick grid, up or down (no-op for tick_size <= 0)."""
+    if tick_size <= 0:
+        return price
+    steps = price / tick_size
+    nearest = round(steps)
+    if abs(steps - nearest) < 1e-9:
+        steps = nearest
+    else:
+        steps = math.ceil(steps) if up else math.floor(steps)
+    return round(steps * tick_size, 10)
+
+def market_fill_price(slippage, tick_size: float, side: str, price: float) -> float:
+    """Price a market (or triggered stop) order: slippage, then the grid, both against the order."""
+    if slippage is not None:
+        price = slippage.apply(side, price)
+    return round_to_tick(price, tick_size, up=side == "BUY")
+
+def apply_fill(cash, position, avg_entry, side, qty, price, multiplier, commission, where=_pick):
+    """
+    Book a fill of qty contracts at price. Returns the account's new
+    (cash, position, avg_entry) and the fill's (realized_pnl, fee);
+    realized_pnl is NaN when the fill closes nothing.
+
+    The part of an opposing position it closes realizes (entry - price) *
+    side per contract and point. Adding to a side averages the entry,
+    flipping resets it to price, and reducing keeps it (also when flat).
+    """
+    held = abs(position)
+    closed = where(held < qty, held, qty)
+    realized_pnl = where(position * side < 0, closed_pnl(avg_entry, price, side, closed, multiplier), math.nan)
+    new_position = position + side * qty
+    total = held * avg_entry + qty * price
+    new_avg = where(position * side >= 0, total / where(new_position != 0, abs(new_position), 1),
+                    where(new_position * side > 0, price, avg_entry))
+    fee = qty * commission
+    new_cash = cash - side * contract_value(qty, price, multiplier) - fee
+    return new_cash, new_position, new_avg, realized_pnl, fee
+
+def contract_value(qty, price, multiplier):
+    """Cash value of qty contracts at price."""
+    return qty * price * multiplier
+
+def closed_pnl(avg_entry, price, side, closed, multiplier):
+    """PnL of a side fill at price closing `closed` contracts of a position entered at avg_entry."""
+    return (avg_entry - price) * side * closed * multiplier
+
+def exit_levels(direction, price, sl_pct, tp_pct):
+    """(stop, target) of a position opened at price."""
+    return price * (1 - direction * sl_pct), price * (1 + direction * tp_pct)
+
+def stop_hit(direction, price, stop):
+    """Whether price reached the stop: at or below it for a long, at or above it for a short."""
+    return (price - stop) * direction <= 0
+
+def target_hit(direction, price, target):
+    """Whether price reached the target: at or above it for a long, at or below it for a short."""
+    return (price - target) * direction >= 0
+
+def trailing_floor(high_water, max_trailing_drawdown, initial_cash, minimum=min):
+    """Equity at which the trailing drawdown fails the account; it never rises above initial_cash."""
+    return minimum(high_water - max_trailing_drawdown, initial_cash)
+
+def daily_floor(day_start_equity, daily_loss_limit):
+    """Equity at which the daily loss limit halts trading for the rest of the day."""
+    return day_start_equity - daily_loss_limit
+
+def within_contract_cap(open_contracts, qty, max_contracts):
+    """Whether opening qty more contracts stays within max_contracts."""
+    return open_contracts + qty <= max_contracts
@@ -0,0 +1,250 @@
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+import asyncio
+import logging
+import time
+
+from .config import BotConfig
+from .broker import MockBroker
+from .strategy import build_strategy
+from .risk import RiskManager
+from .data import load_price_arrays, iter_price_arrays
+from .runner import enforce_limits, process_tick
+from .metrics import MetricsAccumulator
+from .checkpoint import Checkpointer
+from .journal import EventJournal
+from .report import print_report
+from .profiling import LatencyHistogram
+
+logger = logging.getLogger("topstep_demo.live")
+
+# (timestamp, price, receive time from time.perf_counter_ns)
+Tick = Tuple[datetime, float, int]
+
+# ---------------------------------------------------------------------------
+# Replay server: streams a CSV as "iso_timestamp,price\n" lines over TCP
+# ---------------------------------------------------------------------------
+
+async def _stream_prices(writer: asyncio.StreamWriter, csv_path: Path, speed: float):
+    timestamps, prices = load_price_arrays(csv_path)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    first_ts = None
+    sent = 0
+    try:
+        for ts, price in iter_price_arrays(timestamps, prices):
+            if speed > 0:
+                if first_ts is None:
+                    first_ts = ts
+                delay = start + (ts - first_ts).total_seconds() / speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            writer.write(f"{ts.isoformat()},{price!r}\n".encode())
+            sent += 1
+            # drain() only suspends when the client is not keeping up
+            await writer.drain()
+    except (ConnectionResetError, BrokenPipeError):
+        logger.info(f"Replay client disconnected after {sent} ticks")
+    finally:
+        writer.close()
+    logger.info(f"Replay finished: {sent} ticks sent")
+
+async def start_replay_server(csv_path: str, host: str = "127.0.0.1", port: int = 0,
+                              speed: float = 0.0) -> asyncio.AbstractServer:
+    """
+    Serve csv_path to every client that connects. speed is a multiplier of
+    the CSV's own timestamps (60 = one minute of data per second); 0 streams
+    as fast as the client reads.
+    """
+    path = Path(csv_path)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await _stream_prices(writer, path, speed)
+
+    server = await asyncio.start_server(handle, host, port)
+    addr = server.sockets[0].getsockname()
+    logger.info(f"Replay server for {csv_path} on {addr[0]}:{addr[1]} (speed x{speed or 'max'})")
+    return server
+
+# ---------------------------------------------------------------------------
+# Tick buffers between the network reader and the decision loop
+# ---------------------------------------------------------------------------
+
+class ConflatingTickBuffer:
+    """
+    Keeps only the newest unread tick. When the decision loop falls behind,
+    older ticks are dropped (and counted) instead of queueing up.
+    """
+    def __init__(self):
+        self._tick: Optional[Tick] = None
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.dropped = 0
+
+    async def put(self, tick: Tick):
+        if self._tick is not None:
+            self.dropped += 1
+        self._tick = tick
+        self._ready.set()
+
+    async def close(self):
+        self._closed = True
+        self._ready.set()
+
+    async def get(self) -> Optional[Tick]:
+        while self._tick is None:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        tick, self._tick = self._tick, None
+        return tick
+
+class QueueTickBuffer:
+    """
+    Bounded FIFO: every tick is processed, and a full queue stops the reader,
+    which lets TCP flow control push back on the feed.
+    """
+    def __init__(self, maxsize: int = 1024):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    async def put(self, tick: Tick):
+        await self._queue.put(tick)
+
+    async def close(self):
+        await self._queue.put(None)
+
+    async def get(self) -> Optional[Tick]:
+        return await self._queue.get()
+
+async def _read_ticks(reader: asyncio.StreamReader, buffer):
+    async for line in reader:
+        recv_ns = time.perf_counter_ns()
+        ts_s, _, price_s = line.decode().rstrip().partition(",")
+        try:
+            tick = (datetime.fromisoformat(ts_s), float(price_s), recv_ns)
+        except ValueError:
+            logger.warning(f"Ignoring malformed tick line: {line!r}")
+            continue
+        await buffer.put(tick)
+    await buffer.close()
+
+# ---------------------------------------------------------------------------
+# Live runner
+# ---------------------------------------------------------------------------
+
+@dataclass
+class LiveStats:
+    ticks_processed: int
+    ticks_dropped: int
+    # Fixed-size histograms, so a session of any length keeps constant memory
+    order_latency_ns: LatencyHistogram   # tick receipt -> order fill, per fill
+    tick_latency_ns: LatencyHistogram    # tick receipt -> decision done, per tick
+
+    def summary(self) -> str:
+        parts = [f"ticks={self.ticks_processed}", f"conflated={self.ticks_dropped}"]
+        for name, histogram in (("tick->order", self.order_latency_ns), ("tick->decision", self.tick_latency_ns)):
+            parts.append(f"{name} p50={histogram.percentile(50) / 1e3:.1f}us "
+                         f"p99={histogram.percentile(99) / 1e3:.1f}us (n={histogram.count})")
+        return " | ".join(parts)
+
+async def run_live(config: BotConfig, host: str, port: int, policy: str = "conflate",
+                   queue_size: int = 1024, trade_history: Optional[int] = 100,
+                   show_ratios: bool = False, checkpoint: Optional[str] = None,
+                   checkpoint_every: int = 10_000, journal: Optional[str] = None,
+                   report: str = "rich") -> LiveStats:
+    """
+    Consume ticks from a TCP feed and run strategy -> risk -> broker on each
+    without blocking the event loop's network reads. policy='conflate' always
+    acts on the latest tick; policy='queue' processes every tick with
+    backpressure once queue_size ticks are pending.
+
+    checkpoint restores positions, strategy windows and metrics from a state
+    file on start (a live feed has no offset to skip to) and saves them every
+    `checkpoint_every` ticks and on exit. journal records the session's
+    events from a writer thread, off the event loop (see journal.EventJournal).
+    """
+    if policy == "conflate":
+        buffer = ConflatingTickBuffer()
+    elif policy == "queue":
+        buffer = QueueTickBuffer(queue_size)
+    else:
+        raise ValueError(f"Unknown policy: {policy}")
+
+    reader, writer = await asyncio.open_connection(host, port)
+    logger.info(f"Connected to feed {host}:{port} | policy={policy}")
+
+    metrics = MetricsAccumulator()
+    order_latency = LatencyHistogram()
+    tick_latency = LatencyHistogram()
+    current_recv = [0]
+
+    def on_fill(pnl: Optional[float], commission: float):
+        metrics.record(pnl, commission)
+        order_latency.record(time.perf_counter_ns() - current_recv[0])
+
+    event_journal = None
+    if journal:
+        event_journal = EventJournal(journal, append=bool(checkpoint) and Path(checkpoint).exists())
+    broker = MockBroker.from_config(config, max_trades=trade_history, journal=event_journal,
+                                    on_fill_pnl=on_fill)
+    strategy = build_strategy(config)
+    risk_manager = RiskManager(config, broker, journal=event_journal)
+
+    checkpointer = None
+    resumed = 0
+    if checkpoint:
+        checkpointer = Checkpointer(checkpoint, config, strategy, risk_manager, broker, metrics,
+                                    every=checkpoint_every)
+        resumed = checkpointer.resume()
+
+    reader_task = asyncio.create_task(_read_ticks(reader, buffer))
+    processed = 0
+    try:
+        while True:
+            tick = await buffer.get()
+            if tick is None:
+                break
+            timestamp, price, recv_ns = tick
+            current_recv[0] = recv_ns
+            process_tick(config, strategy, risk_manager, broker, timestamp, price)
+            equity = broker.get_cash() + broker.get_position(config.symbol) * price * broker.multiplier
+            if risk_manager.limits is not None:
+                enforce_limits(config, risk_manager, broker, equity, price, timestamp)
+            metrics.update_equity(equity)
+            tick_latency.record(time.perf_counter_ns() - recv_ns)
+            processed += 1
+            if checkpointer is not None:
+                checkpointer.maybe_save(resumed + processed)
+        await reader_task
+    finally:
+        reader_task.cancel()
+        writer.close()
+        if checkpointer is not None:
+            checkpointer.save(resumed + processed)
+        if event_journal is not None:
+            event_journal.close()
+
+    stats = LiveStats(processed, buffer.dropped, order_latency, tick_latency)
+    logger.info(f"Live session finished | {stats.summary()}")
+
+    print_report(metrics, broker.get_trades()[-5:], config.initial_cash, show_ratios=show_ratios, fmt=report)
+    return stats
+
+async def run_live_replay(config: BotConfig, csv_path: str, speed: float = 0.0, **kwargs) -> LiveStats:
+    """Run run_live against an in-process replay server (fully offline)."""
+    server = await start_replay_server(csv_path, "127.0.0.1", 0, speed)
+    host, port = server.sockets[0].getsockname()[:2]
+    try:
+        return await run_live(config, host, port, **kwargs)
+    finally:
+        server.close()
+        await server.wait_closed()
+
+async def serve_forever(csv_path: str, host: str, port: int, speed: float):
+    server = await start_replay_server(csv_path, host, port, speed)
+    async with server:
+        await server.serve_forever()
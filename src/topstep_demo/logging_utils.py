@@ -1,16 +1,37 @@
+from datetime import datetime
+import json
 import logging
 import sys
-from rich.logging import RichHandler
 
-def setup_logging(level: str = "INFO"):
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger and message."""
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            event["exc"] = self.formatException(record.exc_info)
+        return json.dumps(event)
+
+def setup_logging(level: str = "INFO", fmt: str = "rich"):
     """
-    Configure structured logging using RichHandler for clean, professional output.
+    Configure logging: RichHandler for clean, professional console output, or
+    JSON lines on stderr (fmt='json') for machine consumption.
     """
+    if fmt == "json":
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JsonFormatter())
+    else:
+        from rich.logging import RichHandler
+        handler = RichHandler(rich_tracebacks=True, show_path=False)
     logging.basicConfig(
         level=level,
         format="%(message)s",
         datefmt="[%X]",
-        handlers=[RichHandler(rich_tracebacks=True, show_path=False)]
+        handlers=[handler]
     )
 
     # Silence chatty libraries if any added later
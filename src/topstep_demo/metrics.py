@@ -0,0 +1,167 @@
+from array import array
+from typing import Any, Dict, Optional
+import csv
+import math
+
+import numpy as np
+
+from .broker import Trade
+
+_STATE_FIELDS = ("bars", "last_equity", "peak", "max_drawdown",
+                 "total_trades", "wins", "losses", "realized_pnl", "commissions",
+                 "_n_returns", "_mean", "_m2", "_downside_sq")
+
+class MetricsAccumulator:
+    """
+    Online performance metrics, updated once per bar and once per fill in O(1)
+    time and memory: running peak / max drawdown, win/loss counts, realized PnL,
+    commissions, and per-bar return mean/variance (Welford) for Sharpe and
+    Sortino.
+    
+    The equity curve itself is only retained when keep_curve is set, optionally
+    downsampled to every `curve_every`-th bar.
+    """
+    def __init__(self, keep_curve: bool = False, curve_every: int = 1):
+        if curve_every < 1:
+            raise ValueError("curve_every must be >= 1")
+        self.curve: Optional[array] = array("d") if keep_curve else None
+        self.curve_every = curve_every
+        
+        self.bars = 0
+        self.last_equity: Optional[float] = None
+        self.peak = -float('inf')
+        self.max_drawdown = 0.0
+        
+        self.total_trades = 0
+        self.wins = 0
+        self.losses = 0
+        self.realized_pnl = 0.0
+        self.commissions = 0.0
+        
+        # Welford state over per-bar returns
+        self._n_returns = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._downside_sq = 0.0
+
+    def update_equity(self, equity: float):
+        if equity > self.peak:
+            self.peak = equity
+        dd = (self.peak - equity) / self.peak if self.peak > 0 else 0
+        if dd > self.max_drawdown:
+            self.max_drawdown = dd
+            
+        prev = self.last_equity
+        if prev:
+            r = equity / prev - 1.0
+            self._n_returns += 1
+            delta = r - self._mean
+            self._mean += delta / self._n_returns
+            self._m2 += delta * (r - self._mean)
+            if r < 0:
+                self._downside_sq += r * r
+                
+        if self.curve is not None and self.bars % self.curve_every == 0:
+            self.curve.append(equity)
+        self.last_equity = equity
+        self.bars += 1
+
+    def update_equity_batch(self, values):
+        """
+        Vectorized equivalent of calling update_equity for every value, for
+        engines that already hold the equity curve as an array.
+        """
+        eq = np.asarray(values, dtype=np.float64)
+        n = len(eq)
+        if n == 0:
+            return
+            
+        peaks = np.maximum.accumulate(np.concatenate(([self.peak], eq)))[1:]
+        safe_peaks = np.where(peaks > 0, peaks, 1.0)
+        dd = np.where(peaks > 0, (peaks - eq) / safe_peaks, 0.0)
+        self.peak = float(peaks[-1])
+        self.max_drawdown = max(self.max_drawdown, float(dd.max()))
+        
+        prev = np.concatenate(([self.last_equity or 0.0], eq[:-1]))
+        valid = prev != 0
+        returns = eq[valid] / prev[valid] - 1.0
+        if len(returns):
+            # Chan et al. pairwise combination of (n, mean, M2)
+            n_b = len(returns)
+            mean_b = float(returns.mean())
+            m2_b = float(((returns - mean_b) ** 2).sum())
+            n_a = self._n_returns
+            total = n_a + n_b
+            delta = mean_b - self._mean
+            self._mean += delta * n_b / total
+            self._m2 += m2_b + delta * delta * n_a * n_b / total
+            self._n_returns = total
+            downside = returns[returns < 0]
+            self._downside_sq += float((downside * downside).sum())
+            
+        if self.curve is not None:
+            first = (-self.bars) % self.curve_every
+            self.curve.extend(eq[first::self.curve_every].tolist())
+        self.last_equity = float(eq[-1])
+        self.bars += n
+
+    def record_fill(self, trade: Trade):
+        self.record(trade.realized_pnl, trade.commission)
+
+    def record(self, pnl: Optional[float], commission: float):
+        """One fill from its realized PnL (None if it closed nothing) and commission."""
+        self.total_trades += 1
+        if pnl is not None:
+            self.realized_pnl += pnl
+        self.commissions += commission
+        # Same classification as the report: flat (0.0) closes count as neither
+        if pnl and pnl > 0:
+            self.wins += 1
+        elif pnl and pnl <= 0:
+            self.losses += 1
+
+    @property
+    def win_rate(self) -> float:
+        return (self.wins / self.total_trades * 100) if self.total_trades > 0 else 0.0
+
+    def sharpe(self, periods_per_year: Optional[float] = None) -> Optional[float]:
+        """Mean over sample std of per-bar returns, annualized if periods_per_year is given."""
+        if self._n_returns < 2 or self._m2 <= 0:
+            return None
+        ratio = self._mean / math.sqrt(self._m2 / (self._n_returns - 1))
+        return ratio * math.sqrt(periods_per_year) if periods_per_year else ratio
+
+    def sortino(self, periods_per_year: Optional[float] = None) -> Optional[float]:
+        """Mean over downside deviation (target 0) of per-bar returns."""
+        if self._n_returns < 2 or self._downside_sq <= 0:
+            return None
+        ratio = self._mean / math.sqrt(self._downside_sq / self._n_returns)
+        return ratio * math.sqrt(periods_per_year) if periods_per_year else ratio
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All running state; the retained curve (if any) is the only part that grows."""
+        state = {name: getattr(self, name) for name in _STATE_FIELDS}
+        state["curve"] = array("d", self.curve) if self.curve is not None else None
+        state["curve_every"] = self.curve_every
+        return state
+
+    def restore(self, state: Dict[str, Any]):
+        for name in _STATE_FIELDS:
+            setattr(self, name, state[name])
+        curve = state["curve"]
+        if self.curve is not None and curve is not None:
+            self.curve = array("d", curve)
+            self.curve_every = state["curve_every"]
+        elif self.curve is not None:
+            # Resuming with --equity-out after a run that did not keep the curve
+            self.curve = array("d")
+
+    def write_curve(self, path: str):
+        """Write the retained (possibly downsampled) equity curve as bar,equity CSV."""
+        if self.curve is None:
+            raise ValueError("Equity curve was not retained (keep_curve=False)")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["bar", "equity"])
+            for i, equity in enumerate(self.curve):
+                writer.writerow([i * self.curve_every, equity])
@@ -0,0 +1,323 @@
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, Tuple
+import csv
+import itertools
+import logging
+import os
+import time
+
+import numpy as np
+
+from .config import BotConfig
+from .data import _ITER_CHUNK
+from .broker import MockBroker
+from .strategy import SIGNAL_NAMES, build_strategy
+from .risk import AccountLimits, RiskManager
+from .runner import enforce_limits, process_signal, process_tick
+from .sweep import _attach, _release, _share_arrays, _shared
+
+logger = logging.getLogger("topstep_demo.montecarlo")
+
+METHODS = ("bootstrap", "trades")
+# Per-path outcome columns
+PATH_FIELDS = ("pnl", "max_drawdown", "max_drawdown_abs", "fills", "failed", "day_halts")
+_COUNT_FIELDS = ("fills", "failed", "day_halts")
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+# Per-order/per-fill INFO logs: thousands per path, so path runs keep only warnings
+_FILL_LOGGERS = ("topstep_demo.broker", "topstep_demo.risk", "topstep_demo.runner")
+
+@dataclass
+class MonteCarloResult:
+    method: str
+    paths: Dict[str, np.ndarray]  # PATH_FIELDS -> one value per path
+    initial_cash: float
+    limits: bool  # whether account limits were evaluated
+    seed: int
+    elapsed: float = 0.0
+    base: Dict[str, float] = field(default_factory=dict)  # the original series' outcome (closed trades for 'trades')
+
+    def summary(self) -> Dict[str, Any]:
+        """Distribution percentiles of PnL and drawdown, and breach probabilities."""
+        pnl = self.paths["pnl"]
+        dd = self.paths["max_drawdown_abs"]
+        n = len(pnl)
+        summary: Dict[str, Any] = {
+            "method": self.method,
+            "paths": n,
+            "seed": self.seed,
+            "pnl_mean": float(pnl.mean()),
+            "pnl_std": float(pnl.std(ddof=1)) if n > 1 else 0.0,
+            "pnl_percentiles": dict(zip(PERCENTILES, np.percentile(pnl, PERCENTILES).tolist())),
+            "max_drawdown_percentiles": dict(zip(PERCENTILES, np.percentile(dd, PERCENTILES).tolist())),
+            "prob_loss": float(np.count_nonzero(pnl < 0)) / n,
+            "prob_drawdown_breach": None,
+            "prob_daily_loss_breach": None,
+            "prob_any_breach": None,
+            "base": self.base
+        }
+        if self.limits:
+            failed = self.paths["failed"] > 0
+            halted = self.paths["day_halts"] > 0
+            summary["prob_drawdown_breach"] = float(np.count_nonzero(failed)) / n
+            summary["prob_daily_loss_breach"] = float(np.count_nonzero(halted)) / n
+            summary["prob_any_breach"] = float(np.count_nonzero(failed | halted)) / n
+        return summary
+
+def bootstrap_path(first_price: float, log_returns: np.ndarray, block_size: int,
+                   rng: np.random.Generator) -> np.ndarray:
+    """
+    Circular block bootstrap: a price path as long as the original, rebuilt
+    from randomly placed blocks of block_size consecutive log returns, so
+    short-range autocorrelation and volatility clustering survive within a
+    block.
+    """
+    m = len(log_returns)
+    blocks = -(-m // block_size)
+    starts = rng.integers(0, m, size=blocks)
+    idx = (starts[:, None] + np.arange(block_size)).ravel()[:m] % m
+    path = np.empty(m + 1)
+    path[0] = 0.0
+    np.cumsum(log_returns[idx], out=path[1:])
+    return first_price * np.exp(path)
+
+def _path_rows(timestamps: Sequence[datetime], prices: np.ndarray, codes: Optional[np.ndarray]):
+    """(timestamp, price, code + 1 or None) per bar, converting the arrays a chunk at a time."""
+    for start in range(0, len(prices), _ITER_CHUNK):
+        stop = start + _ITER_CHUNK
+        chunk_codes = codes[start:stop].tolist() if codes is not None else itertools.repeat(None)
+        yield from zip(timestamps[start:stop], prices[start:stop].tolist(), chunk_codes)
+
+def simulate_path(config: BotConfig, timestamps: Sequence[datetime], prices: np.ndarray,
+                  max_trades: Optional[int] = 1) -> Tuple[Tuple[float, ...], MockBroker]:
+    """
+    Run strategy -> RiskManager -> MockBroker over one price path, with the
+    account limits enforced like the loop engine. Returns the PATH_FIELDS
+    values and the broker.
+    """
+    broker = MockBroker.from_config(config, max_trades=max_trades)
+    strategy = build_strategy(config)
+    risk_manager = RiskManager(config, broker)
+    limits = risk_manager.limits
+    symbol, multiplier = config.symbol, broker.multiplier
+    codes = strategy.on_prices(prices) + 1 if hasattr(strategy, "on_prices") else None
+
+    peak = equity = config.initial_cash
+    max_dd = max_dd_abs = 0.0
+    day_halts = 0
+    for timestamp, price, code in _path_rows(timestamps, prices, codes):
+        if code is not None:
+            process_signal(config, risk_manager, broker, timestamp, price, SIGNAL_NAMES[code])
+        else:
+            process_tick(config, strategy, risk_manager, broker, timestamp, price)
+        equity = broker.get_cash() + broker.get_position(symbol) * price * multiplier
+        if limits is not None:
+            halted = limits.day_halted
+            enforce_limits(config, risk_manager, broker, equity, price, timestamp)
+            day_halts += limits.day_halted and not halted
+        if equity > peak:
+            peak = equity
+        elif equity < peak:
+            drawdown = peak - equity
+            if drawdown > max_dd_abs:
+                max_dd_abs = drawdown
+            if peak > 0 and drawdown > max_dd * peak:
+                max_dd = drawdown / peak
+    failed = limits is not None and limits.failed
+    stats = (equity - config.initial_cash, max_dd, max_dd_abs, broker.get_trades().total_fills,
+             float(failed), float(day_halts))
+    return stats, broker
+
+def _quiet_fill_logs() -> Dict[str, int]:
+    """Raise the fill loggers to at least WARNING; returns their previous levels."""
+    levels = {}
+    for name in _FILL_LOGGERS:
+        fill_logger = logging.getLogger(name)
+        levels[name] = fill_logger.level
+        fill_logger.setLevel(max(fill_logger.getEffectiveLevel(), logging.WARNING))
+    return levels
+
+def _restore_logs(levels: Dict[str, int]):
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+def _attach_worker(specs):
+    _attach(specs)
+    _quiet_fill_logs()
+
+def _path_seed(seed: int, path: int) -> np.random.Generator:
+    # Each path has its own stream: results do not depend on worker count or scheduling
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(path,)))
+
+def _run_paths(task) -> np.ndarray:
+    config, start, stop, block_size, seed = task
+    if "timestamp_list" not in _shared:
+        _shared["timestamp_list"] = _shared["timestamps"].tolist()
+    timestamps = _shared["timestamp_list"]
+    prices, log_returns = _shared["prices"], _shared["log_returns"]
+    out = np.empty((stop - start, len(PATH_FIELDS)))
+    for row, path in enumerate(range(start, stop)):
+        path_prices = bootstrap_path(float(prices[0]), log_returns, block_size, _path_seed(seed, path))
+        out[row] = simulate_path(config, timestamps, path_prices)[0]
+    return out
+
+def shuffle_trades(closed_pnl: np.ndarray, days: np.ndarray, paths: int, initial_cash: float,
+                   max_trailing_drawdown: Optional[float] = None, daily_loss_limit: Optional[float] = None,
+                   seed: int = 0, chunk: int = 1024) -> Dict[str, np.ndarray]:
+    """
+    Randomized trade ordering: every path replays the same closed-trade PnLs
+    (net of commissions) in a random order. The original exit times are kept,
+    so a path's trades land on the same trading days as the original trades.
+    The closed-trade equity is then checked against the trailing drawdown and
+    daily loss limits. Breaches are only detected here and do not halt the
+    path, and unrealized swings between exits are not seen. Vectorized over
+    `chunk` paths at a time.
+    """
+    k = len(closed_pnl)
+    out = {name: np.zeros(paths) for name in PATH_FIELDS}
+    if k == 0:
+        return out
+    # Trades of the same day are contiguous; `first` indexes each trade's day start
+    day_start = np.flatnonzero(np.concatenate(([True], days[1:] != days[:-1])))
+    first = day_start[np.searchsorted(day_start, np.arange(k), side="right") - 1]
+    for lo in range(0, paths, chunk):
+        hi = min(paths, lo + chunk)
+        rng = [_path_seed(seed, p) for p in range(lo, hi)]
+        order = np.stack([g.permutation(k) for g in rng])
+        pnl = closed_pnl[order]
+        cum = np.cumsum(pnl, axis=1)
+        equity = initial_cash + cum
+        peak = np.maximum(np.maximum.accumulate(equity, axis=1), initial_cash)
+        drawdown = peak - equity
+        out["pnl"][lo:hi] = cum[:, -1]
+        out["max_drawdown_abs"][lo:hi] = drawdown.max(axis=1)
+        out["max_drawdown"][lo:hi] = (drawdown / peak).max(axis=1)
+        out["fills"][lo:hi] = 2 * k
+        if max_trailing_drawdown is not None:
+            floor = np.minimum(peak - max_trailing_drawdown, initial_cash)
+            out["failed"][lo:hi] = (equity <= floor).any(axis=1)
+        if daily_loss_limit is not None:
+            before = np.concatenate((np.zeros((hi - lo, 1)), cum[:, :-1]), axis=1)
+            intraday = cum - before[:, first]
+            out["day_halts"][lo:hi] = (intraday <= -daily_loss_limit).any(axis=1)
+    return out
+
+def run_monte_carlo(config: BotConfig, timestamps: np.ndarray, prices: np.ndarray, paths: int = 1000,
+                    method: str = "bootstrap", block_size: int = 50, seed: int = 0,
+                    workers: Optional[int] = None) -> MonteCarloResult:
+    """
+    Monte Carlo robustness of one config.
+
+    method='bootstrap' block-bootstraps the log returns of the series into
+    `paths` alternative price paths (same timestamps, same first price) and
+    runs the full per-tick pipeline with account limits on each, across a
+    process pool; the series is shared with the workers once, like
+    run_sweep's. method='trades' reshuffles the order of the original run's
+    closed trades instead (see shuffle_trades) in-process.
+
+    Path i always draws from the same seeded stream, so a (seed, paths) pair
+    reproduces exactly on any number of workers.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    if paths < 1:
+        raise ValueError("paths must be >= 1")
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    if len(prices) < 2:
+        raise ValueError("Need at least two prices")
+    if (prices <= 0).any():
+        raise ValueError("Bootstrapping log returns needs strictly positive prices")
+    timestamps = timestamps.astype("datetime64[us]")
+    has_limits = AccountLimits.from_config(config) is not None
+
+    start = time.time()
+    levels = _quiet_fill_logs()
+    try:
+        base_stats, base_broker = simulate_path(config, timestamps.tolist(), prices, max_trades=None)
+    finally:
+        _restore_logs(levels)
+    base = dict(zip(PATH_FIELDS, base_stats))
+
+    if method == "trades":
+        trades = [t for t in base_broker.get_trades() if t.realized_pnl is not None]
+        # Each close carries its own and its entry's commission
+        fees = np.array([2 * t.commission for t in trades])
+        closed_pnl = np.array([t.realized_pnl for t in trades]) - fees
+        exits = np.array([t.timestamp for t in trades], dtype="datetime64[us]")
+        hour = np.timedelta64(config.trading_day_start_hour, "h")
+        days = (exits - hour).astype("datetime64[D]").astype(np.int64)
+        stats = shuffle_trades(closed_pnl, days, paths, config.initial_cash,
+                               config.max_trailing_drawdown, config.daily_loss_limit, seed)
+        # Compare like with like: the original order's closed-trade equity, as the paths
+        # measure it; the PnL of a position still open at the end is kept as open_pnl
+        equity = config.initial_cash + np.concatenate(([0.0], np.cumsum(closed_pnl)))
+        peak = np.maximum.accumulate(equity)
+        drawdown = peak - equity
+        closed_total = float(equity[-1] - config.initial_cash)
+        base.update(pnl=closed_total, open_pnl=base["pnl"] - closed_total,
+                    max_drawdown_abs=float(drawdown.max()), max_drawdown=float((drawdown / peak).max()))
+        logger.info(f"Monte Carlo: {paths} trade orderings of {len(trades)} trades in {time.time() - start:.2f}s")
+        return MonteCarloResult(method, stats, config.initial_cash, has_limits, seed,
+                                time.time() - start, base)
+
+    if block_size < 1:
+        raise ValueError("block_size must be >= 1")
+    workers = min(workers or os.cpu_count() or 1, paths)
+    # Enough chunks to balance the pool, few enough to keep IPC negligible
+    chunk = max(1, min(64, paths // (workers * 4)))
+    tasks = [(config, lo, min(paths, lo + chunk), block_size, seed) for lo in range(0, paths, chunk)]
+    blocks, specs = _share_arrays({
+        "timestamps": timestamps,
+        "prices": prices,
+        "log_returns": np.diff(np.log(prices))
+    })
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_worker, initargs=(specs,)) as pool:
+            rows = np.concatenate(list(pool.map(_run_paths, tasks)))
+    finally:
+        _release(blocks)
+    elapsed = time.time() - start
+    logger.info(f"Monte Carlo: {paths} paths x {len(prices)} bars on {workers} workers in {elapsed:.2f}s "
+                f"({paths / elapsed * 60:,.0f} paths/min)")
+    stats = {name: rows[:, i] for i, name in enumerate(PATH_FIELDS)}
+    return MonteCarloResult(method, stats, config.initial_cash, has_limits, seed, elapsed, base)
+
+def write_paths_csv(result: MonteCarloResult, path: str):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("path",) + PATH_FIELDS)
+        columns = [result.paths[name].astype(np.int64 if name in _COUNT_FIELDS else np.float64).tolist()
+                   for name in PATH_FIELDS]
+        for i, row in enumerate(zip(*columns)):
+            writer.writerow((i,) + row)
+
+def print_summary(result: MonteCarloResult):
+    from rich.console import Console
+    from rich.table import Table
+
+    summary = result.summary()
+    table = Table(title=f"Monte Carlo: {summary['paths']} {result.method} paths",
+                  show_header=True, header_style="bold magenta")
+    table.add_column("Percentile", style="cyan")
+    table.add_column("PnL", style="green")
+    table.add_column("Max Drawdown", style="red")
+    for p in PERCENTILES:
+        table.add_row(f"p{p}", f"${summary['pnl_percentiles'][p]:,.2f}",
+                      f"${summary['max_drawdown_percentiles'][p]:,.2f}")
+    original = "original (closed trades)" if result.method == "trades" else "original"
+    table.add_row(original, f"${result.base['pnl']:,.2f}", f"${result.base['max_drawdown_abs']:,.2f}")
+    console = Console()
+    console.print(table)
+
+    risk = Table(title="Risk of Ruin", show_header=True, header_style="bold magenta")
+    risk.add_column("Metric", style="cyan")
+    risk.add_column("Value", style="green")
+    risk.add_row("P(loss)", f"{summary['prob_loss']*100:.1f}%")
+    if result.limits:
+        risk.add_row("P(trailing drawdown breach)", f"{summary['prob_drawdown_breach']*100:.1f}%")
+        risk.add_row("P(daily loss limit hit)", f"{summary['prob_daily_loss_breach']*100:.1f}%")
+        risk.add_row("P(any breach)", f"{summary['prob_any_breach']*100:.1f}%")
+    else:
+        risk.add_row("Limit breaches", "N/A (no account limits; use --topstep)")
+    console.print(risk)
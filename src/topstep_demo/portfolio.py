@@ -0,0 +1,145 @@
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import time
+import logging
+
+from .config import BotConfig, CONTRACT_SPECS
+from .broker import MockBroker, Trade, parse_slippage
+from .strategy import Strategy, build_strategy
+from .risk import AccountLimits, RiskManager
+from .data import load_price_feed, merge_price_feeds
+from .runner import flatten_position, process_tick
+from .report import print_report
+from .metrics import MetricsAccumulator
+from .journal import EventJournal
+
+logger = logging.getLogger("topstep_demo.portfolio")
+
+def _split_contract(spec: str, body: str) -> Tuple[str, Dict[str, Any]]:
+    """Split 'CSV[:CONTRACT[:COMMISSION]]' into the path and the BotConfig overrides of its contract."""
+    head, sep, last = body.rpartition(":")
+    if not sep or not head:
+        return body, {}
+    rest, sep, contract = head.rpartition(":")
+    if sep and rest and contract.upper() in CONTRACT_SPECS:
+        try:
+            commission = float(last)
+        except ValueError:
+            raise ValueError(f"Invalid commission '{last}' in feed '{spec}'") from None
+        head = rest
+    elif last.upper() in CONTRACT_SPECS:
+        contract, commission = last, None
+    else:
+        return body, {}  # a path with a colon in it
+    multiplier, tick_size = CONTRACT_SPECS[contract.upper()]
+    overrides: Dict[str, Any] = {"multiplier": multiplier, "tick_size": tick_size}
+    if commission is not None:
+        overrides["commission"] = commission
+    return head, overrides
+
+def parse_feed_specs(specs: List[str]) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]]]:
+    """
+    Parse ['ES=data/es.csv:ES', 'CL=data/cl.csv:CL:2.5'] into ({symbol: csv_path},
+    {symbol: contract overrides}). The optional CONTRACT is a CONTRACT_SPECS
+    preset (multiplier and tick size) and COMMISSION the per contract fee;
+    feeds without them use the run's contract settings.
+    """
+    feeds: Dict[str, str] = {}
+    contracts: Dict[str, Dict[str, Any]] = {}
+    for spec in specs:
+        symbol, sep, body = spec.partition("=")
+        if not sep or not symbol or not body:
+            raise ValueError(f"Invalid feed '{spec}', expected SYMBOL=CSV[:CONTRACT[:COMMISSION]]")
+        if symbol in feeds:
+            raise ValueError(f"Duplicate feed for {symbol}")
+        feeds[symbol], overrides = _split_contract(spec, body)
+        if overrides:
+            contracts[symbol] = overrides
+    return feeds, contracts
+
+def run_portfolio(config: BotConfig, feeds: Dict[str, str], fast_mode: bool = False,
+                  equity_out: Optional[str] = None, curve_every: int = 1,
+                  trade_history: Optional[int] = None, show_ratios: bool = False,
+                  journal: Optional[str] = None, report: str = "rich",
+                  contracts: Optional[Dict[str, Dict[str, Any]]] = None):
+    """
+    Run several symbols against one shared MockBroker.
+    Each symbol gets its own strategy and RiskManager (config with symbol
+    replaced); ticks from all feeds are merged in timestamp order as they stream.
+    contracts maps a symbol to its multiplier, tick_size and commission
+    overrides (see parse_feed_specs); the broker fills, charges and values that
+    symbol with them. Equity is marked to the last price of every symbol held.
+    Reporting and journal options are the same as run_simulation's.
+    """
+    mode_name = "BACKTEST" if fast_mode else "SIMULATION"
+    logger.info(f"Starting PORTFOLIO {mode_name} | {', '.join(feeds)} | Qty: {config.qty} | AllowShort: {config.allow_short}")
+    
+    metrics = MetricsAccumulator(keep_curve=equity_out is not None, curve_every=curve_every)
+    fills: Dict[str, int] = {symbol: 0 for symbol in feeds}
+    symbol_pnl: Dict[str, float] = {symbol: 0.0 for symbol in feeds}
+    
+    def on_fill(trade: Trade):
+        metrics.record_fill(trade)
+        fills[trade.symbol] += 1
+        if trade.realized_pnl is not None:
+            symbol_pnl[trade.symbol] += trade.realized_pnl
+            
+    event_journal = EventJournal(journal) if journal else None
+    try:
+        broker = MockBroker.from_config(config, max_trades=trade_history, on_fill=on_fill, journal=event_journal)
+        # Account rules apply to the whole account, so every leg shares one AccountLimits
+        limits = AccountLimits.from_config(config, event_journal)
+        legs: Dict[str, Tuple[BotConfig, Strategy, RiskManager]] = {}
+        multipliers: Dict[str, float] = {}
+        sources = {}
+        for symbol, csv_path in feeds.items():
+            path = Path(csv_path)
+            if not path.exists():
+                raise FileNotFoundError(f"Price feed for {symbol} not found: {csv_path}")
+            overrides = (contracts or {}).get(symbol, {})
+            leg_config = replace(config, symbol=symbol, **overrides)
+            if overrides:
+                broker.set_contract(symbol, leg_config.multiplier, leg_config.commission, leg_config.tick_size,
+                                    parse_slippage(leg_config.slippage, leg_config.tick_size))
+            multipliers[symbol] = leg_config.multiplier
+            strategy = build_strategy(config)
+            legs[symbol] = (leg_config, strategy, RiskManager(leg_config, broker, limits, event_journal))
+            sources[symbol] = load_price_feed(path)
+        
+        marks: Dict[str, float] = {}
+        ticks = 0
+        start_time = time.time()
+    
+        for timestamp, symbol, price in merge_price_feeds(sources):
+            leg_config, strategy, risk_manager = legs[symbol]
+            process_tick(leg_config, strategy, risk_manager, broker, timestamp, price)
+            marks[symbol] = price
+        
+            # Only this symbol can have filled, but every open position is marked
+            pos_val = 0.0
+            for held, mark in marks.items():
+                pos_val += broker.get_position(held) * mark * multipliers[held]
+            equity = broker.get_cash() + pos_val
+            if limits is not None and limits.update(equity, timestamp):
+                for held, mark in marks.items():
+                    held_config, _, held_risk = legs[held]
+                    flatten_position(held_config, held_risk, broker, mark, timestamp)
+            metrics.update_equity(equity)
+            ticks += 1
+        
+            if not fast_mode:
+                time.sleep(0.05)
+            
+        elapsed = time.time() - start_time
+        logger.info(f"Portfolio processed {ticks} ticks in {elapsed:.2f}s")
+    
+        for symbol in feeds:
+            logger.info(f"{symbol}: {fills[symbol]} fills | Realized PnL ${symbol_pnl[symbol]:,.2f} | Position {broker.get_position(symbol)}")
+        
+        print_report(metrics, broker.get_trades()[-5:], config.initial_cash, show_ratios=show_ratios, fmt=report)
+        if equity_out:
+            metrics.write_curve(equity_out)
+    finally:
+        if event_journal is not None:
+            event_journal.close()
@@ -0,0 +1,134 @@
+from array import array
+from typing import Dict, List, Tuple
+from time import perf_counter_ns
+import functools
+import json
+
+class LatencyHistogram:
+    """
+    Fixed-size log-linear histogram of nanosecond latencies (HDR-style).
+    Values below 32ns are exact; above that each power of two is split into
+    16 buckets, so any recorded value is within ~6% of its bucket. Recording
+    is O(1) and memory is constant (1024 counters) regardless of sample count.
+    """
+    __slots__ = ("counts", "count", "total", "max")
+    SIZE = 1024
+
+    def __init__(self):
+        self.counts = array("q", bytes(8 * self.SIZE))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @staticmethod
+    def _index(value: int) -> int:
+        shift = value.bit_length() - 5
+        if shift <= 0:
+            return value
+        return (shift << 4) + (value >> shift)
+
+    @staticmethod
+    def _lower_bound(index: int) -> int:
+        if index < 32:
+            return index
+        shift = (index >> 4) - 1
+        return ((index & 15) + 16) << shift
+
+    def record(self, value: int):
+        if value < 0:
+            value = 0
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile (bucket midpoint, capped at the exact max)."""
+        if self.count == 0:
+            return 0.0
+        target = max(1, -(-self.count * q // 100))
+        seen = 0
+        for index, c in enumerate(self.counts):
+            if not c:
+                continue
+            seen += c
+            if seen >= target:
+                low = self._lower_bound(index)
+                high = self._lower_bound(index + 1)
+                return min((low + high) / 2, float(self.max))
+        return float(self.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+class TickProfiler:
+    """
+    Per-stage latency recorder for the tick loop. instrument() swaps timing
+    wrappers onto the strategy/risk/broker instances, so an uninstrumented run
+    executes exactly the original code paths.
+    """
+    STAGES = ("strategy", "check_exit", "check_entry", "place_order", "equity")
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in self.STAGES}
+
+    def _wrap(self, obj, method_name: str, stage: str):
+        method = getattr(obj, method_name)
+        record = self.histograms[stage].record
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(perf_counter_ns() - start)
+
+        setattr(obj, method_name, timed)
+
+    def instrument(self, strategy, risk_manager, broker, bars: bool = False):
+        self._wrap(strategy, "on_price", "strategy")
+        # In bar mode the exit stage is the intrabar check
+        self._wrap(risk_manager, "check_exit_bar" if bars else "check_exit", "check_exit")
+        self._wrap(risk_manager, "check_entry", "check_entry")
+        self._wrap(broker, "place_order", "place_order")
+
+    def record(self, stage: str, elapsed_ns: int):
+        self.histograms[stage].record(elapsed_ns)
+
+    def rows(self) -> List[Tuple[str, int, float, float, float, float, float]]:
+        """(stage, calls, mean, p50, p90, p99, max) in nanoseconds."""
+        out = []
+        for stage, h in self.histograms.items():
+            out.append((stage, h.count, h.mean, *(h.percentile(q) for q in self.PERCENTILES), float(h.max)))
+        return out
+
+    def to_dict(self) -> Dict[str, dict]:
+        result = {}
+        for stage, calls, mean, p50, p90, p99, max_ns in self.rows():
+            h = self.histograms[stage]
+            result[stage] = {
+                "calls": calls, "mean_ns": mean, "p50_ns": p50, "p90_ns": p90, "p99_ns": p99, "max_ns": max_ns,
+                # Sparse histogram: bucket lower bound (ns) -> count
+                "buckets": {str(h._lower_bound(i)): c for i, c in enumerate(h.counts) if c}
+            }
+        return result
+
+    def write_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def print_summary(self):
+        from rich.console import Console
+        from rich.table import Table
+
+        table = Table(title="Tick Loop Latency (us)", show_header=True, header_style="bold magenta")
+        table.add_column("Stage", style="cyan")
+        for col in ("Calls", "Mean", "p50", "p90", "p99", "Max"):
+            table.add_column(col, justify="right")
+        for stage, calls, mean, p50, p90, p99, max_ns in self.rows():
+            table.add_row(stage, str(calls), *(f"{v / 1e3:.2f}" for v in (mean, p50, p90, p99, max_ns)))
+        Console().print(table)
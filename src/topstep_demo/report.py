@@ -1,55 +1,97 @@
-from rich.console import Console
-from rich.table import Table
-from typing import List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import math
 from .broker import Trade
+from .metrics import MetricsAccumulator
 
-def generate_report(trades: List[Trade], final_cash: float, initial_cash: float, equity_curve: List[float]):
+def generate_report(trades: List[Trade], final_cash: float, initial_cash: float, equity_curve: List[float],
+                    show_ratios: bool = False):
     """
-    Generate a professional performance report.
+    Generate a professional performance report from a full trade list and equity curve.
     """
+    metrics = MetricsAccumulator()
+    for t in trades:
+        metrics.record_fill(t)
+    metrics.update_equity_batch(equity_curve)
+    print_report(metrics, trades[-5:], initial_cash, show_ratios=show_ratios)
+
+REPORT_FORMATS = ("rich", "json", "none")
+
+def report_dict(metrics: MetricsAccumulator, recent_trades: List[Trade], initial_cash: float,
+                show_ratios: bool = False) -> Dict[str, Any]:
+    """The report's values as plain numbers (None where undefined), for JSON output."""
+    report = {
+        "total_trades": metrics.total_trades,
+        "wins": metrics.wins,
+        "losses": metrics.losses,
+        "win_rate": metrics.win_rate,
+        "realized_pnl": metrics.realized_pnl,
+        "commissions": metrics.commissions,
+        "final_equity": metrics.last_equity if metrics.bars else None,
+        "max_drawdown": metrics.max_drawdown,
+        "initial_cash": initial_cash,
+        "bars": metrics.bars
+    }
+    if show_ratios:
+        report["sharpe"] = metrics.sharpe()
+        report["sortino"] = metrics.sortino()
+    report["recent_trades"] = [
+        {"timestamp": str(t.timestamp), "side": t.side, "qty": t.qty, "price": t.price,
+         "realized_pnl": t.realized_pnl, "commission": t.commission}
+        for t in list(recent_trades)[-5:]
+    ]
+    # NaN/inf are not valid JSON
+    return {k: None if isinstance(v, float) and not math.isfinite(v) else v for k, v in report.items()}
+
+def print_report(metrics: MetricsAccumulator, recent_trades: List[Trade], initial_cash: float,
+                 show_ratios: bool = False, fmt: str = "rich", extra: Optional[Dict[str, Any]] = None):
+    """
+    Render the performance report from streaming metrics plus the most recent trades.
+    fmt='json' prints one JSON object to stdout instead (see report_dict), with
+    any `extra` keys added, and fmt='none' prints nothing; neither imports Rich.
+    """
+    if fmt == "none":
+        return
+    if fmt == "json":
+        report = report_dict(metrics, recent_trades, initial_cash, show_ratios=show_ratios)
+        report.update(extra or {})
+        print(json.dumps(report))
+        return
+    if fmt != "rich":
+        raise ValueError(f"Unknown report format: {fmt}")
+    from rich.console import Console
+    from rich.table import Table
     console = Console()
-    
-    # metrics
-    total_trades = len(trades)
-    realized_pnl = sum([t.realized_pnl for t in trades if t.realized_pnl is not None])
-    
-    # Calculate Drawdown
-    peak = -float('inf')
-    max_drawdown = 0.0
-    for e in equity_curve:
-        if e > peak:
-            peak = e
-        dd = (peak - e) / peak if peak > 0 else 0
-        if dd > max_drawdown:
-            max_drawdown = dd
-            
-    # Wins/Losses
-    wins = len([t for t in trades if t.realized_pnl and t.realized_pnl > 0])
-    losses = len([t for t in trades if t.realized_pnl and t.realized_pnl <= 0])
-    win_rate = (wins / total_trades * 100) if total_trades > 0 else 0.0
 
     table = Table(title="Backtest Performance Report", show_header=True, header_style="bold magenta")
     table.add_column("Metric", style="cyan")
     table.add_column("Value", style="green")
-    
-    table.add_row("Total Trades", str(total_trades))
-    table.add_row("Win Rate", f"{win_rate:.1f}% ({wins} W / {losses} L)")
-    table.add_row("Realized PnL", f"${realized_pnl:,.2f}")
-    table.add_row("Final Equity", f"${equity_curve[-1]:,.2f}" if equity_curve else "N/A")
-    table.add_row("Max Drawdown", f"{max_drawdown*100:.2f}%")
+
+    table.add_row("Total Trades", str(metrics.total_trades))
+    table.add_row("Win Rate", f"{metrics.win_rate:.1f}% ({metrics.wins} W / {metrics.losses} L)")
+    table.add_row("Realized PnL", f"${metrics.realized_pnl:,.2f}")
+    if metrics.commissions:
+        table.add_row("Commissions", f"${metrics.commissions:,.2f}")
+    table.add_row("Final Equity", f"${metrics.last_equity:,.2f}" if metrics.bars else "N/A")
+    table.add_row("Max Drawdown", f"{metrics.max_drawdown*100:.2f}%")
+    if show_ratios:
+        sharpe = metrics.sharpe()
+        sortino = metrics.sortino()
+        table.add_row("Sharpe (per bar)", f"{sharpe:.4f}" if sharpe is not None else "N/A")
+        table.add_row("Sortino (per bar)", f"{sortino:.4f}" if sortino is not None else "N/A")
     table.add_row("Initial Cash", f"${initial_cash:,.2f}")
-    
+
     console.print(table)
-    
-    if total_trades > 0:
+
+    if metrics.total_trades > 0:
         t_table = Table(title="Use 'topstep-demo --log-level DEBUG' to see full trade list", show_header=True)
         t_table.add_column("Time", style="dim")
         t_table.add_column("Side")
         t_table.add_column("Price")
         t_table.add_column("PnL")
-        
+
         # Show last 5
-        for t in trades[-5:]:
+        for t in list(recent_trades)[-5:]:
             pnl_s = f"${t.realized_pnl:.2f}" if t.realized_pnl is not None else "-"
             s_style = "green" if t.side == "BUY" else "red"
             t_table.add_row(str(t.timestamp), f"[{s_style}]{t.side}[/{s_style}]", f"{t.price:.2f}", pnl_s)
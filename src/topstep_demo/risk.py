@@ -1,8 +1,11 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, asdict
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
 import logging
+import math
 from .config import BotConfig
 from .broker import Broker
+from .kernel import daily_floor, exit_levels, stop_hit, target_hit, trailing_floor, within_contract_cap
 
 logger = logging.getLogger("topstep_demo.risk")
 
@@ -14,11 +17,134 @@ class PositionMetadata:
     sl_price: float
     tp_price: float
 
+class AccountLimits:
+    """
+    Account-level Topstep rules, maintained incrementally from one equity
+    value per tick (O(1) per update):
+    
+    - trailing max drawdown: equity <= high-water mark - max_trailing_drawdown
+      fails the account and halts trading for good. The threshold follows the
+      intraday equity high but never rises above initial_cash.
+    - daily loss limit: equity <= trading-day start equity - daily_loss_limit
+      halts trading until the next trading day.
+    - max contracts: entries that would exceed it are refused.
+    
+    One instance may be shared by several RiskManagers (one per symbol) that
+    trade the same account. Breaches go to journal (an EventJournal), if given.
+    """
+    def __init__(self, config: BotConfig, journal=None):
+        self.max_trailing_drawdown = config.max_trailing_drawdown
+        self.daily_loss_limit = config.daily_loss_limit
+        self.max_contracts = config.max_contracts
+        self.day_start_hour = config.trading_day_start_hour
+        self.initial_cash = config.initial_cash
+        
+        self.high_water = config.initial_cash
+        self.drawdown_floor = (self._trailing_floor(config.initial_cash)
+                               if self.max_trailing_drawdown is not None else -math.inf)
+        self.day_start_equity = config.initial_cash
+        self.daily_floor = -math.inf
+        self.next_day = None  # first timestamp of the next trading day
+        self.open_contracts = 0
+        
+        self.failed = False
+        self.day_halted = False
+        self.breach: Optional[str] = None
+        self.journal = journal
+
+    @classmethod
+    def from_config(cls, config: BotConfig, journal=None) -> Optional["AccountLimits"]:
+        """An AccountLimits if the config sets any limit, else None."""
+        if (config.max_trailing_drawdown is None and config.daily_loss_limit is None
+                and config.max_contracts is None):
+            return None
+        return cls(config, journal)
+
+    @property
+    def halted(self) -> bool:
+        return self.failed or self.day_halted
+
+    def _trailing_floor(self, high_water: float) -> float:
+        return trailing_floor(high_water, self.max_trailing_drawdown, self.initial_cash)
+
+    def _roll_day(self, equity: float, timestamp):
+        boundary = timestamp.replace(hour=self.day_start_hour, minute=0, second=0, microsecond=0)
+        if boundary <= timestamp:
+            boundary += timedelta(days=1)
+        self.next_day = boundary
+        self.day_start_equity = equity
+        if self.daily_loss_limit is not None:
+            self.daily_floor = daily_floor(equity, self.daily_loss_limit)
+        if self.day_halted:
+            logger.info(f"New trading day {timestamp}: daily loss halt lifted")
+        self.day_halted = False
+
+    def update(self, equity: float, timestamp) -> bool:
+        """
+        Feed the account equity after a tick. Returns True exactly when this
+        update breaches a limit, i.e. open positions must be flattened now.
+        """
+        if self.next_day is None or timestamp >= self.next_day:
+            self._roll_day(equity, timestamp)
+        if equity > self.high_water:
+            self.high_water = equity
+            if self.max_trailing_drawdown is not None:
+                self.drawdown_floor = self._trailing_floor(equity)
+                
+        if self.failed:
+            return False
+        if equity <= self.drawdown_floor:
+            self.failed = True
+            self.breach = (f"Trailing max drawdown hit at {timestamp}: equity {equity:,.2f} "
+                           f"<= {self.drawdown_floor:,.2f} (high {self.high_water:,.2f})")
+            logger.warning(f"{self.breach} | flattening, trading halted")
+            if self.journal is not None:
+                self.journal.breach(timestamp, equity, "drawdown")
+            return True
+        if not self.day_halted and equity <= self.daily_floor:
+            self.day_halted = True
+            self.breach = (f"Daily loss limit hit at {timestamp}: equity {equity:,.2f} "
+                           f"<= {self.daily_floor:,.2f} (day start {self.day_start_equity:,.2f})")
+            logger.warning(f"{self.breach} | flattening, halted until next trading day")
+            if self.journal is not None:
+                self.journal.breach(timestamp, equity, "daily_loss")
+            return True
+        return False
+
+    def allows(self, qty: int) -> bool:
+        """Whether opening qty more contracts is allowed right now."""
+        if self.failed or self.day_halted:
+            return False
+        return self.max_contracts is None or within_contract_cap(self.open_contracts, qty, self.max_contracts)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in _LIMIT_STATE_FIELDS}
+
+    def restore(self, state: Dict[str, Any]):
+        for name in _LIMIT_STATE_FIELDS:
+            setattr(self, name, state[name])
+
+_LIMIT_STATE_FIELDS = ("high_water", "drawdown_floor", "day_start_equity", "daily_floor", "next_day",
+                       "open_contracts", "failed", "day_halted", "breach")
+
 class RiskManager:
-    def __init__(self, config: BotConfig, broker: Broker):
+    def __init__(self, config: BotConfig, broker: Broker, limits: Optional[AccountLimits] = None,
+                 journal=None):
+        """
+        limits enforces account rules (see AccountLimits); by default one is
+        built from config when it sets any. Pass a shared instance when several
+        RiskManagers trade the same account.
+        
+        journal (an EventJournal) receives SL/TP exits and, for limits built
+        here, breaches.
+        """
         self.config = config
         self.broker = broker
+        self.journal = journal
         self.active_position: Optional[PositionMetadata] = None
+        self.limits = limits if limits is not None else AccountLimits.from_config(config, journal)
+        self._contracts = 0  # open contracts counted in limits.open_contracts
+        self._bracket: Optional[Tuple[str, str]] = None  # resting (stop, limit) order ids
 
     def check_entry(self, signal: str, current_price: float, timestamp) -> bool:
         """
@@ -30,6 +156,10 @@ class RiskManager:
         if current_pos_size != 0:
             return False
             
+        # Account rules: halted after a limit breach, contract cap
+        if self.limits is not None and not self.limits.allows(self.config.qty):
+            return False
+            
         if signal == "BUY":
             return True
             
@@ -39,52 +169,93 @@ class RiskManager:
             
         return False
         
-    def check_exit(self, current_price: float, timestamp) -> Optional[str]:
+    def _current_position(self, timestamp) -> Optional[PositionMetadata]:
         """
-        Check for SL/TP hits.
-        Returns 'BUY' or 'SELL' action to CLOSE the position, or None.
+        SL/TP metadata for the open position, or None when flat.
         """
         pos_qty = self.broker.get_position(self.config.symbol)
         if pos_qty == 0:
             self.active_position = None
             return None
-            
-        # Recover state if missing (e.g. restart) - minimal fallback
+
+        # Recover state if missing (e.g. restart without a checkpoint) - minimal fallback
         if not self.active_position:
             avg_entry = self.broker.get_average_entry(self.config.symbol)
-            direction = "LONG" if pos_qty > 0 else "SHORT"
             # Recalculate default SL/TP based on current average entry
-            if direction == "LONG":
-                sl = avg_entry * (1 - self.config.sl_pct)
-                tp = avg_entry * (1 + self.config.tp_pct)
-            else:
-                sl = avg_entry * (1 + self.config.sl_pct)
-                tp = avg_entry * (1 - self.config.tp_pct)
-                
-            self.active_position = PositionMetadata(avg_entry, timestamp, direction, sl, tp)
-            
-        ap = self.active_position
-        
-        if ap.side == "LONG":
-            # Stop Loss (Price drops)
-            if current_price <= ap.sl_price:
-                logger.debug(f"STOP LOSS HIT: Long Entry {ap.entry_price} | SL {ap.sl_price} | Curr {current_price}")
-                return "SELL"
-            # Take Profit (Price rises)
-            if current_price >= ap.tp_price:
-                logger.debug(f"TAKE PROFIT HIT: Long Entry {ap.entry_price} | TP {ap.tp_price} | Curr {current_price}")
-                return "SELL"
-                
-        elif ap.side == "SHORT":
-            # Stop Loss (Price rises)
-            if current_price >= ap.sl_price:
-                logger.debug(f"STOP LOSS HIT: Short Entry {ap.entry_price} | SL {ap.sl_price} | Curr {current_price}")
-                return "BUY"
-            # Take Profit (Price drops)
-            if current_price <= ap.tp_price:
-                logger.debug(f"TAKE PROFIT HIT: Short Entry {ap.entry_price} | TP {ap.tp_price} | Curr {current_price}")
-                return "BUY"
-                
+            sl, tp = exit_levels(1 if pos_qty > 0 else -1, avg_entry, self.config.sl_pct, self.config.tp_pct)
+            self.active_position = PositionMetadata(avg_entry, timestamp, "LONG" if pos_qty > 0 else "SHORT", sl, tp)
+
+        return self.active_position
+
+    def check_exit_bar(self, bar) -> Optional[Tuple[str, float]]:
+        """
+        Check SL/TP against a whole OHLC bar instead of a single price.
+        Returns (action, fill_price) to CLOSE the position, or None.
+
+        A bar that opens beyond a level fills at the open (gap). When the range
+        touches both SL and TP the order is unknown; config.bar_fill picks the
+        stop ('worst') or the target ('best'). 'close' checks the close only.
+        """
+        if self.config.bar_fill == "close":
+            action = self.check_exit(bar.close, bar.timestamp)
+            return (action, bar.close) if action else None
+
+        ap = self._current_position(bar.timestamp)
+        if ap is None:
+            return None
+
+        direction = 1 if ap.side == "LONG" else -1
+        action = "SELL" if direction > 0 else "BUY"
+        gap_stop = stop_hit(direction, bar.open, ap.sl_price)
+        if gap_stop or target_hit(direction, bar.open, ap.tp_price):
+            self._record_gap(bar, action, ap, gap_stop)
+            return action, bar.open
+        # The stop is tested against the bar's adverse extreme, the target against its favourable one
+        adverse, favourable = (bar.low, bar.high) if direction > 0 else (bar.high, bar.low)
+        stopped = stop_hit(direction, adverse, ap.sl_price)
+        reached = target_hit(direction, favourable, ap.tp_price)
+
+        if stopped and (not reached or self.config.bar_fill != "best"):
+            logger.debug("STOP LOSS HIT (intrabar): %s Entry %s | SL %s | Bar %s", ap.side, ap.entry_price, ap.sl_price, bar)
+            self._record_exit(bar.timestamp, action, ap.sl_price, ap.sl_price, "stop")
+            return action, ap.sl_price
+        if reached:
+            logger.debug("TAKE PROFIT HIT (intrabar): %s Entry %s | TP %s | Bar %s", ap.side, ap.entry_price, ap.tp_price, bar)
+            self._record_exit(bar.timestamp, action, ap.tp_price, ap.tp_price, "target")
+            return action, ap.tp_price
+        return None
+
+    def _record_exit(self, timestamp, action: str, price: float, level: float, reason: str):
+        if self.journal is not None:
+            self.journal.exit(timestamp, self.config.symbol, action, price, level, reason)
+
+    def _record_gap(self, bar, action: str, ap: PositionMetadata, stop: bool):
+        if self.journal is not None:
+            self.journal.exit(bar.timestamp, self.config.symbol, action, bar.open,
+                              ap.sl_price if stop else ap.tp_price, "stop" if stop else "target")
+
+    def check_exit(self, current_price: float, timestamp) -> Optional[str]:
+        """
+        Check for SL/TP hits.
+        Returns 'BUY' or 'SELL' action to CLOSE the position, or None.
+        With a resting bracket the broker's order book handles them instead.
+        """
+        if self._bracket is not None:
+            return None
+        ap = self._current_position(timestamp)
+        if ap is None:
+            return None
+
+        direction = 1 if ap.side == "LONG" else -1
+        action = "SELL" if direction > 0 else "BUY"
+        if stop_hit(direction, current_price, ap.sl_price):
+            logger.debug("STOP LOSS HIT: %s Entry %s | SL %s | Curr %s", ap.side, ap.entry_price, ap.sl_price, current_price)
+            self._record_exit(timestamp, action, current_price, ap.sl_price, "stop")
+            return action
+        if target_hit(direction, current_price, ap.tp_price):
+            logger.debug("TAKE PROFIT HIT: %s Entry %s | TP %s | Curr %s", ap.side, ap.entry_price, ap.tp_price, current_price)
+            self._record_exit(timestamp, action, current_price, ap.tp_price, "target")
+            return action
         return None
 
     def update_position_state(self, side: str, price: float, timestamp):
@@ -94,20 +265,18 @@ class RiskManager:
         If we closed, clear it.
         """
         pos = self.broker.get_position(self.config.symbol)
+        if self.limits is not None:
+            self.limits.open_contracts += abs(pos) - self._contracts
+            self._contracts = abs(pos)
         
         if pos == 0:
             self.active_position = None
+            if self._bracket is not None:
+                self._cancel_bracket(timestamp)
         elif not self.active_position:
             # We just opened a position
             direction = "LONG" if pos > 0 else "SHORT"
-            
-            if direction == "LONG":
-                sl = price * (1 - self.config.sl_pct)
-                tp = price * (1 + self.config.tp_pct)
-            else:
-                sl = price * (1 + self.config.sl_pct)
-                tp = price * (1 - self.config.tp_pct)
-                
+            sl, tp = exit_levels(1 if pos > 0 else -1, price, self.config.sl_pct, self.config.tp_pct)
             self.active_position = PositionMetadata(
                 entry_price=price, 
                 timestamp=timestamp, 
@@ -115,4 +284,52 @@ class RiskManager:
                 sl_price=sl,
                 tp_price=tp
             )
-            logger.debug(f"Risk Params Set: {direction} @ {price} | SL: {sl:.2f} | TP: {tp:.2f}")
+            logger.debug("Risk Params Set: %s @ %s | SL: %.2f | TP: %.2f", direction, price, sl, tp)
+            if self.config.exit_orders == "bracket":
+                self._place_bracket(abs(pos), "SELL" if pos > 0 else "BUY", sl, tp, timestamp)
+
+    def _place_bracket(self, qty: int, side: str, sl: float, tp: float, timestamp):
+        symbol = self.config.symbol
+        self._bracket = (self.broker.place_stop_order(symbol, qty, side, sl, timestamp),
+                         self.broker.place_limit_order(symbol, qty, side, tp, timestamp))
+
+    def _cancel_bracket(self, timestamp):
+        # One leg has usually just filled; cancelling it again is a no-op
+        for order_id in self._bracket:
+            self.broker.cancel_order(order_id, timestamp)
+        self._bracket = None
+
+    def check_limits(self, equity: float, timestamp) -> Optional[str]:
+        """
+        Update the account limits with the equity after this tick. Returns the
+        'BUY' / 'SELL' action that flattens this symbol when a limit was just
+        breached (None otherwise, or when already flat).
+        """
+        if self.limits is None or not self.limits.update(equity, timestamp):
+            return None
+        return self.flatten_action()
+
+    def flatten_action(self) -> Optional[str]:
+        pos = self.broker.get_position(self.config.symbol)
+        if pos > 0:
+            return "SELL"
+        if pos < 0:
+            return "BUY"
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        ap = self.active_position
+        return {
+            "active_position": asdict(ap) if ap else None,
+            "contracts": self._contracts,
+            "bracket": self._bracket,
+            "limits": self.limits.snapshot() if self.limits is not None else None
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        ap = state["active_position"]
+        self.active_position = PositionMetadata(**ap) if ap else None
+        self._contracts = state["contracts"]
+        self._bracket = state["bracket"]
+        if self.limits is not None and state["limits"] is not None:
+            self.limits.restore(state["limits"])
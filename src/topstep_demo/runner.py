@@ -1,92 +1,359 @@
 import time
+from dataclasses import asdict
+from time import perf_counter_ns
 import logging
-from typing import Optional, List
+from typing import Optional
 
 from .config import BotConfig
 from .broker import MockBroker
-from .strategy import MovingAverageCrossoverStrategy
-from .risk import RiskManager
-from .data import load_price_feed
+from .strategy import SIGNAL_NAMES, build_strategy
+from .risk import AccountLimits, RiskManager
+from .data import iter_price_arrays, iter_price_signals, load_price_feed, load_price_arrays
+from .bars import Bar, open_bar_feed
 from .logging_utils import get_logger
-from .report import generate_report
+from .report import print_report
+from .metrics import MetricsAccumulator
+from .profiling import TickProfiler
 
 logger = get_logger("topstep_demo.runner")
 
-def run_simulation(config: BotConfig, fast_mode: bool = False, csv_path: Optional[str] = None):
+# Longest feed whose signals are computed in one batch. on_prices holds a few
+# float64 arrays of the whole series, so longer feeds take the per-tick path,
+# whose memory does not grow with the run length.
+BATCH_MAX_ROWS = 5_000_000
+
+def process_tick(config: BotConfig, strategy, risk_manager: RiskManager, broker: MockBroker,
+                 timestamp, price: float):
+    """
+    Run one tick of strategy -> risk -> broker for config.symbol.
+    """
+    # 1. Strategy Signal
+    signal = strategy.on_price(timestamp, price)
+    process_signal(config, risk_manager, broker, timestamp, price, signal)
+
+def process_signal(config: BotConfig, risk_manager: RiskManager, broker: MockBroker,
+                   timestamp, price: float, signal: str):
+    """
+    The risk -> broker half of process_tick, for a signal already computed
+    (e.g. precomputed by a batch strategy).
+    """
+    if risk_manager.journal is not None and signal != "HOLD":
+        risk_manager.journal.signal(timestamp, config.symbol, signal, price)
+    
+    # Resting orders trade first: they were in the market when the price arrived
+    if broker.open_orders:
+        fill_pending(config, risk_manager, broker, timestamp, price)
+    
+    # 2. Risk Management
+    # Check Exits
+    exit_action = risk_manager.check_exit(price, timestamp)
+    if exit_action:
+        broker.place_order(config.symbol, config.qty, exit_action, price, timestamp)
+        risk_manager.update_position_state(exit_action, price, timestamp)
+    elif exit_action is None:
+        if signal != "HOLD":
+            _act_on_signal(config, risk_manager, broker, signal, price, timestamp)
+
+def _act_on_signal(config: BotConfig, risk_manager: RiskManager, broker: MockBroker,
+                   signal: str, price: float, timestamp):
+    # Check Entries (if strategy says so)
+    # Strategy says BUY or SELL. 
+    # If strategy says SELL, Risk Manager only allows if we are Long (to close) OR if Shorting is allowed.
+    # Check with Risk Manager first
+    if risk_manager.check_entry(signal, price, timestamp):
+        broker.place_order(config.symbol, config.qty, signal, price, timestamp)
+        risk_manager.update_position_state(signal, price, timestamp)
+    # Note: Strategy 'SELL' might be intended as Exit.
+    # If we are long, Strategy 'SELL' is a valid exit signal too (Trend Reversal).
+    # Risk Manager check_exit usually handles SL/TP.
+    # But Strategy Exit needs to be handled here.
+    # If we have a position, and signal opposes it, we should exit.
+    pos = broker.get_position(config.symbol)
+    if pos > 0 and signal == "SELL":
+        broker.place_order(config.symbol, config.qty, "SELL", price, timestamp)
+        risk_manager.update_position_state("SELL", price, timestamp)
+    elif pos < 0 and signal == "BUY":
+        broker.place_order(config.symbol, config.qty, "BUY", price, timestamp)
+        risk_manager.update_position_state("BUY", price, timestamp)
+
+def fill_pending(config: BotConfig, risk_manager: RiskManager, broker: MockBroker, timestamp, price: float):
+    """Fill the resting config.symbol orders this price triggers and update the risk state."""
+    for trade in broker.process_pending(config.symbol, price, timestamp):
+        risk_manager.update_position_state(trade.side, trade.price, timestamp)
+
+def process_bar(config: BotConfig, strategy, risk_manager: RiskManager, broker: MockBroker, bar: Bar):
+    """
+    Run one OHLC bar: the strategy sees the close, SL/TP are resolved against
+    the bar's range (RiskManager.check_exit_bar), entries fill at the close.
+    """
+    signal = strategy.on_price(bar.timestamp, bar.close)
+    if risk_manager.journal is not None and signal != "HOLD":
+        risk_manager.journal.signal(bar.timestamp, config.symbol, signal, bar.close)
+    
+    exit_fill = risk_manager.check_exit_bar(bar)
+    if exit_fill:
+        action, fill_price = exit_fill
+        broker.place_order(config.symbol, config.qty, action, fill_price, bar.timestamp)
+        risk_manager.update_position_state(action, fill_price, bar.timestamp)
+    elif signal != "HOLD":
+        _act_on_signal(config, risk_manager, broker, signal, bar.close, bar.timestamp)
+
+def flatten_position(config: BotConfig, risk_manager: RiskManager, broker: MockBroker, price: float, timestamp):
+    """Close whatever config.symbol position is open at price (forced exit)."""
+    action = risk_manager.flatten_action()
+    if action:
+        broker.place_order(config.symbol, abs(broker.get_position(config.symbol)), action, price, timestamp)
+        risk_manager.update_position_state(action, price, timestamp)
+
+def enforce_limits(config: BotConfig, risk_manager: RiskManager, broker: MockBroker,
+                   equity: float, price: float, timestamp):
+    """Feed the tick's equity to the account limits; flatten on a breach."""
+    if risk_manager.check_limits(equity, timestamp):
+        flatten_position(config, risk_manager, broker, price, timestamp)
+
+def write_analytics(analytics, analytics_out: Optional[str], daily_out: Optional[str]):
+    if analytics_out:
+        analytics.write(analytics_out)
+        logger.info(f"Analytics written to {analytics_out}")
+    if daily_out:
+        analytics.write_daily(daily_out)
+        logger.info(f"Daily PnL written to {daily_out}")
+
+def run_simulation(config: BotConfig, fast_mode: bool = False, csv_path: Optional[str] = None,
+                   engine: str = "loop", equity_out: Optional[str] = None, curve_every: int = 1,
+                   trade_history: Optional[int] = None, show_ratios: bool = False,
+                   profile: bool = False, profile_out: Optional[str] = None, bars: Optional[str] = None,
+                   checkpoint: Optional[str] = None, checkpoint_every: int = 10_000,
+                   journal: Optional[str] = None, report: str = "rich",
+                   analytics_out: Optional[str] = None, daily_out: Optional[str] = None,
+                   trade_log: Optional[str] = None, digest: Optional[str] = None):
     """
     Run the main simulation loop.
+    engine='vectorized' runs the array backtest instead (backtest mode only).
+    
+    Report metrics are accumulated per tick in O(1) memory. The equity curve is
+    only retained (every `curve_every` bars) when equity_out is given, and the
+    broker keeps at most `trade_history` recent trades (None keeps all).
+    
+    profile=True records per-stage tick latencies (see profiling.py) and prints
+    them after the report; profile_out also writes them as JSON.
+    
+    bars switches to bar mode (see bars.open_bar_feed): 'ohlc' reads csv_path
+    as OHLCV bars, 'time:SECONDS' / 'volume:N' aggregate its ticks on the fly.
+    
+    Strategies with a batch on_prices get their signals for the whole feed in
+    one call (feeds up to BATCH_MAX_ROWS); the loop then only runs risk and
+    broker per tick. Strategies
+    with bind (multi-timeframe) get a timeframes.TimeframeCache that the tick
+    feed updates before each tick reaches them.
+    
+    checkpoint names a state file (see checkpoint.py): if it exists the run
+    resumes from it, skipping the ticks it already covers, and it is rewritten
+    every `checkpoint_every` ticks and at the end.
+    
+    journal writes signals, fills, rejections and risk events to this file
+    (see journal.EventJournal), appending when resuming from a checkpoint.
+    
+    report picks the final report's format: 'rich', 'json' or 'none'
+    (see report.print_report).
+    
+    analytics_out writes the full metrics set of analytics.analyze (JSON, or
+    CSV for a .csv path) and daily_out the per-day PnL CSV; the loop engine
+    then records equity, timestamp and position per bar.
+    
+    trade_log streams every fill to a canonical CSV and digest writes a JSON
+    run digest (SHA-256 of the fills and of the per-bar equity) for
+    regression diffs between runs or engines (see digest.py).
     """
     mode_name = "BACKTEST" if fast_mode else "SIMULATION"
     logger.info(f"Starting {mode_name} | {config.symbol} | Qty: {config.qty} | AllowShort: {config.allow_short}")
     
+    if engine == "vectorized":
+        if not fast_mode:
+            raise ValueError("The vectorized engine only supports backtest mode")
+        from .vectorized import run_vectorized_backtest
+        from pathlib import Path
+        if AccountLimits.from_config(config) is not None:
+            raise ValueError("Account limits are only enforced by the loop engine")
+        timestamps, prices = load_price_arrays(Path(csv_path or "data/sample_prices.csv"))
+        result = run_vectorized_backtest(config, timestamps, prices)
+        metrics = MetricsAccumulator(keep_curve=equity_out is not None, curve_every=curve_every)
+        for trade in result.trades:
+            metrics.record_fill(trade)
+        metrics.update_equity_batch(result.equity_curve)
+        print_report(metrics, result.trades[-5:], config.initial_cash, show_ratios=show_ratios, fmt=report)
+        if equity_out:
+            metrics.write_curve(equity_out)
+        if analytics_out or daily_out:
+            from .analytics import analyze, trade_pnl
+            closed_pnl, commissions = trade_pnl(result.trades)
+            analytics = analyze(result.equity_curve, timestamps=timestamps, positions=result.position,
+                                closed_pnl=closed_pnl, commissions=commissions,
+                                initial_equity=config.initial_cash, day_start_hour=config.trading_day_start_hour)
+            write_analytics(analytics, analytics_out, daily_out)
+        if trade_log or digest:
+            from .digest import RunDigest
+            run_digest = RunDigest(trade_log)
+            for trade in result.trades:
+                run_digest.record_fill(trade)
+            run_digest.update_equity_batch(result.equity_curve)
+            run_digest.finish(digest, config=asdict(config))
+        return
+    if engine != "loop":
+        raise ValueError(f"Unknown engine: {engine}")
+    if bars:
+        logger.info(f"Bar mode: {bars} | intrabar fills: {config.bar_fill}")
+        if checkpoint:
+            raise ValueError("Checkpoints are only supported on tick feeds")
+        if config.exit_orders == "bracket":
+            raise ValueError("Bracket exits are only supported on tick feeds")
+    
     # Initialize components
-    broker = MockBroker(initial_cash=config.initial_cash, allow_short=config.allow_short)
-    strategy = MovingAverageCrossoverStrategy(fast_window=config.fast_ma, slow_window=config.slow_ma)
-    risk_manager = RiskManager(config, broker)
+    event_journal = None
+    if journal:
+        from pathlib import Path
+        from .journal import EventJournal
+        event_journal = EventJournal(journal, append=bool(checkpoint) and Path(checkpoint).exists())
+    if (trade_log or digest) and checkpoint:
+        raise ValueError("Trade logs and digests need a full run; they are not supported with checkpoints")
+    metrics = MetricsAccumulator(keep_curve=equity_out is not None, curve_every=curve_every)
+    # Metrics only need each fill's PnL and fee; a Trade is built only for the digest
+    on_fill_pnl = metrics.record
+    recorder = None
+    if analytics_out or daily_out:
+        from .analytics import AnalyticsRecorder
+        recorder = AnalyticsRecorder()
+        def on_fill_pnl(pnl, commission):
+            metrics.record(pnl, commission)
+            recorder.record(pnl, commission)
+    run_digest = None
+    if trade_log or digest:
+        from .digest import RunDigest
+        run_digest = RunDigest(trade_log)
+    broker = MockBroker.from_config(config, max_trades=trade_history,
+                                    on_fill=run_digest.record_fill if run_digest is not None else None,
+                                    journal=event_journal, on_fill_pnl=on_fill_pnl)
+    strategy = build_strategy(config)
+    risk_manager = RiskManager(config, broker, journal=event_journal)
+    
+    # Multi-timeframe strategies read bars from one cache the feed publishes
+    # into, so every consumer shares a single incremental resampling
+    timeframe_cache = None
+    if hasattr(strategy, "bind") and not bars:
+        from .timeframes import TimeframeCache
+        timeframe_cache = TimeframeCache(strategy.timeframes, history=strategy.cache.history)
+        strategy.bind(timeframe_cache)
+    
+    profiler = None
+    if profile or profile_out:
+        profiler = TickProfiler()
+        profiler.instrument(strategy, risk_manager, broker, bars=bool(bars))
+    
+    checkpointer = None
+    offset = 0
+    if checkpoint:
+        from pathlib import Path
+        from .checkpoint import Checkpointer
+        source = str(Path(csv_path or "data/sample_prices.csv").resolve())
+        checkpointer = Checkpointer(checkpoint, config, strategy, risk_manager, broker, metrics,
+                                    every=checkpoint_every, source=source)
+        offset = checkpointer.resume()
+    
+    # Batch strategies compute every signal up front from the price arrays (up
+    # to BATCH_MAX_ROWS); bars, checkpoints and per-stage profiling need the per-tick path
+    batch = hasattr(strategy, "on_prices") and not bars and checkpointer is None and profiler is None
     
     # Price Feed
-    if csv_path:
+    if bars:
+        feed = open_bar_feed(bars, csv_path or "data/sample_prices.csv")
+    elif batch:
         from pathlib import Path
-        feed = load_price_feed(Path(csv_path))
+        timestamps, prices = load_price_arrays(Path(csv_path or "data/sample_prices.csv"))
+        batch = len(prices) <= BATCH_MAX_ROWS
+        if batch:
+            feed = iter_price_signals(timestamps, prices, strategy.on_prices(prices) + 1)
+        else:
+            logger.info(f"{len(prices):,} ticks is over the batch signal limit ({BATCH_MAX_ROWS:,}); "
+                        f"computing signals per tick")
+            feed = iter_price_arrays(timestamps, prices)
+    elif csv_path:
+        from pathlib import Path
+        feed = load_price_feed(Path(csv_path), start=offset)
     else:
         from pathlib import Path
         default_path = Path("data/sample_prices.csv")
-        feed = load_price_feed(default_path)
+        feed = load_price_feed(default_path, start=offset)
+    if timeframe_cache is not None:
+        feed = timeframe_cache.publish(feed)
 
-    start_time = time.time()
-    
-    equity_curve: List[float] = []
+    try:
+        start_time = time.time()
     
-    for timestamp, price in feed:
-        
-        # 1. Strategy Signal
-        signal = strategy.on_price(timestamp, price)
+        for event in feed:
         
-        # 2. Risk Management
-        # Check Exits
-        exit_action = risk_manager.check_exit(price, timestamp)
-        if exit_action:
-            broker.place_order(config.symbol, config.qty, exit_action, price, timestamp)
-            risk_manager.update_position_state(exit_action, price, timestamp)
-        elif exit_action is None:
-            # Check Entries (if strategy says so)
-            # Strategy says BUY or SELL. 
-            # If strategy says SELL, Risk Manager only allows if we are Long (to close) OR if Shorting is allowed.
-            if signal != "HOLD":
-                # Check with Risk Manager first
-                if risk_manager.check_entry(signal, price, timestamp):
-                    broker.place_order(config.symbol, config.qty, signal, price, timestamp)
-                    risk_manager.update_position_state(signal, price, timestamp)
-                # Note: Strategy 'SELL' might be intended as Exit.
-                # If we are long, Strategy 'SELL' is a valid exit signal too (Trend Reversal).
-                # Risk Manager check_exit usually handles SL/TP.
-                # But Strategy Exit needs to be handled here.
-                # If we have a position, and signal opposes it, we should exit.
-                pos = broker.get_position(config.symbol)
-                if pos > 0 and signal == "SELL":
-                    broker.place_order(config.symbol, config.qty, "SELL", price, timestamp)
-                    risk_manager.update_position_state("SELL", price, timestamp)
-                elif pos < 0 and signal == "BUY":
-                    broker.place_order(config.symbol, config.qty, "BUY", price, timestamp)
-                    risk_manager.update_position_state("BUY", price, timestamp)
+            if bars:
+                process_bar(config, strategy, risk_manager, broker, event)
+                timestamp, price = event.timestamp, event.close
+            elif batch:
+                timestamp, price, code = event
+                process_signal(config, risk_manager, broker, timestamp, price, SIGNAL_NAMES[code])
+            else:
+                timestamp, price = event
+                process_tick(config, strategy, risk_manager, broker, timestamp, price)
 
-        # Track Equity
-        pos_val = broker.get_position(config.symbol) * price
-        # For short, pos is negative. Value liability.
-        # Cash + Position Value is misleading for Futures/Shorts in simple terms but:
-        # Equity = Cash + Unrealized PnL? 
-        # Simpler: Equity = Cash + (Pos * Price) ? 
-        # Correct for Long.
-        # For Short: We sold 1 @ 100. Cash += 100. Pos = -1.
-        # Current Price = 110. Equity = (100 + 100) + (-1 * 110) = 200 - 110 = 90. Correct.
-        eq = broker.get_cash() + pos_val
-        equity_curve.append(eq)
+            # Track Equity
+            if profiler is not None:
+                equity_start = perf_counter_ns()
+            pos_val = broker.get_position(config.symbol) * price * broker.multiplier
+            # For short, pos is negative. Value liability.
+            # Cash + Position Value is misleading for Futures/Shorts in simple terms but:
+            # Equity = Cash + Unrealized PnL? 
+            # Simpler: Equity = Cash + (Pos * Price) ? 
+            # Correct for Long.
+            # For Short: We sold 1 @ 100. Cash += 100. Pos = -1.
+            # Current Price = 110. Equity = (100 + 100) + (-1 * 110) = 200 - 110 = 90. Correct.
+            eq = broker.get_cash() + pos_val
+            if risk_manager.limits is not None:
+                # Flattening at the same price leaves equity unchanged
+                enforce_limits(config, risk_manager, broker, eq, price, timestamp)
+            metrics.update_equity(eq)
+            if recorder is not None:
+                recorder.update(timestamp, eq, broker.get_position(config.symbol))
+            if run_digest is not None:
+                run_digest.update_equity(eq)
+            if profiler is not None:
+                profiler.record("equity", perf_counter_ns() - equity_start)
         
-        # Delay
-        if not fast_mode:
-            time.sleep(0.05) 
+            if checkpointer is not None:
+                offset += 1
+                checkpointer.maybe_save(offset)
+        
+            # Delay
+            if not fast_mode:
+                time.sleep(0.05) 
             
-    end_time = time.time()
+        end_time = time.time()
+        if checkpointer is not None:
+            checkpointer.save(offset)
     
-    # Report
-    generate_report(broker.get_trades(), broker.get_cash(), config.initial_cash, equity_curve)
+        # Report
+        # The latency profile goes into the JSON report; only a Rich report gets its table
+        extra = {"profile": profiler.to_dict()} if profiler is not None and report == "json" else None
+        print_report(metrics, broker.get_trades()[-5:], config.initial_cash, show_ratios=show_ratios, fmt=report,
+                     extra=extra)
+        if equity_out:
+            metrics.write_curve(equity_out)
+        if run_digest is not None:
+            run_digest.finish(digest, config=asdict(config))
+        if recorder is not None and recorder.equity:
+            write_analytics(recorder.analyze(initial_equity=config.initial_cash,
+                                             day_start_hour=config.trading_day_start_hour),
+                            analytics_out, daily_out)
+        if profiler is not None:
+            if report == "rich":
+                profiler.print_summary()
+            if profile_out:
+                profiler.write_json(profile_out)
+    finally:
+        if event_journal is not None:
+            event_journal.close()
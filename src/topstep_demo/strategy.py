@@ -1,15 +1,123 @@
-from typing import Protocol, Optional
+from __future__ import annotations
+
 from collections import deque
+from typing import TYPE_CHECKING, Protocol, Optional, Dict, Any, List
+import copy
 import logging
 
+from .config import BotConfig
+from .indicators import INDICATORS, IndicatorEngine
+
+if TYPE_CHECKING:
+    import numpy as np
+
 logger = logging.getLogger("topstep_demo.strategy")
 
+# Signal codes returned by batch strategies (on_prices) and used by the array engine
+SIGNAL_SELL = -1
+SIGNAL_HOLD = 0
+SIGNAL_BUY = 1
+SIGNAL_NAMES = ("SELL", "HOLD", "BUY")  # indexed by code + 1
+
+# The compensated SMAs and the original sum(window) / window each stay within
+# about window * 2**-53 * max|price| of the exact mean. MA pairs closer than
+# this multiple of (fast + slow) * max|price| (a wide margin over both errors)
+# are compared on sum(window) / window instead, so crossovers match it exactly.
+MA_TIE_TOLERANCE = 2.0 ** -47
+
 class Strategy(Protocol):
     def on_price(self, timestamp, price: float) -> str:
         """Return 'BUY', 'SELL', or 'HOLD'"""
         ...
 
-class MovingAverageCrossoverStrategy:
+class BatchStrategy(Strategy, Protocol):
+    def on_prices(self, prices: np.ndarray) -> np.ndarray:
+        """
+        Signals for a whole price series as an int8 array of SIGNAL_* codes,
+        identical to calling on_price for every price on a fresh instance.
+        Leaves this instance's per-tick state untouched.
+        """
+        ...
+
+# Registered strategies by CLI name (see register_strategy)
+STRATEGIES: Dict[str, type] = {}
+
+def register_strategy(name: str):
+    """Class decorator adding a strategy to STRATEGIES under name."""
+    def decorator(cls):
+        cls.name = name
+        STRATEGIES[name] = cls
+        return cls
+    return decorator
+
+def build_strategy(config: BotConfig) -> Strategy:
+    """Instantiate config.strategy with config.strategy_params."""
+    cls = STRATEGIES.get(config.strategy)
+    if cls is None:
+        raise ValueError(f"Unknown strategy '{config.strategy}' (available: {', '.join(sorted(STRATEGIES))})")
+    return cls.from_config(config)
+
+def parse_strategy_params(specs: Optional[List[str]]) -> Dict[str, float]:
+    """Parse repeated KEY=VALUE strategy parameters; values are numbers."""
+    params = {}
+    for spec in specs or []:
+        key, sep, value = spec.partition("=")
+        if not sep or not key:
+            raise ValueError(f"Invalid strategy parameter '{spec}', expected KEY=VALUE")
+        try:
+            params[key.strip().replace("-", "_")] = float(value)
+        except ValueError:
+            raise ValueError(f"Strategy parameter {key} must be a number, got '{value}'")
+    return params
+
+class BaseStrategy:
+    """
+    Construction from config and checkpoint support for registered
+    strategies. Subclasses keep their rolling state in plain attributes.
+    
+    Strategies built on indicators request them in _request(engine) from a
+    private IndicatorEngine they update in on_price, unless use_indicators()
+    hands them a shared engine that the caller updates once per tick.
+    """
+    name = ""
+    indicators: Optional[IndicatorEngine] = None
+    _owns_indicators = True
+
+    @classmethod
+    def from_config(cls, config: BotConfig):
+        try:
+            return cls(**config.strategy_params)
+        except TypeError as e:
+            raise ValueError(f"Invalid parameters for strategy '{cls.name}': {e}")
+
+    def _request(self, engine: IndicatorEngine):
+        raise TypeError(f"Strategy '{self.name}' does not use indicators")
+
+    def use_indicators(self, engine: IndicatorEngine):
+        """Read indicators from a shared engine; the caller must update it before every on_price."""
+        self._request(engine)
+        self._owns_indicators = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        # Skip callables (TickProfiler wraps on_price per instance) and the
+        # indicators, which are saved through the engine's own snapshot
+        indicator_types = tuple(INDICATORS.values())
+        state = {k: copy.deepcopy(v) for k, v in self.__dict__.items()
+                 if not callable(v) and k != "indicators" and not isinstance(v, indicator_types)}
+        if self.indicators is not None:
+            state["indicators"] = self.indicators.snapshot()
+        return state
+
+    def restore(self, state: Dict[str, Any]):
+        state = dict(state)
+        indicators = state.pop("indicators", None)
+        self.__dict__.update(copy.deepcopy(state))
+        if indicators is not None:
+            # In place, so a shared engine stays shared
+            self.indicators.restore(indicators)
+
+@register_strategy("ma")
+class MovingAverageCrossoverStrategy(BaseStrategy):
     """
     Moving Average Crossover.
     BUY when Fast MA crosses above Slow MA.
@@ -19,37 +127,354 @@ class MovingAverageCrossoverStrategy:
         self.fast_window = fast_window
         self.slow_window = slow_window
         
-        self.prices = deque(maxlen=slow_window + 1) # Need enough for slow
-        self.prev_fast = None
-        self.prev_slow = None
+        # Both SMAs read one compensated prefix-sum stream (see indicators.SMA),
+        # shared with any other strategy on the same engine
+        self._request(IndicatorEngine())
+        
+        # Last prices and their largest magnitude, for near-ties (MA_TIE_TOLERANCE)
+        self.recent = deque(maxlen=max(fast_window, slow_window))
+        self.max_abs = 0.0
+        self._tie_scale = MA_TIE_TOLERANCE * (fast_window + slow_window)
+        self._tie_tolerance = 0.0
+        # Sign of fast - slow on the previous price, None before both MAs exist
+        self.prev_relation = None
         
         logger.info(f"Strategy: MA Crossover ({fast_window}/{slow_window})")
 
+    def _request(self, engine: IndicatorEngine):
+        self.indicators = engine
+        self._fast = engine.request("sma", window=self.fast_window)
+        self._slow = engine.request("sma", window=self.slow_window)
+
     def on_price(self, timestamp, price: float) -> str:
-        self.prices.append(price)
+        if self._owns_indicators:
+            self.indicators.update(price)
+        self.recent.append(price)
+        if price > self.max_abs or -price > self.max_abs:
+            self.max_abs = abs(price)
+            self._tie_tolerance = self._tie_scale * self.max_abs
         
-        # Warmup
-        if len(self.prices) < self.slow_window:
+        # Calculate MAs (None until their window is full)
+        curr_fast = self._fast.value
+        curr_slow = self._slow.value
+        if curr_fast is None or curr_slow is None:
             return "HOLD"
-            
-        # Calculate MAs
-        # Note: In real app, optimize this (incremental update or pandas)
-        # For demo with deque, slicing is fine.
-        curr_fast = sum(list(self.prices)[-self.fast_window:]) / self.fast_window
-        curr_slow = sum(list(self.prices)[-self.slow_window:]) / self.slow_window
+        
+        diff = curr_fast - curr_slow
+        if -self._tie_tolerance <= diff <= self._tie_tolerance:
+            # Too close to call on the compensated sums: re-sum the windows
+            recent = list(self.recent)
+            diff = (sum(recent[-self.fast_window:]) / self.fast_window
+                    - sum(recent[-self.slow_window:]) / self.slow_window)
+        relation = (diff > 0) - (diff < 0)
         
         signal = "HOLD"
         
-        if self.prev_fast is not None and self.prev_slow is not None:
+        if self.prev_relation is not None:
             # Crossover Logic
             # Bullish Cross
-            if self.prev_fast <= self.prev_slow and curr_fast > curr_slow:
+            if self.prev_relation <= 0 and relation > 0:
                 signal = "BUY"
             # Bearish Cross
-            elif self.prev_fast >= self.prev_slow and curr_fast < curr_slow:
+            elif self.prev_relation >= 0 and relation < 0:
                 signal = "SELL"
                 
-        self.prev_fast = curr_fast
-        self.prev_slow = curr_slow
+        self.prev_relation = relation
         
         return signal
+
+    @classmethod
+    def from_config(cls, config: BotConfig):
+        if config.strategy_params:
+            raise ValueError("Strategy 'ma' takes its windows from --fast-ma / --slow-ma")
+        return cls(fast_window=config.fast_ma, slow_window=config.slow_ma)
+
+    def on_prices(self, prices: np.ndarray) -> np.ndarray:
+        from .vectorized import crossover_signals_from_sums
+        sums, errs = self.indicators.array("prefix", prices)
+        return crossover_signals_from_sums(prices, sums, errs, self.fast_window, self.slow_window)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Rolling window state; O(slow_window) whatever the run length."""
+        return {
+            "windows": (self.fast_window, self.slow_window),
+            "indicators": self.indicators.snapshot(),
+            "recent": list(self.recent),
+            "max_abs": self.max_abs,
+            "prev_relation": self.prev_relation
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        if tuple(state["windows"]) != (self.fast_window, self.slow_window):
+            raise ValueError(f"Checkpoint is for MA windows {state['windows']}, "
+                             f"not ({self.fast_window}, {self.slow_window})")
+        self.indicators.restore(state["indicators"])
+        self.recent.clear()
+        self.recent.extend(state["recent"])
+        self.max_abs = state["max_abs"]
+        self._tie_tolerance = self._tie_scale * self.max_abs
+        self.prev_relation = state["prev_relation"]
+
+@register_strategy("ema")
+class EmaCrossoverStrategy(BaseStrategy):
+    """
+    Exponential MA crossover.
+    BUY when the fast EMA crosses above the slow EMA, SELL when it crosses below.
+    Both EMAs start at the first price; no signals until `slow` prices are in.
+    """
+    def __init__(self, fast: int = 12, slow: int = 26):
+        self.fast = int(fast)
+        self.slow = int(slow)
+        self.ema_fast = None
+        self.ema_slow = None
+        self._request(IndicatorEngine())
+        logger.info(f"Strategy: EMA Crossover ({self.fast}/{self.slow})")
+
+    def _request(self, engine: IndicatorEngine):
+        self.indicators = engine
+        self._fast = engine.request("ema", period=self.fast)
+        self._slow = engine.request("ema", period=self.slow)
+
+    def on_price(self, timestamp, price: float) -> str:
+        if self._owns_indicators:
+            self.indicators.update(price)
+        prev_fast, prev_slow = self.ema_fast, self.ema_slow
+        curr_fast = self.ema_fast = self._fast.value
+        curr_slow = self.ema_slow = self._slow.value
+        
+        if self._slow.count > self.slow:
+            if prev_fast <= prev_slow and curr_fast > curr_slow:
+                return "BUY"
+            if prev_fast >= prev_slow and curr_fast < curr_slow:
+                return "SELL"
+        return "HOLD"
+
+    def on_prices(self, prices: np.ndarray) -> np.ndarray:
+        import numpy as np
+        from .indicators import fingerprint
+        prices = np.asarray(prices, dtype=np.float64)
+        key = fingerprint(prices)
+        fast = self.indicators.array("ema", prices, key=key, period=self.fast)
+        slow = self.indicators.array("ema", prices, key=key, period=self.slow)
+        signals = np.zeros(len(prices), dtype=np.int8)
+        first = max(self.slow, 1)
+        if len(prices) <= first:
+            return signals
+        prev_fast, prev_slow = fast[first - 1:-1], slow[first - 1:-1]
+        curr_fast, curr_slow = fast[first:], slow[first:]
+        buy = (prev_fast <= prev_slow) & (curr_fast > curr_slow)
+        sell = ~buy & (prev_fast >= prev_slow) & (curr_fast < curr_slow)
+        out = signals[first:]
+        out[buy] = SIGNAL_BUY
+        out[sell] = SIGNAL_SELL
+        return signals
+
+@register_strategy("rsi")
+class RsiStrategy(BaseStrategy):
+    """
+    Wilder RSI mean reversion.
+    BUY when RSI crosses up through `oversold`, SELL when it crosses down
+    through `overbought` (see indicators.RSI for the averaging).
+    """
+    def __init__(self, period: int = 14, oversold: float = 30.0, overbought: float = 70.0):
+        self.period = int(period)
+        self.oversold = float(oversold)
+        self.overbought = float(overbought)
+        self.prev_rsi = None
+        self._request(IndicatorEngine())
+        logger.info(f"Strategy: RSI ({self.period}, {self.oversold:g}/{self.overbought:g})")
+
+    def _request(self, engine: IndicatorEngine):
+        self.indicators = engine
+        self._rsi = engine.request("rsi", period=self.period)
+
+    def on_price(self, timestamp, price: float) -> str:
+        if self._owns_indicators:
+            self.indicators.update(price)
+        rsi = self._rsi.value
+        if rsi is None:
+            return "HOLD"
+        prev = self.prev_rsi
+        self.prev_rsi = rsi
+        if prev is not None:
+            if prev < self.oversold <= rsi:
+                return "BUY"
+            if prev > self.overbought >= rsi:
+                return "SELL"
+        return "HOLD"
+
+    def on_prices(self, prices: np.ndarray) -> np.ndarray:
+        import numpy as np
+        rsi = self.indicators.array("rsi", prices, period=self.period)
+        signals = np.zeros(len(rsi), dtype=np.int8)
+        if len(rsi) < 2:
+            return signals
+        # NaN (warmup) compares false, so the first RSI value never signals
+        prev, curr = rsi[:-1], rsi[1:]
+        buy = (prev < self.oversold) & (self.oversold <= curr)
+        sell = ~buy & (prev > self.overbought) & (self.overbought >= curr)
+        out = signals[1:]
+        out[buy] = SIGNAL_BUY
+        out[sell] = SIGNAL_SELL
+        return signals
+
+@register_strategy("bollinger")
+class BollingerBandStrategy(BaseStrategy):
+    """
+    Bollinger Band mean reversion.
+    BUY while price is below mean - k * std of the last `window` prices
+    (current included), SELL while it is above mean + k * std.
+    """
+    def __init__(self, window: int = 20, k: float = 2.0):
+        self.window = int(window)
+        self.k = float(k)
+        self._request(IndicatorEngine())
+        logger.info(f"Strategy: Bollinger Bands ({self.window}, {self.k:g} std)")
+
+    def _request(self, engine: IndicatorEngine):
+        self.indicators = engine
+        self._mean = engine.request("sma", window=self.window)
+        self._std = engine.request("std", window=self.window)
+
+    def on_price(self, timestamp, price: float) -> str:
+        if self._owns_indicators:
+            self.indicators.update(price)
+        mean = self._mean.value
+        if mean is None:
+            return "HOLD"
+        width = self.k * self._std.value
+        if price < mean - width:
+            return "BUY"
+        if price > mean + width:
+            return "SELL"
+        return "HOLD"
+
+    def on_prices(self, prices: np.ndarray) -> np.ndarray:
+        import numpy as np
+        from .indicators import fingerprint
+        prices = np.asarray(prices, dtype=np.float64)
+        key = fingerprint(prices)
+        mean = self.indicators.array("sma", prices, key=key, window=self.window)
+        width = self.k * self.indicators.array("std", prices, key=key, window=self.window)
+        signals = np.zeros(len(prices), dtype=np.int8)
+        # NaN (warmup) compares false
+        signals[prices < mean - width] = SIGNAL_BUY
+        signals[prices > mean + width] = SIGNAL_SELL
+        return signals
+
+@register_strategy("donchian")
+class DonchianBreakoutStrategy(BaseStrategy):
+    """
+    Donchian channel breakout.
+    BUY when price exceeds the highest of the previous `window` prices,
+    SELL when it falls below the lowest (see indicators.Channel).
+    """
+    def __init__(self, window: int = 20):
+        self.window = int(window)
+        self._request(IndicatorEngine())
+        logger.info(f"Strategy: Donchian Breakout ({self.window})")
+
+    def _request(self, engine: IndicatorEngine):
+        self.indicators = engine
+        self._channel = engine.request("channel", window=self.window)
+
+    def on_price(self, timestamp, price: float) -> str:
+        if self._owns_indicators:
+            self.indicators.update(price)
+        channel = self._channel
+        if channel.upper is None:
+            return "HOLD"
+        if price > channel.upper:
+            return "BUY"
+        if price < channel.lower:
+            return "SELL"
+        return "HOLD"
+
+    def on_prices(self, prices: np.ndarray) -> np.ndarray:
+        import numpy as np
+        prices = np.asarray(prices, dtype=np.float64)
+        upper, lower = self.indicators.array("channel", prices, window=self.window)
+        signals = np.zeros(len(prices), dtype=np.int8)
+        # NaN (warmup) compares false
+        signals[prices > upper] = SIGNAL_BUY
+        signals[prices < lower] = SIGNAL_SELL
+        return signals
+
+@register_strategy("mtf")
+class MultiTimeframeTrendStrategy(BaseStrategy):
+    """
+    MA crossover on `base`-second bars, taken only with the trend on
+    `trend`-second bars: BUY on a bullish cross while price is above the SMA
+    of the last `trend_window` trend closes, SELL on a bearish cross below it.
+    Signals fire on the tick that closes a base bar.
+    
+    Bars come from a timeframes.TimeframeCache. The runner publishes its
+    shared cache and bind()s it; unbound, the strategy feeds a private one
+    from on_price.
+    """
+    def __init__(self, base: float = 60, trend: float = 3600, fast: int = 10, slow: int = 20,
+                 trend_window: int = 20):
+        from .timeframes import TimeframeCache
+        if trend <= base:
+            raise ValueError("The trend timeframe must be longer than the base timeframe")
+        self.fast = int(fast)
+        self.slow = int(slow)
+        self.trend_window = int(trend_window)
+        self.timeframes = (base, trend)
+        self.history = max(self.fast, self.slow) + 1
+        self._owns_cache = True
+        self._attach(TimeframeCache(self.timeframes, history=max(self.history, self.trend_window)))
+        logger.info(f"Strategy: Multi-timeframe ({self._base.name} MA {self.fast}/{self.slow}, "
+                    f"{self._trend.name} SMA {self.trend_window})")
+
+    def _attach(self, cache):
+        self.cache = cache
+        self._base = cache.series(self.timeframes[0])
+        self._trend = cache.series(self.timeframes[1])
+        self._seen = self._base.count
+
+    def bind(self, cache):
+        """Read bars from a cache someone else updates, e.g. the runner's shared one."""
+        for series, needed in ((cache.series(self.timeframes[0]), self.history),
+                               (cache.series(self.timeframes[1]), self.trend_window)):
+            if series.bars.maxlen < needed:
+                raise ValueError(f"Cache keeps {series.bars.maxlen} {series.name} bars, strategy needs {needed}")
+        self._owns_cache = False
+        self._attach(cache)
+
+    def on_price(self, timestamp, price: float) -> str:
+        if self._owns_cache:
+            self.cache.update(timestamp, price)
+        base = self._base
+        if base.count == self._seen:
+            return "HOLD"
+        self._seen = base.count
+        
+        closes = base.closes
+        trend_closes = self._trend.closes
+        if len(closes) < self.history or len(trend_closes) < self.trend_window:
+            return "HOLD"
+        # Only the newest `history` closes matter; the deque may hold more
+        recent = list(closes)[-self.history:]
+        fast, slow = self.fast, self.slow
+        curr_fast = sum(recent[-fast:]) / fast
+        curr_slow = sum(recent[-slow:]) / slow
+        prev_fast = sum(recent[-fast - 1:-1]) / fast
+        prev_slow = sum(recent[-slow - 1:-1]) / slow
+        trend_ma = sum(list(trend_closes)[-self.trend_window:]) / self.trend_window
+        
+        if prev_fast <= prev_slow and curr_fast > curr_slow and price > trend_ma:
+            return "BUY"
+        if prev_fast >= prev_slow and curr_fast < curr_slow and price < trend_ma:
+            return "SELL"
+        return "HOLD"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cache state is saved here and restored in place, so a bound cache stays shared."""
+        return {"timeframes": self.timeframes, "seen": self._seen, "cache": self.cache.snapshot()}
+
+    def restore(self, state: Dict[str, Any]):
+        if tuple(state["timeframes"]) != tuple(self.timeframes):
+            raise ValueError(f"Checkpoint is for timeframes {state['timeframes']}, not {self.timeframes}")
+        self.cache.restore(state["cache"])
+        self._seen = state["seen"]
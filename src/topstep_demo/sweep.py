@@ -0,0 +1,177 @@
+from dataclasses import dataclass, replace, asdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+import csv
+import itertools
+import logging
+import os
+import time
+
+import numpy as np
+
+from .config import BotConfig
+from .vectorized import BacktestResult, run_vectorized_backtest
+
+logger = logging.getLogger("topstep_demo.sweep")
+
+RANK_KEYS = ("pnl", "win_rate", "max_drawdown")
+
+@dataclass
+class SweepResult:
+    fast_ma: int
+    slow_ma: int
+    sl_pct: float
+    tp_pct: float
+    total_trades: int
+    pnl: float
+    win_rate: float
+    max_drawdown: float
+    final_equity: float
+
+def parse_grid(spec: str, cast=float) -> List:
+    """
+    Parse a grid axis: a comma list ("5,10,20") or an inclusive range "start:stop:step".
+    """
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        if step <= 0:
+            raise ValueError(f"Grid step must be positive: {spec}")
+        count = int((stop - start) / step + 1e-9) + 1
+        return [cast(round(start + i * step, 10)) for i in range(count)]
+    return [cast(x) for x in spec.split(",") if x.strip()]
+
+def build_grid(base: BotConfig, fast: Sequence[int], slow: Sequence[int],
+               sl: Sequence[float], tp: Sequence[float]) -> List[BotConfig]:
+    """Cartesian product of the axes, skipping combos where fast >= slow."""
+    return [
+        replace(base, fast_ma=f, slow_ma=s, sl_pct=sl_pct, tp_pct=tp_pct)
+        for f, s, sl_pct, tp_pct in itertools.product(fast, slow, sl, tp)
+        if f < s
+    ]
+
+# Worker-side views onto shared arrays (set by _attach)
+_shared: Dict[str, object] = {}
+
+def _share_arrays(arrays: Dict[str, np.ndarray]) -> Tuple[List[shared_memory.SharedMemory], List[Tuple]]:
+    """
+    Copy arrays into new shared memory blocks. Returns the blocks (the caller
+    closes and unlinks them) and the specs to pass to _attach in each worker.
+    """
+    blocks, specs = [], []
+    try:
+        for key, values in arrays.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            blocks.append(shm)
+            np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+            specs.append((key, shm.name, values.dtype.str, len(values)))
+    except BaseException:
+        _release(blocks)
+        raise
+    return blocks, specs
+
+def _release(blocks: List[shared_memory.SharedMemory]):
+    for shm in blocks:
+        shm.close()
+        shm.unlink()
+
+def _attach(specs: List[Tuple]):
+    handles = []
+    for key, name, dtype, n in specs:
+        shm = shared_memory.SharedMemory(name=name)
+        handles.append(shm)
+        _shared[key] = np.ndarray((n,), dtype=dtype, buffer=shm.buf)
+    _shared["handles"] = handles  # keep mappings alive
+
+def summarize_result(config: BotConfig, result: BacktestResult) -> SweepResult:
+    """Summary metrics of one backtest; pnl is realized PnL net of commissions."""
+    closed = [t.realized_pnl for t in result.trades if t.realized_pnl is not None]
+    wins = sum(1 for pnl in closed if pnl > 0)
+    total = len(result.trades)
+    commissions = sum(t.commission for t in result.trades)
+    
+    equity = result.equity_curve
+    if len(equity):
+        peak = np.maximum.accumulate(equity)
+        safe_peak = np.where(peak > 0, peak, 1.0)
+        max_dd = float(np.where(peak > 0, (peak - equity) / safe_peak, 0.0).max())
+        final_equity = float(equity[-1])
+    else:
+        max_dd = 0.0
+        final_equity = config.initial_cash
+        
+    return SweepResult(
+        fast_ma=config.fast_ma,
+        slow_ma=config.slow_ma,
+        sl_pct=config.sl_pct,
+        tp_pct=config.tp_pct,
+        total_trades=total,
+        pnl=float(sum(closed)) - commissions,
+        win_rate=(wins / total * 100) if total > 0 else 0.0,
+        max_drawdown=max_dd * 100,
+        final_equity=final_equity
+    )
+
+def rank_results(results: List[SweepResult], rank_by: str = "pnl") -> List[SweepResult]:
+    """Sort best first in place (lowest drawdown for rank_by='max_drawdown')."""
+    if rank_by not in RANK_KEYS:
+        raise ValueError(f"rank_by must be one of {RANK_KEYS}")
+    reverse = rank_by != "max_drawdown"
+    results.sort(key=lambda r: getattr(r, rank_by), reverse=reverse)
+    return results
+
+def _evaluate(config: BotConfig) -> SweepResult:
+    result = run_vectorized_backtest(config, _shared["timestamps"], _shared["prices"])
+    return summarize_result(config, result)
+
+def run_sweep(configs: List[BotConfig], timestamps: np.ndarray, prices: np.ndarray,
+              workers: Optional[int] = None, rank_by: str = "pnl") -> List[SweepResult]:
+    """
+    Evaluate every config with the vectorized engine across a process pool.
+    The price series is copied once into shared memory; workers map it zero-copy.
+    Returns results ranked best first (lowest drawdown for rank_by='max_drawdown').
+    """
+    if rank_by not in RANK_KEYS:
+        raise ValueError(f"rank_by must be one of {RANK_KEYS}")
+    n = len(prices)
+    workers = workers or os.cpu_count() or 1
+    
+    blocks, specs = _share_arrays({
+        "timestamps": timestamps.astype("datetime64[us]"),
+        "prices": np.ascontiguousarray(prices, dtype=np.float64)
+    })
+    try:
+        start = time.time()
+        # Large chunks keep IPC negligible next to the backtests themselves
+        chunksize = max(1, len(configs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(specs,)) as pool:
+            results = list(pool.map(_evaluate, configs, chunksize=chunksize))
+        logger.info(f"Sweep: {len(configs)} configs x {n} bars on {workers} workers in {time.time() - start:.2f}s")
+    finally:
+        _release(blocks)
+        
+    return rank_results(results, rank_by)
+
+def write_results_csv(results: List[SweepResult], path: str):
+    fields = list(SweepResult.__dataclass_fields__)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for r in results:
+            writer.writerow(asdict(r))
+
+def print_results(results: List[SweepResult], top: int = 20):
+    from rich.console import Console
+    from rich.table import Table
+    
+    table = Table(title=f"Parameter Sweep (top {min(top, len(results))} of {len(results)})",
+                  show_header=True, header_style="bold magenta")
+    for col in ("#", "Fast", "Slow", "SL %", "TP %", "Trades", "PnL", "Win Rate", "Max DD"):
+        table.add_column(col)
+    for rank, r in enumerate(results[:top], start=1):
+        table.add_row(
+            str(rank), str(r.fast_ma), str(r.slow_ma),
+            f"{r.sl_pct*100:.2f}", f"{r.tp_pct*100:.2f}", str(r.total_trades),
+            f"${r.pnl:,.2f}", f"{r.win_rate:.1f}%", f"{r.max_drawdown:.2f}%"
+        )
+    Console().print(table)
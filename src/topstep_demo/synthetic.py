@@ -0,0 +1,73 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger("topstep_demo.synthetic")
+
+KINDS = ("bars", "ticks")
+
+def iter_synthetic_chunks(rows: int, seed: int = 0, kind: str = "bars",
+                          start: datetime = datetime(2024, 1, 2, 9, 30),
+                          start_price: float = 4050.0, interval_s: float = 60.0,
+                          tick_size: float = 0.25, chunk_size: int = 1_000_000
+                          ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Stream a seeded synthetic price series as (datetime64[ns], float64) chunks.
+    Memory is bounded by chunk_size, so any row count can be produced.
+    
+    kind='bars': evenly spaced bars (interval_s apart), random walk with a slow
+    cycle, rounded to tick_size.
+    kind='ticks': exponential inter-arrival times (mean interval_s) and moves
+    of -1/0/+1 ticks, like a raw trade stream.
+    Same (rows, seed, kind, ...) always yields the same series.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {KINDS}")
+    # Independent streams per quantity keep the output identical for any chunk_size
+    price_rng, time_rng = (np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(2))
+    step_ns = int(interval_s * 1e9)
+    # Time of the previous row: the first bar lands on start, the first tick just after it
+    clock = int(np.datetime64(start, "ns").astype(np.int64)) - (step_ns if kind == "bars" else 0)
+    level = start_price / tick_size   # price in ticks
+    produced = 0
+    
+    while produced < rows:
+        n = min(chunk_size, rows - produced)
+        if kind == "bars":
+            offsets = np.arange(1, n + 1, dtype=np.int64) * step_ns
+            index = np.arange(produced, produced + n, dtype=np.float64)
+            drift = np.diff(np.sin(np.append(produced - 1.0, index) / 500.0)) * 40.0
+            moves = price_rng.normal(0.0, 2.0, n) + drift
+        else:
+            gaps = time_rng.exponential(step_ns, n).astype(np.int64) + 1
+            offsets = np.cumsum(gaps)
+            moves = price_rng.choice(np.array([-1.0, 0.0, 1.0]), n, p=[0.3, 0.4, 0.3])
+            
+        path = level + np.cumsum(moves)
+        level = float(path[-1])
+        timestamps = (clock + offsets).astype("datetime64[ns]")
+        clock += int(offsets[-1])
+        produced += n
+        # Keep prices positive on very long walks
+        yield timestamps, np.maximum(np.round(path), 1.0) * tick_size
+
+def write_synthetic_csv(path: Path, rows: int, seed: int = 0, kind: str = "bars", **kwargs) -> Path:
+    """
+    Write a synthetic series as a timestamp,price CSV, one chunk at a time.
+    Extra keyword arguments are passed to iter_synthetic_chunks.
+    """
+    unit = "s" if kind == "bars" else "ms"
+    path = Path(path)
+    with open(path, "w", newline="") as f:
+        f.write("timestamp,price\n")
+        for timestamps, prices in iter_synthetic_chunks(rows, seed, kind, **kwargs):
+            ts_text = np.datetime_as_string(timestamps, unit=unit)
+            px_text = np.char.mod("%.2f", prices)
+            lines = np.char.add(np.char.add(ts_text, ","), px_text)
+            f.write("\n".join(lines.tolist()))
+            f.write("\n")
+    logger.info(f"Wrote {rows} synthetic {kind} to {path}")
+    return path
@@ -0,0 +1,242 @@
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import logging
+import re
+
+from .bars import _EPOCH, Bar
+
+logger = logging.getLogger("topstep_demo.timeframes")
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86_400}
+_SPEC = re.compile(r"^(\d+(?:\.\d+)?)([smhd]?)$")
+
+def parse_timeframe(spec: Union[str, float]) -> float:
+    """Seconds in a timeframe given as '30s', '1m', '5m', '1h', '1d' or a number of seconds."""
+    if isinstance(spec, (int, float)):
+        seconds = float(spec)
+    else:
+        match = _SPEC.match(spec.strip().lower())
+        if match is None:
+            raise ValueError(f"Invalid timeframe '{spec}', expected e.g. 30s, 1m, 5m, 1h, 1d or seconds")
+        seconds = float(match.group(1)) * _UNITS[match.group(2) or "s"]
+    if seconds <= 0:
+        raise ValueError(f"Timeframe must be positive, got {spec}")
+    return seconds
+
+def timeframe_name(seconds: float) -> str:
+    """Shortest unit label for a timeframe: 60 -> '1m', 5400 -> '90m'."""
+    for unit in ("d", "h", "m"):
+        if seconds % _UNITS[unit] == 0:
+            return f"{int(seconds // _UNITS[unit])}{unit}"
+    return f"{seconds:g}s"
+
+def _align(timestamp: datetime, interval: timedelta) -> datetime:
+    return _EPOCH + ((timestamp - _EPOCH) // interval) * interval
+
+class TimeframeSeries:
+    """
+    One timeframe of a TimeframeCache: the last `history` closed bars (and
+    their closes) plus the bar forming now. Bars are aligned and stamped like
+    TickBarAggregator's, so closed bars are identical to aggregating the base
+    ticks at this interval directly.
+
+    Consumers either poll `count` (bars closed so far) or subscribe a
+    callback(bar) run as each bar closes. Closed bars are shared; do not
+    mutate them.
+    """
+    def __init__(self, seconds: float, history: int, lower: Optional["TimeframeSeries"] = None):
+        self.seconds = seconds
+        self.name = timeframe_name(seconds)
+        self.interval = timedelta(seconds=seconds)
+        self.bars: deque = deque(maxlen=history)
+        self.closes: deque = deque(maxlen=history)
+        self.count = 0
+        self._lower = lower  # next finer timeframe, None for the base
+        self._forming: Optional[Bar] = None  # folded from closed lower bars only
+        self._end: Optional[datetime] = None
+        self._subscribers: List[Callable[[Bar], Any]] = []
+
+    def subscribe(self, callback: Callable[[Bar], Any]):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Bar], Any]):
+        self._subscribers.remove(callback)
+
+    @property
+    def last(self) -> Optional[Bar]:
+        """Most recent closed bar."""
+        return self.bars[-1] if self.bars else None
+
+    @property
+    def current(self) -> Optional[Bar]:
+        """
+        The bar forming now, including ticks not yet in a closed lower bar.
+        Built on access (a copy), so ticks only pay for the base timeframe.
+        """
+        forming = self._forming
+        if self._lower is None:
+            return None if forming is None else Bar(forming.timestamp, forming.open, forming.high,
+                                                    forming.low, forming.close, forming.volume)
+        partial = self._lower.current
+        if partial is None:
+            return None if forming is None else Bar(forming.timestamp, forming.open, forming.high,
+                                                    forming.low, forming.close, forming.volume)
+        if forming is None:
+            partial.timestamp = _align(partial.timestamp, self.interval)
+            return partial
+        return Bar(forming.timestamp, forming.open, max(forming.high, partial.high),
+                   min(forming.low, partial.low), partial.close, forming.volume + partial.volume)
+
+    def _fold(self, bar: Bar):
+        forming = self._forming
+        if forming is None:
+            start = _align(bar.timestamp, self.interval)
+            self._forming = Bar(start, bar.open, bar.high, bar.low, bar.close, bar.volume)
+            self._end = start + self.interval
+            return
+        if bar.high > forming.high:
+            forming.high = bar.high
+        if bar.low < forming.low:
+            forming.low = bar.low
+        forming.close = bar.close
+        forming.volume += bar.volume
+
+    def _publish(self, bar: Bar):
+        self.bars.append(bar)
+        self.closes.append(bar.close)
+        self.count += 1
+        for callback in self._subscribers:
+            callback(bar)
+
+    def snapshot(self) -> Dict[str, Any]:
+        forming = self._forming
+        return {
+            "bars": [(b.timestamp, b.open, b.high, b.low, b.close, b.volume) for b in self.bars],
+            "count": self.count,
+            "forming": None if forming is None else (forming.timestamp, forming.open, forming.high,
+                                                     forming.low, forming.close, forming.volume),
+            "end": self._end
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        self.bars.clear()
+        self.closes.clear()
+        for fields in state["bars"]:
+            self.bars.append(Bar(*fields))
+            self.closes.append(fields[4])
+        self.count = state["count"]
+        self._forming = None if state["forming"] is None else Bar(*state["forming"])
+        self._end = state["end"]
+
+class TimeframeCache:
+    """
+    One base tick stream resampled incrementally into several nested
+    timeframes (e.g. 1m, 5m, 1h), shared by every consumer.
+
+    A tick only updates the base bar. When it closes, that bar is folded into
+    the next timeframe's forming bar, which closes in turn if the tick is past
+    its end, and so on up. A tick therefore costs the same however many
+    timeframes there are; the extra work is one fold per closed bar.
+
+    Each timeframe must be a multiple of the one below it. Consumers get their
+    series with cache.series('5m') (or cache['5m']) instead of resampling the
+    feed themselves. The runner binds only strategies: RiskManager and
+    AccountLimits stay on the tick price, which decides where stops fill.
+    """
+    def __init__(self, timeframes: Iterable[Union[str, float]], history: int = 1_000):
+        seconds = sorted({parse_timeframe(spec) for spec in timeframes})
+        if not seconds:
+            raise ValueError("TimeframeCache needs at least one timeframe")
+        if history < 1:
+            raise ValueError("history must be at least 1 bar")
+        self.history = history
+        self._levels: List[TimeframeSeries] = []
+        for s in seconds:
+            lower = self._levels[-1] if self._levels else None
+            if lower is not None and abs(s / lower.seconds - round(s / lower.seconds)) > 1e-9:
+                raise ValueError(f"Timeframe {timeframe_name(s)} is not a multiple of {lower.name}")
+            self._levels.append(TimeframeSeries(s, history, lower))
+        self._by_seconds = {level.seconds: level for level in self._levels}
+        self._base = self._levels[0]
+        self.ticks = 0
+
+    @property
+    def timeframes(self) -> Tuple[str, ...]:
+        return tuple(level.name for level in self._levels)
+
+    def series(self, spec: Union[str, float]) -> TimeframeSeries:
+        seconds = parse_timeframe(spec)
+        level = self._by_seconds.get(seconds)
+        if level is None:
+            raise KeyError(f"Timeframe {timeframe_name(seconds)} is not cached "
+                           f"(available: {', '.join(self.timeframes)})")
+        return level
+
+    __getitem__ = series
+
+    def __contains__(self, spec) -> bool:
+        return parse_timeframe(spec) in self._by_seconds
+
+    def update(self, timestamp: datetime, price: float, size: float = 1.0):
+        """Add one base tick (timestamps ascending)."""
+        self.ticks += 1
+        base = self._base
+        bar = base._forming
+        if bar is not None:
+            if timestamp < base._end:
+                if price > bar.high:
+                    bar.high = price
+                elif price < bar.low:
+                    bar.low = price
+                bar.close = price
+                bar.volume += size
+                return
+            self._close(bar, timestamp)
+        start = _align(timestamp, base.interval)
+        base._forming = Bar(start, price, price, price, price, size)
+        base._end = start + base.interval
+
+    def _close(self, bar: Bar, timestamp: datetime):
+        """Publish a closed base bar and cascade it up the timeframes."""
+        levels = self._levels
+        level = 0
+        while True:
+            levels[level]._publish(bar)
+            level += 1
+            if level == len(levels):
+                return
+            upper = levels[level]
+            upper._fold(bar)
+            if timestamp < upper._end:
+                return
+            bar, upper._forming = upper._forming, None
+
+    def flush(self):
+        """Close every forming bar (end of stream), finest first."""
+        bar, self._base._forming = self._base._forming, None
+        for level, series in enumerate(self._levels):
+            if level > 0:
+                if bar is not None:
+                    series._fold(bar)
+                bar, series._forming = series._forming, None
+            if bar is not None:
+                series._publish(bar)
+
+    def publish(self, ticks: Iterable[Tuple]) -> Iterator[Tuple]:
+        """Pass a (timestamp, price[, size]) feed through, updating the cache before each tick is yielded."""
+        update = self.update
+        for tick in ticks:
+            update(*tick)
+            yield tick
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Bars and forming state per timeframe; subscriptions are not included."""
+        return {"ticks": self.ticks, "levels": {level.seconds: level.snapshot() for level in self._levels}}
+
+    def restore(self, state: Dict[str, Any]):
+        if set(state["levels"]) != set(self._by_seconds):
+            raise ValueError("Timeframe cache state was saved with different timeframes")
+        self.ticks = state["ticks"]
+        for seconds, level_state in state["levels"].items():
+            self._by_seconds[seconds].restore(level_state)
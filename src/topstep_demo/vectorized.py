@@ -0,0 +1,233 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+import logging
+
+import numpy as np
+
+from .config import BotConfig
+from .broker import Trade, parse_slippage
+from .kernel import closed_pnl, contract_value, exit_levels, market_fill_price
+from .strategy import MA_TIE_TOLERANCE, SIGNAL_SELL, SIGNAL_BUY, build_strategy
+
+logger = logging.getLogger("topstep_demo.vectorized")
+
+@dataclass
+class BacktestResult:
+    trades: List[Trade]
+    final_cash: float
+    equity_curve: np.ndarray
+    position: Optional[np.ndarray] = None  # net contracts after each bar
+
+def _compensated_prefix_sums(prices: np.ndarray):
+    """
+    Prefix sums plus their accumulated rounding error, with a leading zero.
+    Performs the exact same float operations as
+    indicators._PrefixSums.update so both engines agree bit-for-bit.
+    """
+    sums = np.cumsum(prices)
+    prev = np.empty_like(sums)
+    prev[0] = 0.0
+    prev[1:] = sums[:-1]
+    b = sums - prev
+    errs = np.cumsum((prev - (sums - b)) + (prices - b))
+    return np.concatenate(([0.0], sums)), np.concatenate(([0.0], errs))
+
+def ma_crossover_signals(prices: np.ndarray, fast_window: int, slow_window: int) -> np.ndarray:
+    """
+    Whole-array equivalent of MovingAverageCrossoverStrategy.on_price.
+    Returns an int8 array of SIGNAL_BUY / SIGNAL_SELL / SIGNAL_HOLD codes.
+    """
+    if len(prices) <= max(fast_window, slow_window):
+        return np.zeros(len(prices), dtype=np.int8)
+    sums, errs = _compensated_prefix_sums(prices)
+    return crossover_signals_from_sums(prices, sums, errs, fast_window, slow_window)
+
+def crossover_signals_from_sums(prices: np.ndarray, sums: np.ndarray, errs: np.ndarray, fast_window: int,
+                                slow_window: int, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+    """
+    Crossover signals for bars [start, stop) from precomputed
+    _compensated_prefix_sums of the whole series. Every moving average is a
+    difference of two prefix entries, so a window costs O(stop - start)
+    whatever the MA lengths, and bars before `start` still warm the averages.
+    Near-ties are re-summed from prices like the per-tick strategy does.
+    """
+    n = len(sums) - 1
+    stop = n if stop is None else stop
+    signals = np.zeros(stop - start, dtype=np.int8)
+    warmup = max(fast_window, slow_window)
+    # First MA value lands on index warmup - 1 and has no previous value
+    first = max(start, warmup)
+    if first >= stop:
+        return signals
+        
+    def window_mean(window: int) -> np.ndarray:
+        hi = slice(first, stop + 1)
+        lo = slice(first - window, stop + 1 - window)
+        return ((sums[hi] - sums[lo]) + (errs[hi] - errs[lo])) / window
+        
+    diff = window_mean(fast_window) - window_mean(slow_window)
+    # Any bound >= the per-tick running max works; this one covers every window read here
+    max_abs = float(np.abs(prices[first - warmup:stop]).max())
+    tolerance = MA_TIE_TOLERANCE * (fast_window + slow_window) * max_abs
+    for i in np.flatnonzero(np.abs(diff) <= tolerance).tolist():
+        bar = first - 1 + i
+        diff[i] = (sum(prices[bar + 1 - fast_window:bar + 1].tolist()) / fast_window
+                   - sum(prices[bar + 1 - slow_window:bar + 1].tolist()) / slow_window)
+    relation = np.sign(diff)
+    
+    prev, curr = relation[:-1], relation[1:]
+    buy = (prev <= 0) & (curr > 0)
+    sell = (prev >= 0) & (curr < 0)
+    
+    out = signals[first - start:]
+    out[buy] = SIGNAL_BUY
+    out[sell] = SIGNAL_SELL
+    return signals
+
+def _next_true(mask: np.ndarray) -> np.ndarray:
+    """For every index i, the smallest j >= i with mask[j], or len(mask) if none."""
+    n = len(mask)
+    idx = np.where(mask, np.arange(n), n)
+    nxt = np.minimum.accumulate(idx[::-1])[::-1]
+    return np.append(nxt, n)
+
+def _first_breach(prices: np.ndarray, start: int, stop: int, lower: float, upper: float) -> int:
+    """
+    First index in [start, stop) where price <= lower or price >= upper, else stop.
+    Callers pass the next opposing signal as stop, which is an exit bar either way.
+    Scans in doubling chunks so a trade costs O(duration), not O(remaining bars).
+    """
+    chunk = 64
+    while start < stop:
+        end = min(start + chunk, stop)
+        seg = prices[start:end]
+        hits = np.flatnonzero((seg <= lower) | (seg >= upper))
+        if hits.size:
+            return start + int(hits[0])
+        start = end
+        chunk *= 2
+    return stop
+
+def _to_datetime(ts: np.datetime64) -> datetime:
+    return ts.astype("datetime64[us]").item()
+
+def run_vectorized_backtest(config: BotConfig, timestamps: np.ndarray, prices: np.ndarray) -> BacktestResult:
+    """
+    Array-based backtest producing the same fills, PnL and equity curve as the
+    per-tick loop in runner.run_simulation (MockBroker + RiskManager semantics).
+    
+    Entries, SL/TP and opposing-signal exits are located with array scans; only
+    the (few) trades are walked in Python.
+    """
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    return backtest_signals(config, timestamps, prices, strategy_signals(config, prices))
+
+def strategy_signals(config: BotConfig, prices: np.ndarray) -> np.ndarray:
+    """Signal codes for config.strategy over prices via its batch on_prices."""
+    if config.strategy == "ma":
+        # Skip building (and logging) a strategy object for every sweep config
+        return ma_crossover_signals(prices, config.fast_ma, config.slow_ma)
+    strategy = build_strategy(config)
+    if not hasattr(strategy, "on_prices"):
+        raise ValueError(f"Strategy '{config.strategy}' has no batch on_prices; use the loop engine")
+    return strategy.on_prices(prices)
+
+def backtest_signals(config: BotConfig, timestamps: np.ndarray, prices: np.ndarray, signals: np.ndarray,
+                     close_at_end: bool = False) -> BacktestResult:
+    """
+    Run the array engine on precomputed signal codes (see run_vectorized_backtest).
+    close_at_end flattens a position still open on the last bar at that bar's
+    price, so consecutive windows can be chained from a flat book.
+    
+    Multipliers, commissions, slippage and tick rounding are applied to the
+    fills like MockBroker does; bracket exits need the loop engine.
+    """
+    if config.exit_orders != "market":
+        raise ValueError("Bracket exits are only supported by the loop engine")
+    n = len(prices)
+    qty = config.qty
+    multiplier = config.multiplier
+    fee = qty * config.commission
+    tick_size = config.tick_size
+    slippage = parse_slippage(config.slippage, tick_size)
+    
+    is_buy = signals == SIGNAL_BUY
+    is_sell = signals == SIGNAL_SELL
+    next_entry = _next_true(is_buy | is_sell if config.allow_short else is_buy)
+    next_buy = _next_true(is_buy)
+    next_sell = _next_true(is_sell)
+    
+    cash_delta = np.zeros(n, dtype=np.float64)
+    fee_delta = np.zeros(n, dtype=np.float64) if fee else None
+    pos_delta = np.zeros(n, dtype=np.int64)
+    trades: List[Trade] = []
+    
+    def fill(i: int, side: str, avg_entry: Optional[float] = None) -> float:
+        """Book a fill at bar i (closing a position entered at avg_entry, if given); returns its price."""
+        sign = 1 if side == "BUY" else -1
+        price = market_fill_price(slippage, tick_size, side, float(prices[i]))
+        cash_delta[i] = -sign * contract_value(qty, price, multiplier)
+        pos_delta[i] = sign * qty
+        if fee:
+            fee_delta[i] = -fee
+        realized_pnl = None
+        if avg_entry is not None:
+            realized_pnl = closed_pnl(avg_entry, price, sign, qty, multiplier)
+        trades.append(Trade(
+            timestamp=_to_datetime(timestamps[i]),
+            symbol=config.symbol,
+            side=side,
+            qty=qty,
+            price=price,
+            order_id=f"ORD-{len(trades) + 1:04d}",
+            realized_pnl=realized_pnl,
+            commission=fee
+        ))
+        return price
+        
+    k = int(next_entry[0])
+    # An entry on the last bar could only be flattened again immediately
+    last_entry = n - 1 if close_at_end else n
+    while k < last_entry:
+        # SL/TP follow the signal price, PnL the (slipped, rounded) fill price
+        entry_price = float(prices[k])
+        
+        if signals[k] == SIGNAL_BUY:
+            avg_entry = (qty * fill(k, "BUY")) / qty
+            sl, tp = exit_levels(1, entry_price, config.sl_pct, config.tp_pct)
+            opposite = int(next_sell[k + 1])
+            j = _first_breach(prices, k + 1, opposite, sl, tp)
+            if j >= n and close_at_end:
+                j = n - 1
+            if j < n:
+                fill(j, "SELL", avg_entry)
+        else:
+            avg_entry = (qty * fill(k, "SELL")) / qty
+            sl, tp = exit_levels(-1, entry_price, config.sl_pct, config.tp_pct)
+            opposite = int(next_buy[k + 1])
+            j = _first_breach(prices, k + 1, opposite, tp, sl)
+            if j >= n and close_at_end:
+                j = n - 1
+            if j < n:
+                fill(j, "BUY", avg_entry)
+            
+        if j >= n:
+            break
+        k = int(next_entry[j + 1])
+        
+    # Sequential cumulative sums reproduce the loop's running cash exactly;
+    # commissions are interleaved after each fill, as MockBroker deducts them
+    if fee:
+        deltas = np.empty(2 * n, dtype=np.float64)
+        deltas[0::2] = cash_delta
+        deltas[1::2] = fee_delta
+        cash = np.cumsum(np.concatenate(([config.initial_cash], deltas)))[2::2]
+    else:
+        cash = np.cumsum(np.concatenate(([config.initial_cash], cash_delta)))[1:]
+    position = np.cumsum(pos_delta)
+    equity_curve = cash + position * prices * multiplier
+    
+    final_cash = float(cash[-1]) if n else config.initial_cash
+    logger.debug(f"Vectorized backtest: {n} bars | {len(trades)} fills")
+    return BacktestResult(trades=trades, final_cash=final_cash, equity_curve=equity_curve, position=position)
@@ -0,0 +1,181 @@
+from dataclasses import dataclass, asdict, replace
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import List, Optional, Tuple
+import csv
+import logging
+import os
+import time
+
+import numpy as np
+
+from .broker import Trade
+from .config import BotConfig
+from .sweep import RANK_KEYS, _attach, _release, _share_arrays, _shared, rank_results, summarize_result
+from .vectorized import _compensated_prefix_sums, _to_datetime, backtest_signals, crossover_signals_from_sums
+
+logger = logging.getLogger("topstep_demo.walkforward")
+
+@dataclass
+class WalkForwardFold:
+    fold: int
+    train_start: int
+    train_end: int
+    test_start: int
+    test_end: int
+    test_from: datetime
+    test_to: datetime
+    fast_ma: int
+    slow_ma: int
+    sl_pct: float
+    tp_pct: float
+    train_pnl: float
+    test_pnl: float
+    test_trades: int
+    test_win_rate: float
+
+@dataclass
+class WalkForwardResult:
+    folds: List[WalkForwardFold]
+    trades: List[Trade]
+    final_cash: float
+    equity_curve: np.ndarray
+
+def make_folds(n: int, train_bars: int, test_bars: int, anchored: bool = False) -> List[Tuple[int, int, int, int]]:
+    """
+    (train_start, train_end, test_start, test_end) bar ranges, end exclusive.
+    Test windows are consecutive and cover every bar after the first train
+    window; the last one may be shorter. Rolling train windows keep a fixed
+    length, anchored ones all start at bar 0.
+    """
+    if train_bars < 1 or test_bars < 1:
+        raise ValueError("train_bars and test_bars must be >= 1")
+    folds = []
+    for test_start in range(train_bars, n, test_bars):
+        train_start = 0 if anchored else test_start - train_bars
+        folds.append((train_start, test_start, test_start, min(test_start + test_bars, n)))
+    return folds
+
+def _run_fold(task) -> Tuple[WalkForwardFold, List[Trade], np.ndarray]:
+    fold, (train_start, train_end, test_start, test_end), configs, rank_by = task
+    timestamps, prices = _shared["timestamps"], _shared["prices"]
+    sums, errs = _shared["sums"], _shared["errs"]
+
+    # sl/tp only change the trade walk; one signal array per MA pair
+    signal_cache = {}
+    train = slice(train_start, train_end)
+    results = []
+    for config in configs:
+        key = (config.fast_ma, config.slow_ma)
+        signals = signal_cache.get(key)
+        if signals is None:
+            signals = signal_cache[key] = crossover_signals_from_sums(prices, sums, errs, *key,
+                                                                      train_start, train_end)
+        result = backtest_signals(config, timestamps[train], prices[train], signals, close_at_end=True)
+        results.append(summarize_result(config, result))
+
+    best = rank_results(list(results), rank_by)[0]
+    config = configs[next(i for i, r in enumerate(results) if r is best)]
+
+    test = slice(test_start, test_end)
+    signals = crossover_signals_from_sums(prices, sums, errs, config.fast_ma, config.slow_ma,
+                                          test_start, test_end)
+    result = backtest_signals(config, timestamps[test], prices[test], signals, close_at_end=True)
+    summary = summarize_result(config, result)
+
+    return WalkForwardFold(
+        fold=fold,
+        train_start=train_start,
+        train_end=train_end,
+        test_start=test_start,
+        test_end=test_end,
+        test_from=_to_datetime(timestamps[test_start]),
+        test_to=_to_datetime(timestamps[test_end - 1]),
+        fast_ma=config.fast_ma,
+        slow_ma=config.slow_ma,
+        sl_pct=config.sl_pct,
+        tp_pct=config.tp_pct,
+        train_pnl=best.pnl,
+        test_pnl=summary.pnl,
+        test_trades=summary.total_trades,
+        test_win_rate=summary.win_rate
+    ), result.trades, result.equity_curve
+
+def run_walk_forward(configs: List[BotConfig], timestamps: np.ndarray, prices: np.ndarray,
+                     train_bars: int, test_bars: int, anchored: bool = False,
+                     workers: Optional[int] = None, rank_by: str = "pnl") -> WalkForwardResult:
+    """
+    Walk-forward optimization: for every fold, pick the best config on the
+    train window (ranked like run_sweep) and trade it on the following test
+    window. Folds run in parallel on the vectorized engine.
+
+    Compensated prefix sums of the whole series are computed once and shared
+    with the workers next to the prices, so every moving average of every
+    window and parameter is an O(1) difference instead of a fresh pass.
+    Positions are flattened at the end of each window; the out-of-sample
+    equity curves are chained into one, each fold starting from the previous
+    fold's final equity.
+    """
+    if rank_by not in RANK_KEYS:
+        raise ValueError(f"rank_by must be one of {RANK_KEYS}")
+    if not configs:
+        raise ValueError("No configs to optimize")
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    n = len(prices)
+    bounds = make_folds(n, train_bars, test_bars, anchored)
+    if not bounds:
+        raise ValueError(f"Not enough data for a walk-forward fold: {n} bars, train window {train_bars}")
+    workers = min(workers or os.cpu_count() or 1, len(bounds))
+
+    sums, errs = _compensated_prefix_sums(prices)
+    blocks, specs = _share_arrays({
+        "timestamps": timestamps.astype("datetime64[us]"),
+        "prices": prices,
+        "sums": sums,
+        "errs": errs
+    })
+    try:
+        start = time.time()
+        tasks = [(i + 1, b, configs, rank_by) for i, b in enumerate(bounds)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(specs,)) as pool:
+            outcomes = list(pool.map(_run_fold, tasks))
+        logger.info(f"Walk-forward: {len(bounds)} folds x {len(configs)} configs on {workers} workers "
+                    f"in {time.time() - start:.2f}s")
+    finally:
+        _release(blocks)
+
+    initial_cash = configs[0].initial_cash
+    carry = initial_cash
+    folds, trades, curves = [], [], []
+    for fold, fold_trades, curve in outcomes:
+        folds.append(fold)
+        for t in fold_trades:
+            trades.append(replace(t, order_id=f"ORD-{len(trades) + 1:04d}"))
+        curves.append(curve + (carry - initial_cash))
+        carry = float(curves[-1][-1])
+
+    return WalkForwardResult(folds=folds, trades=trades, final_cash=carry,
+                             equity_curve=np.concatenate(curves))
+
+def write_folds_csv(folds: List[WalkForwardFold], path: str):
+    fields = list(WalkForwardFold.__dataclass_fields__)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for fold in folds:
+            writer.writerow(asdict(fold))
+
+def print_folds(folds: List[WalkForwardFold]):
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title=f"Walk-Forward Folds ({len(folds)})", show_header=True, header_style="bold magenta")
+    for col in ("#", "Test Bars", "Test Start", "Fast", "Slow", "SL %", "TP %", "Train PnL", "Test PnL", "Trades", "Win Rate"):
+        table.add_column(col)
+    for f in folds:
+        table.add_row(
+            str(f.fold), f"{f.test_start}-{f.test_end}", f"{f.test_from:%Y-%m-%d %H:%M}", str(f.fast_ma), str(f.slow_ma),
+            f"{f.sl_pct*100:.2f}", f"{f.tp_pct*100:.2f}", f"${f.train_pnl:,.2f}",
+            f"${f.test_pnl:,.2f}", str(f.test_trades), f"{f.test_win_rate:.1f}%"
+        )
+    Console().print(table)